@@ -14,10 +14,12 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+import numpy as np
 from sostrades_optimization_plugins.models.differentiable_model import (
     DifferentiableModel,
 )
 
+from energy_models.core.jacobian_sparsity import combine_diagonal_partials
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
@@ -25,45 +27,120 @@ class CCUS(DifferentiableModel):
     """CCUS model"""
     ccs_list = [GlossaryEnergy.carbon_captured, GlossaryEnergy.carbon_storage]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ccs stream by energy layout of the energy flows of the ccs streams, kept while the inputs columns are unchanged
+        self.flows_inputs_signature = None
+        self.flows_plans = {}
 
     def compute(self):
         self.configure()
-        self.compute_ccus_production()
-        self.compute_ccus_demands()
-        self.compute_ccus_energy_demand()
-        self.compute_ccus_energy_consumption()
+        self.compute_ccus_streams()
         self.compute_land_use()
         self.compute_emissions()
-        self.compute_ccus_streams_ratios()
-        self.compute_ccus_price()
 
-    def compute_ccus_production(self):
-        """Carbon captured production and carbon storage capacity"""
-        input_unit = GlossaryEnergy.StreamProductionDf['unit']
-        conversion_factor = GlossaryEnergy.conversion_dict[input_unit][GlossaryEnergy.CCUSOutput['unit']]
-        self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{GlossaryEnergy.Years}"] = self.years
+    def configure(self):
+        self.years = self.np.arange(self.inputs[GlossaryEnergy.YearStart], self.inputs[GlossaryEnergy.YearEnd] + 1)
+        self.zeros_array = self.years * 0.
+        inputs_signature = tuple(self.inputs)
+        if inputs_signature != self.flows_inputs_signature:
+            self.flows_inputs_signature = inputs_signature
+            self.flows_plans = {}
 
-        self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{GlossaryEnergy.carbon_storage}"] = \
-            self.inputs[f"{GlossaryEnergy.carbon_storage}.{GlossaryEnergy.StreamProductionValue}:{GlossaryEnergy.carbon_storage}"]\
-            * conversion_factor
+    def get_flows_plan(self, flow_varname: str):
+        """
+        Layout of the flows of flow_varname (energy demand, energy consumption) of the ccs streams :
+        (energies in order of appearance, [ccs stream][energy] input path or None)
+        """
+        if flow_varname not in self.flows_plans:
+            energies = []
+            streams_energies = []
+            for stream in self.ccs_list:
+                stream_energies = self.get_colnames_input_dataframe(
+                    df_name=f'{stream}.{flow_varname}', expect_years=True, full_path=False)
+                energies.extend(energy for energy in stream_energies if energy not in energies)
+                streams_energies.append(stream_energies)
+            inputs_paths = [[f'{stream}.{flow_varname}:{energy}' if energy in stream_energies else None for energy in energies]
+                            for stream, stream_energies in zip(self.ccs_list, streams_energies)]
+            self.flows_plans[flow_varname] = (energies, inputs_paths)
+        return self.flows_plans[flow_varname]
+
+    def get_flows_tensor(self, flow_varname: str):
+        """Flows of flow_varname as a [ccs stream, energy, year] tensor, null where a ccs stream does not use an energy"""
+        energies, inputs_paths = self.get_flows_plan(flow_varname)
+        if not energies:
+            return energies, self.np.zeros((len(self.ccs_list), 0, len(self.years)))
+        flows = self.np.stack([self.zeros_array if input_path is None else self.inputs[input_path]
+                               for stream_inputs_paths in inputs_paths for input_path in stream_inputs_paths])
+        return energies, self.np.reshape(flows, (len(self.ccs_list), len(energies), len(self.years)))
+
+    def get_ccs_streams_arrays(self):
+        """
+        Productions (in CCUSOutput unit), demands (in Gt) and prices of the ccs streams as [ccs stream, year] arrays,
+        and demand of carbon captured of the energy mix in Gt
+        """
+        productions = self.np.stack([self.inputs[f"{stream}.{GlossaryEnergy.StreamProductionValue}:{stream}"] for stream in self.ccs_list])
+        prices = self.np.stack([self.inputs[f"{stream}.{GlossaryEnergy.StreamPricesValue}:{stream}"] for stream in self.ccs_list])
 
-        self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{GlossaryEnergy.carbon_captured}"] = \
-            self.inputs[f"{GlossaryEnergy.carbon_captured}.{GlossaryEnergy.StreamProductionValue}:{GlossaryEnergy.carbon_captured}"]\
-            * conversion_factor
+        # carbon storage demand is carbon capture production - energy mix demand for carbon capture
+        output_unit = "Gt"
+        captured_production = productions[self.ccs_list.index(GlossaryEnergy.carbon_captured)] * \
+            GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][output_unit]
+        energy_mix_demand = self.inputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_captured}"] * \
+            GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixCCSDemandsDf['unit']][output_unit]
+        streams_demands = {GlossaryEnergy.carbon_captured: energy_mix_demand,
+                           GlossaryEnergy.carbon_storage: captured_production - energy_mix_demand}
+        demands = self.np.stack([streams_demands[stream] for stream in self.ccs_list])
+
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][GlossaryEnergy.CCUSOutput['unit']]
+        return productions * conversion_factor, demands, prices, captured_production, energy_mix_demand
+
+    def compute_ccus_streams(self):
+        """
+        Productions, demands, availability ratios and price of the ccs streams computed on [ccs stream, year] arrays,
+        energies demands and consumptions of the CCUS sector summed from [ccs stream, energy, year] tensors
+        """
+        productions, demands, prices, captured_production, energy_mix_demand = self.get_ccs_streams_arrays()
+        streams_indices = {stream: i for i, stream in enumerate(self.ccs_list)}
 
-        self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured to store (after direct usages)"] = \
-            self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{GlossaryEnergy.carbon_captured}"] - \
+        # Carbon captured production and carbon storage capacity
+        self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{GlossaryEnergy.Years}"] = self.years
+        for stream in (GlossaryEnergy.carbon_storage, GlossaryEnergy.carbon_captured):
+            self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{stream}"] = productions[streams_indices[stream]]
+        carbon_captured_to_store = productions[streams_indices[GlossaryEnergy.carbon_captured]] - \
             self.inputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.carbon_captured}"]
-
+        self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured to store (after direct usages)"] = carbon_captured_to_store
         self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured and stored"] = \
-            self.np.minimum(
-                self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured to store (after direct usages)"],
-                self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{GlossaryEnergy.carbon_storage}"]
-            )
+            self.np.minimum(carbon_captured_to_store, productions[streams_indices[GlossaryEnergy.carbon_storage]])
 
-    def configure(self):
-        self.years = self.np.arange(self.inputs[GlossaryEnergy.YearStart], self.inputs[GlossaryEnergy.YearEnd] + 1)
-        self.zeros_array = self.years * 0.
+        # demands
+        self.outputs[f"{GlossaryEnergy.carbon_captured}_demand_breakdown"] = {"Carbon captured demand for Energy Mix": energy_mix_demand}
+        self.outputs[f"{GlossaryEnergy.carbon_storage}_demand_breakdown"] = {"Carbon captured by CCUS": captured_production,
+                                                                               "Carbon captured demand for Energy Mix": - energy_mix_demand}
+        self.outputs[f"demands_df:{GlossaryEnergy.Years}"] = self.years
+        for stream in (GlossaryEnergy.carbon_storage, GlossaryEnergy.carbon_captured):
+            self.outputs[f"demands_df:{stream}"] = demands[streams_indices[stream]]
+
+        # energies demands and consumptions (all forms) of CCUS sector
+        for output_varname, flow_varname, input_dict, output_dict in (
+                (f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}", GlossaryEnergy.StreamEnergyDemandValue,
+                 GlossaryEnergy.StreamEnergyDemand, GlossaryEnergy.EnergyDemandDf),
+                (f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}", GlossaryEnergy.StreamEnergyConsumptionValue,
+                 GlossaryEnergy.StreamEnergyConsumption, GlossaryEnergy.EnergyConsumptionDf)):
+            conversion_factor = GlossaryEnergy.conversion_dict[input_dict['unit']][output_dict['unit']]
+            energies, flows = self.get_flows_tensor(flow_varname)
+            flows_by_energy = self.np.sum(flows, axis=0) * conversion_factor
+            self.outputs[f"{output_varname}:{GlossaryEnergy.Years}"] = self.years
+            for i, energy in enumerate(energies):
+                self.outputs[f"{output_varname}:{energy}"] = flows_by_energy[i]
+
+        # Availibility = min(1 , prod/ demand)
+        ratios = self.np.maximum(self.np.minimum(productions / (demands + 1e-6), 1), 0) * 100.  # avoid division by zero
+        for i, stream in enumerate(self.ccs_list):
+            self.outputs[f"{GlossaryEnergy.CCUSAvailabilityRatiosValue}:{stream}"] = ratios[i]
+
+        # Price in $/tCO2 captured and stored
+        self.outputs[f'{GlossaryEnergy.CCUSPriceValue}:Captured and stored'] = self.np.sum(prices, axis=0)
 
     def compute_land_use(self):
         self.outputs[f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.LandUseRequiredValue}:{GlossaryEnergy.Years}"] = self.years
@@ -81,73 +158,76 @@ class CCUS(DifferentiableModel):
         self.outputs[f"{GlossaryEnergy.CCUS_CO2EmissionsDfValue}:{GlossaryEnergy.CO2}"] = \
             self.inputs[f"{GlossaryEnergy.carbon_captured}.{GlossaryEnergy.StreamProductionValue}:{GlossaryEnergy.carbon_captured}"] * conversion_factor
 
-    def compute_ccus_streams_ratios(self):
-        """Availibility = min(1 , prod/ demand)"""
-        for stream in [GlossaryEnergy.carbon_captured, GlossaryEnergy.carbon_storage]:
-            demand = self.outputs[f"demands_df:{stream}"]
-            prod = self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:{stream}"]
-            self.outputs[f"{GlossaryEnergy.CCUSAvailabilityRatiosValue}:{stream}"] = \
-                self.np.maximum(self.np.minimum(prod/ (demand + 1e-6), 1), 0) * 100. # avoid division by zero
-
-    def compute_ccus_price(self):
-        """Price in $/tCO2 captured and stored"""
-        self.outputs[f'{GlossaryEnergy.CCUSPriceValue}:Captured and stored'] = \
-            self.inputs[f"{GlossaryEnergy.carbon_captured}.{GlossaryEnergy.StreamPricesValue}:{GlossaryEnergy.carbon_captured}"] + \
-            self.inputs[f"{GlossaryEnergy.carbon_storage}.{GlossaryEnergy.StreamPricesValue}:{GlossaryEnergy.carbon_storage}"]
-
-
-    def compute_ccus_demands(self):
-        """
-        carbon storage demand is carbon capture production - energy mix demand for carbon capture
+    def compute_diagonal_jacobian(self) -> dict:
         """
-        output_unit = "Gt"
-
-        carbon_storage_demand_breakdown = {
-            "Carbon captured by CCUS": self.inputs[f"{GlossaryEnergy.carbon_captured}.{GlossaryEnergy.StreamProductionValue}:{GlossaryEnergy.carbon_captured}"]
-                                       * GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][output_unit],
-            "Carbon captured demand for Energy Mix": - self.inputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_captured}"]
-                                                     * GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixCCSDemandsDf['unit']][output_unit]
-        }
-        carbon_capture_demand_breakdown = {
-            "Carbon captured demand for Energy Mix" : - carbon_storage_demand_breakdown["Carbon captured demand for Energy Mix"]
-        }
-
-        self.outputs[f"{GlossaryEnergy.carbon_captured}_demand_breakdown"] = carbon_capture_demand_breakdown
-        self.outputs[f"{GlossaryEnergy.carbon_storage}_demand_breakdown"] = carbon_storage_demand_breakdown
-
-        self.outputs[f"demands_df:{GlossaryEnergy.Years}"] = self.years
-        self.outputs[f"demands_df:{GlossaryEnergy.carbon_storage}"] = self.np.sum(self.np.array(list(carbon_storage_demand_breakdown.values())), axis=0)
-        self.outputs[f"demands_df:{GlossaryEnergy.carbon_captured}"] = carbon_capture_demand_breakdown["Carbon captured demand for Energy Mix"]
-
-    def compute_ccus_energy_demand(self):
-        """Compute energies demand (all forms) of CCUS sector"""
-        self.outputs[f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}:{GlossaryEnergy.Years}"] = self.years
-        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyDemand['unit']][GlossaryEnergy.EnergyDemandDf['unit']]
+        Partial derivatives of the outputs with respect to the inputs, at the inputs of the last compute.
 
+        Each year of the outputs only depends on the same year of the inputs : the blocks are returned as their
+        diagonals, {output path: {input path: diagonal}}, with the same layout as compute_ccus_streams.
+        The demand breakdowns are not differentiated.
+        """
+        years_ones = np.ones(len(self.years))
+        productions, demands = (np.asarray(array, dtype=float) for array in self.get_ccs_streams_arrays()[:2])
+        production_paths = {stream: f"{stream}.{GlossaryEnergy.StreamProductionValue}:{stream}" for stream in self.ccs_list}
+        energy_mix_consumption_path = f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.carbon_captured}"
+        energy_mix_demand_path = f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_captured}"
+        jacobian = {}
+
+        # productions
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][GlossaryEnergy.CCUSOutput['unit']]
+        productions_partials = {stream: {production_paths[stream]: conversion_factor * years_ones} for stream in self.ccs_list}
         for stream in self.ccs_list:
-            for other_energy_demand in self.get_colnames_input_dataframe(
-                    df_name=f'{stream}.{GlossaryEnergy.StreamEnergyDemandValue}', expect_years=True, full_path=False):
-                if f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}:{other_energy_demand}" not in self.outputs:
-                    self.outputs[
-                        f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}:{other_energy_demand}"] = self.zeros_array
-                self.outputs[f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}:{other_energy_demand}"] = \
-                    self.outputs[f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}:{other_energy_demand}"] + \
-                    self.inputs[
-                        f'{stream}.{GlossaryEnergy.StreamEnergyDemandValue}:{other_energy_demand}'] * conversion_factor
-
-    def compute_ccus_energy_consumption(self):
-        """Compute CCUS sector energies consumption"""
-        self.outputs[f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}:{GlossaryEnergy.Years}"] = self.years
-        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyConsumption['unit']][GlossaryEnergy.EnergyConsumptionDf['unit']]
-
+            jacobian[f"{GlossaryEnergy.CCUSOutputValue}:{stream}"] = productions_partials[stream]
+        to_store_partials = combine_diagonal_partials((1., productions_partials[GlossaryEnergy.carbon_captured]),
+                                                      (-1., {energy_mix_consumption_path: years_ones}))
+        jacobian[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured to store (after direct usages)"] = to_store_partials
+        # minimum of carbon captured to store and storage capacity, halved where they are equal
+        to_store = np.asarray(self.outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured to store (after direct usages)"], dtype=float)
+        storage = productions[self.ccs_list.index(GlossaryEnergy.carbon_storage)]
+        to_store_weights = (to_store < storage) + 0.5 * (to_store == storage)
+        jacobian[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured and stored"] = combine_diagonal_partials(
+            (to_store_weights, to_store_partials), (1. - to_store_weights, productions_partials[GlossaryEnergy.carbon_storage]))
+
+        # demands
+        output_unit = "Gt"
+        conversion_factor_production = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][output_unit]
+        conversion_factor_demand = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixCCSDemandsDf['unit']][output_unit]
+        demands_partials = {
+            GlossaryEnergy.carbon_captured: {energy_mix_demand_path: conversion_factor_demand * years_ones},
+            GlossaryEnergy.carbon_storage: {production_paths[GlossaryEnergy.carbon_captured]: conversion_factor_production * years_ones,
+                                            energy_mix_demand_path: - conversion_factor_demand * years_ones}}
         for stream in self.ccs_list:
-            for other_energy_consumption in self.get_colnames_input_dataframe(
-                    df_name=f'{stream}.{GlossaryEnergy.StreamEnergyConsumptionValue}', expect_years=True, full_path=False):
-                if f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}:{other_energy_consumption}" not in self.outputs:
-                    self.outputs[
-                        f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}:{other_energy_consumption}"] = self.zeros_array
-                self.outputs[f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}:{other_energy_consumption}"] = \
-                    self.outputs[f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}:{other_energy_consumption}"] + \
-                    self.inputs[
-                        f'{stream}.{GlossaryEnergy.StreamEnergyConsumptionValue}:{other_energy_consumption}'] * conversion_factor
-
+            jacobian[f"demands_df:{stream}"] = demands_partials[stream]
+
+        # energies demands and consumptions
+        for output_varname, flow_varname, input_dict, output_dict in (
+                (f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}", GlossaryEnergy.StreamEnergyDemandValue,
+                 GlossaryEnergy.StreamEnergyDemand, GlossaryEnergy.EnergyDemandDf),
+                (f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}", GlossaryEnergy.StreamEnergyConsumptionValue,
+                 GlossaryEnergy.StreamEnergyConsumption, GlossaryEnergy.EnergyConsumptionDf)):
+            conversion_factor = GlossaryEnergy.conversion_dict[input_dict['unit']][output_dict['unit']]
+            energies, inputs_paths = self.get_flows_plan(flow_varname)
+            for i, energy in enumerate(energies):
+                jacobian[f"{output_varname}:{energy}"] = {stream_inputs_paths[i]: conversion_factor * years_ones
+                                                          for stream_inputs_paths in inputs_paths if stream_inputs_paths[i] is not None}
+
+        # availability ratios, max(min(production / demand, 1), 0), constant outside [0, 1] and halved at the bounds
+        denominators = demands + 1e-6
+        ratios = productions / denominators
+        unsaturated = ((ratios > 0) & (ratios < 1)) + 0.5 * ((ratios == 0) | (ratios == 1))
+        for i, stream in enumerate(self.ccs_list):
+            jacobian[f"{GlossaryEnergy.CCUSAvailabilityRatiosValue}:{stream}"] = combine_diagonal_partials(
+                (100. * unsaturated[i] / denominators[i], productions_partials[stream]),
+                (- 100. * unsaturated[i] * ratios[i] / denominators[i], demands_partials[stream]))
+
+        # price, land use and emissions
+        jacobian[f'{GlossaryEnergy.CCUSPriceValue}:Captured and stored'] = {
+            f"{stream}.{GlossaryEnergy.StreamPricesValue}:{stream}": years_ones for stream in self.ccs_list}
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamLandUseDf['unit']][GlossaryEnergy.StreamLandUseDf['unit']]
+        jacobian[f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.LandUseRequiredValue}:Land use"] = {
+            f"{stream}.{GlossaryEnergy.LandUseRequiredValue}:Land use": conversion_factor * years_ones for stream in self.ccs_list}
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][GlossaryEnergy.CCUS_CO2EmissionsDf['unit']]
+        jacobian[f"{GlossaryEnergy.CCUS_CO2EmissionsDfValue}:{GlossaryEnergy.CO2}"] = {
+            production_paths[GlossaryEnergy.carbon_captured]: conversion_factor * years_ones}
+
+        return {output_path: partials for output_path, partials in jacobian.items() if partials}
@@ -22,20 +22,21 @@ import pandas as pd
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 from sostrades_optimization_plugins.models.autodifferentiated_discipline import (
     AutodifferentiedDisc,
 )
 
 from energy_models.core.ccus.ccus import CCUS
+from energy_models.core.jacobian_sparsity import DiagonalJacobianMixin
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
-class CCUS_Discipline(AutodifferentiedDisc):
+class CCUS_Discipline(DiagonalJacobianMixin, AutodifferentiedDisc):
     # ontology information
     _ontology_data = {
         'label': 'Carbon Capture and Storage Model',
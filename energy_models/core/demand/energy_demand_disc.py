@@ -21,14 +21,14 @@ from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 
 from energy_models.core.demand.energy_demand import EnergyDemand
 from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
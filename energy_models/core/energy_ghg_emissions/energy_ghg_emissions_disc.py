@@ -29,17 +29,17 @@ from climateeconomics.sos_wrapping.sos_wrapping_emissions.ghgemissions.ghgemissi
     GHGemissionsDiscipline,
 )
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 
 from energy_models.core.ccus.ccus import CCUS
 from energy_models.core.energy_ghg_emissions.energy_ghg_emissions import (
     EnergyGHGEmissions,
 )
 from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.core.stream_type.energy_models.biomass_dry import BiomassDry
 from energy_models.glossaryenergy import GlossaryEnergy
 
@@ -17,20 +17,21 @@ limitations under the License.
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 from sostrades_optimization_plugins.models.autodifferentiated_discipline import (
     AutodifferentiedDisc,
 )
 
 from energy_models.core.energy_market.energy_market_model import EnergyMarket
+from energy_models.core.jacobian_sparsity import DiagonalJacobianMixin
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
-class EnergyMarketDiscipline(AutodifferentiedDisc):
+class EnergyMarketDiscipline(DiagonalJacobianMixin, AutodifferentiedDisc):
     # ontology information
     _ontology_data = {
         "label": "Energy Market Model",
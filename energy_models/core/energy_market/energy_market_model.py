@@ -15,10 +15,12 @@ limitations under the License.
 '''
 import logging
 
+import numpy as np
 from sostrades_optimization_plugins.models.differentiable_model import (
     DifferentiableModel,
 )
 
+from energy_models.core.jacobian_sparsity import combine_diagonal_partials
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
@@ -29,6 +31,9 @@ class EnergyMarket(DifferentiableModel):
         super().__init__(sosname=name)
         self.name = name
         self.logger = logger
+        # actor by energy layout of the demands, kept while the inputs columns are unchanged
+        self.demands_inputs_signature = None
+        self.demands_plan = None
 
     def compute(self):
         self.configure_parameters_update()
@@ -45,80 +50,150 @@ class EnergyMarket(DifferentiableModel):
         self.year_end = self.inputs[GlossaryEnergy.YearEnd]
         self.years = self.np.arange(self.year_start, self.year_end + 1)
         self.zeros_array = self.years * 0.
+        self.configure_demands_plan()
 
-
-    def compute_availability_ratios(self):
+    def configure_demands_plan(self):
         """
-        For each consumer sector, compute the limitation ratio for its usage
+        Layout of the demands of the consumers actors, resolved when the actors or their demanded energies change :
+        (demanded energies in order of appearance, [actor][demanded energy] input path or None)
+        """
+        inputs_signature = tuple(self.inputs)
+        if inputs_signature == self.demands_inputs_signature:
+            return
+        self.demands_inputs_signature = inputs_signature
+        demanded_energies = []
+        actors_demanded_energies = []
+        for consumer_actor in self.inputs['consumers_actors']:
+            actor_demanded_energies = self.get_colnames_input_dataframe(
+                df_name=f'{consumer_actor}_{GlossaryEnergy.EnergyDemandValue}', expect_years=True, full_path=False)
+            demanded_energies.extend(energy for energy in actor_demanded_energies if energy not in demanded_energies)
+            actors_demanded_energies.append(actor_demanded_energies)
+        inputs_paths = [[f'{consumer_actor}_{GlossaryEnergy.EnergyDemandValue}:{energy}' if energy in actor_demanded_energies else None
+                         for energy in demanded_energies]
+                        for consumer_actor, actor_demanded_energies in zip(self.inputs['consumers_actors'], actors_demanded_energies)]
+        self.demands_plan = (demanded_energies, inputs_paths)
+
+    def get_demands_tensor(self):
+        """Demands of the consumers actors as an [actor, energy, year] tensor, null where an actor does not demand an energy"""
+        demanded_energies, inputs_paths = self.demands_plan
+        if not inputs_paths or not demanded_energies:
+            return self.np.zeros((len(inputs_paths), len(demanded_energies), len(self.years)))
+        demands = self.np.stack([self.zeros_array if input_path is None else self.inputs[input_path]
+                                 for actor_inputs_paths in inputs_paths for input_path in actor_inputs_paths])
+        return self.np.reshape(demands, (len(inputs_paths), len(demanded_energies), len(self.years)))
+
+    def get_market_columns(self) -> list:
+        """Columns of the market demands : demanded energies and Total"""
+        return self.demands_plan[0] + ['Total']
+
+    def get_demands_and_productions(self):
+        """
+        Demands and net productions in a common unit, as [column, year] arrays on the market columns
         """
-        self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{GlossaryEnergy.Years}"] = self.years
         commun_unit = "PWh"
         conversion_factor_demand = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyDemandDf['unit']][commun_unit]
         conversion_factor_prod = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixNetProductionsDf['unit']][commun_unit]
         if self.inputs[GlossaryEnergy.SimplifiedMarketEnergyDemandValue]:
-            demand = self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:Total"] * conversion_factor_demand
-            production = self.inputs[f"{GlossaryEnergy.EnergyMixNetProductionsDfValue}:Total"] * conversion_factor_prod
-            ratio = self.np.maximum(self.np.minimum(production / (demand + 1e-6), 1), 0) * 100.
-
-            for column in self.get_colnames_output_dataframe(df_name=GlossaryEnergy.EnergyMarketDemandsDfValue, expect_years=True):
-                self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{column}"] = ratio
-            self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:Total"] = ratio
+            columns = ['Total']
         else:
-            for column in self.get_colnames_output_dataframe(df_name=GlossaryEnergy.EnergyMarketDemandsDfValue, expect_years=True):
-                demand = self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{column}"] * conversion_factor_demand
-                production = self.inputs[f"{GlossaryEnergy.EnergyMixNetProductionsDfValue}:{column}"] * conversion_factor_prod
-                self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{column}"] = \
-                    self.np.maximum(self.np.minimum(production / (demand + 1e-6), 1), 0) * 100.
+            columns = self.get_market_columns()
+        demands = self.np.stack([self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{column}"] for column in columns])
+        productions = self.np.stack([self.inputs[f"{GlossaryEnergy.EnergyMixNetProductionsDfValue}:{column}"] for column in columns])
+        return demands * conversion_factor_demand, productions * conversion_factor_prod
+
+    def compute_availability_ratios(self):
+        """
+        For each consumer sector, compute the limitation ratio for its usage
+        """
+        self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{GlossaryEnergy.Years}"] = self.years
+        demands, productions = self.get_demands_and_productions()
+        ratios = self.np.maximum(self.np.minimum(productions / (demands + 1e-6), 1), 0) * 100.
+        if self.inputs[GlossaryEnergy.SimplifiedMarketEnergyDemandValue]:
+            # the ratio of the total is applied to all the energies
+            ratios = ratios[0] + self.np.zeros((len(self.get_market_columns()), 1))
+        for i, column in enumerate(self.get_market_columns()):
+            self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{column}"] = ratios[i]
 
     def compute_total_energy_demand(self):
         self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{GlossaryEnergy.Years}"] = self.years
         self.outputs[f"sectors_demand_breakdown:{GlossaryEnergy.Years}"] = self.years
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyDemandDf['unit']][GlossaryEnergy.EnergyMarketDemandsDf['unit']]
-        for consumer_actor in self.inputs['consumers_actors']:
+        demands = self.get_demands_tensor() * conversion_factor
 
-            self.outputs[f"sectors_demand_breakdown:{consumer_actor}"] = self.sum_cols(
-                self.get_cols_input_dataframe(df_name=f'{consumer_actor}_{GlossaryEnergy.EnergyDemandValue}', expect_years=True) * conversion_factor,
-                index=self.years
-            )
+        actors_demands = self.np.sum(demands, axis=1)
+        for i, consumer_actor in enumerate(self.inputs['consumers_actors']):
+            self.outputs[f"sectors_demand_breakdown:{consumer_actor}"] = actors_demands[i]
 
-            for actor_energy_demand in self.get_colnames_input_dataframe(
-                    df_name=f'{consumer_actor}_{GlossaryEnergy.EnergyDemandValue}', expect_years=True, full_path=False):
-                if f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{actor_energy_demand}" not in self.outputs:
-                    self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{actor_energy_demand}"] = self.zeros_array
-
-                self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{actor_energy_demand}"] = \
-                    self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{actor_energy_demand}"] + \
-                    self.inputs[f'{consumer_actor}_{GlossaryEnergy.EnergyDemandValue}:{actor_energy_demand}'] * conversion_factor
-
-        self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:Total"] = self.sum_cols(
-            self.get_cols_output_dataframe(df_name=GlossaryEnergy.EnergyMarketDemandsDfValue, expect_years=True), index=self.years
-        )
+        energies_demands = self.np.sum(demands, axis=0)
+        for i, energy in enumerate(self.demands_plan[0]):
+            self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{energy}"] = energies_demands[i]
+        self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:Total"] = self.np.sum(energies_demands, axis=0)
 
     def compute_prod_vs_demand_objective(self):
         self.outputs[f"{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{GlossaryEnergy.Years}"] = self.years
-        commun_unit = "PWh"
-        conversion_factor_demand = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyDemandDf['unit']][commun_unit]
-        conversion_factor_prod = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixNetProductionsDf['unit']][
-            commun_unit]
+        demands, productions = self.get_demands_and_productions()
+        relative_gaps = self.np.mean((demands - productions) / (demands + 1e-6), axis=1)
         if self.inputs[GlossaryEnergy.SimplifiedMarketEnergyDemandValue]:
-            demand = self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:Total"] * conversion_factor_demand
-            production = self.inputs[f"{GlossaryEnergy.EnergyMixNetProductionsDfValue}:Total"] * conversion_factor_prod
-
-            self.outputs[GlossaryEnergy.EnergyProdVsDemandObjective]= self.np.array([self.np.mean((demand - production) / (demand + 1e-6))])
+            self.outputs[GlossaryEnergy.EnergyProdVsDemandObjective] = relative_gaps
         else:
-            ratios_per_energy = []
-            for column in self.get_colnames_output_dataframe(df_name=GlossaryEnergy.EnergyMarketDemandsDfValue,
-                                                             expect_years=True):
-                demand = self.outputs[f"{GlossaryEnergy.EnergyMarketDemandsDfValue}:{column}"] * conversion_factor_demand
-                production = self.inputs[
-                                 f"{GlossaryEnergy.EnergyMixNetProductionsDfValue}:{column}"] * conversion_factor_prod
-                # differentiable en 0 :
-                energy_obj = self.np.sqrt(self.np.mean(self.np.array((demand - production) / (demand + 1e-6))) ** 2 + 1e-4)
-                ratios_per_energy.append(energy_obj)
-            self.outputs[GlossaryEnergy.EnergyProdVsDemandObjective]= self.np.array([self.np.mean(self.np.array(ratios_per_energy))])
-
-
-
-
+            # differentiable en 0 :
+            energies_objectives = self.np.sqrt(relative_gaps ** 2 + 1e-4)
+            self.outputs[GlossaryEnergy.EnergyProdVsDemandObjective] = self.np.array([self.np.mean(energies_objectives)])
 
+    def compute_diagonal_jacobian(self) -> dict:
+        """
+        Partial derivatives of the outputs with respect to the inputs, at the inputs of the last compute.
 
+        Demands, breakdown and availability ratios only depend on the same year of the inputs : their blocks are
+        returned as diagonals, {output path: {input path: diagonal}}, from the demands plan. The objective depends on
+        all the years, its blocks are returned as [1, year] rows.
+        """
+        years_ones = np.ones(len(self.years))
+        demanded_energies, inputs_paths = self.demands_plan
+        market_columns = self.get_market_columns()
+        simplified = self.inputs[GlossaryEnergy.SimplifiedMarketEnergyDemandValue]
+        demands_df = GlossaryEnergy.EnergyMarketDemandsDfValue
+        ratios_df = GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue
+        jacobian = {}
+
+        # demands by actor and by energy
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyDemandDf['unit']][GlossaryEnergy.EnergyMarketDemandsDf['unit']]
+        for consumer_actor, actor_inputs_paths in zip(self.inputs['consumers_actors'], inputs_paths):
+            jacobian[f"sectors_demand_breakdown:{consumer_actor}"] = {
+                input_path: conversion_factor * years_ones for input_path in actor_inputs_paths if input_path is not None}
+        for i, energy in enumerate(demanded_energies):
+            jacobian[f"{demands_df}:{energy}"] = {actor_inputs_paths[i]: conversion_factor * years_ones
+                                                  for actor_inputs_paths in inputs_paths if actor_inputs_paths[i] is not None}
+        jacobian[f"{demands_df}:Total"] = combine_diagonal_partials(*[(1., jacobian[f"{demands_df}:{energy}"]) for energy in demanded_energies])
+
+        # availability ratios and objective, from the demands and productions in a common unit
+        commun_unit = "PWh"
+        conversion_factor_demand = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyDemandDf['unit']][commun_unit]
+        conversion_factor_prod = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixNetProductionsDf['unit']][commun_unit]
+        demands, productions = (np.asarray(array, dtype=float) for array in self.get_demands_and_productions())
+        columns = ['Total'] if simplified else market_columns
+        denominators = demands + 1e-6
+        ratios = productions / denominators
+        # max(min(production / demand, 1), 0), constant outside [0, 1] and halved at the bounds
+        unsaturated = ((ratios > 0) & (ratios < 1)) + 0.5 * ((ratios == 0) | (ratios == 1))
+        relative_gaps = np.mean((demands - productions) / denominators, axis=1)
+        if simplified:
+            objective_factors = np.ones(1)
+        else:
+            objective_factors = relative_gaps / np.sqrt(relative_gaps ** 2 + 1e-4) / len(columns)
+        objective_terms = []
+        for i, column in enumerate(columns):
+            demand_partials = jacobian[f"{demands_df}:{column}"]
+            production_partials = {f"{GlossaryEnergy.EnergyMixNetProductionsDfValue}:{column}": years_ones}
+            ratio_partials = combine_diagonal_partials(
+                (- 100. * conversion_factor_demand * unsaturated[i] * ratios[i] / denominators[i], demand_partials),
+                (100. * conversion_factor_prod * unsaturated[i] / denominators[i], production_partials))
+            for ratio_column in (market_columns if simplified else [column]):
+                jacobian[f"{ratios_df}:{ratio_column}"] = ratio_partials
+            objective_terms.extend([
+                (objective_factors[i] * conversion_factor_demand * (productions[i] + 1e-6) / denominators[i] ** 2 / len(self.years), demand_partials),
+                (- objective_factors[i] * conversion_factor_prod / denominators[i] / len(self.years), production_partials)])
+        jacobian[GlossaryEnergy.EnergyProdVsDemandObjective] = {
+            input_path: np.reshape(row, (1, -1)) for input_path, row in combine_diagonal_partials(*objective_terms).items()}
+
+        return {output_path: partials for output_path, partials in jacobian.items() if partials}
@@ -21,6 +21,8 @@ from sostrades_optimization_plugins.models.differentiable_model import (
     DifferentiableModel,
 )
 
+from energy_models.core.jacobian_sparsity import combine_diagonal_partials
+from energy_models.core.steps_timer import StepsTimer
 from energy_models.core.stream_type.energy_models.clean_energy import CleanEnergy
 from energy_models.core.stream_type.energy_models.fossil import Fossil
 from energy_models.glossaryenergy import GlossaryEnergy
@@ -44,6 +46,11 @@ class EnergyMix(DifferentiableModel):
         super().__init__(sosname=name)
         self.name = name
         self.logger = logger
+        # producer by consumer layout of the flows between streams, kept while the inputs columns are unchanged
+        self.flows_inputs_signature = None
+        self.flows_plans = {}
+        # opt-in timing of the compute steps
+        self.steps_timer = StepsTimer(self) if StepsTimer.enabled else None
 
     def compute(self):
         self.configure_parameters_update()
@@ -77,6 +84,163 @@ class EnergyMix(DifferentiableModel):
         self.year_end = self.inputs[GlossaryEnergy.YearEnd]
         self.years = self.np.arange(self.year_start, self.year_end + 1)
         self.zeros_array = self.years * 0.
+        self.configure_flows_plans()
+
+    def configure_flows_plans(self):
+        """Drop the layouts of the flows between streams when the energies or their input columns change"""
+        inputs_signature = tuple(self.inputs)
+        if inputs_signature != self.flows_inputs_signature:
+            self.flows_inputs_signature = inputs_signature
+            self.flows_plans = {}
+
+    def get_flows_plan(self, flow_varname: str):
+        """
+        Layout of the flows of flow_varname (consumption, demand...) from the energies to the streams they use :
+        (consumed streams in order of appearance, {consumed stream: index}, [energy][consumed stream] input path or None)
+        """
+        if flow_varname not in self.flows_plans:
+            consumed_streams = []
+            energies_consumed_streams = []
+            for energy in self.inputs[GlossaryEnergy.energy_list]:
+                energy_consumed_streams = self.get_colnames_input_dataframe(
+                    df_name=f'{energy}.{flow_varname}', expect_years=True, full_path=False)
+                consumed_streams.extend(stream for stream in energy_consumed_streams if stream not in consumed_streams)
+                energies_consumed_streams.append(energy_consumed_streams)
+            inputs_paths = [[f'{energy}.{flow_varname}:{stream}' if stream in energy_consumed_streams else None
+                             for stream in consumed_streams]
+                            for energy, energy_consumed_streams in zip(self.inputs[GlossaryEnergy.energy_list], energies_consumed_streams)]
+            consumed_streams_indices = {stream: i for i, stream in enumerate(consumed_streams)}
+            self.flows_plans[flow_varname] = (consumed_streams, consumed_streams_indices, inputs_paths)
+        return self.flows_plans[flow_varname]
+
+    def get_flows_tensor(self, flow_varname: str):
+        """
+        Flows of flow_varname as a [energy, consumed stream, year] tensor, null where an energy does not use a stream
+        :return: consumed streams, {consumed stream: index}, tensor
+        """
+        consumed_streams, consumed_streams_indices, inputs_paths = self.get_flows_plan(flow_varname)
+        if not consumed_streams:
+            return consumed_streams, consumed_streams_indices, self.np.zeros((len(inputs_paths), 0, len(self.years)))
+        flows = self.np.stack([self.zeros_array if input_path is None else self.inputs[input_path]
+                               for energy_inputs_paths in inputs_paths for input_path in energy_inputs_paths])
+        return consumed_streams, consumed_streams_indices, self.np.reshape(flows, (len(inputs_paths), len(consumed_streams), len(self.years)))
+
+    def compute_diagonal_jacobian(self) -> dict:
+        """
+        Partial derivatives of the outputs with respect to the inputs, at the inputs of the last compute.
+
+        Each year of the outputs only depends on the same year of the inputs : the blocks are returned as their
+        diagonals, {output path: {input path: diagonal}}, built along the forward pass with the same flows plans.
+        The column of the derivatives with respect to heat_losses_percentage is returned as its diagonal too.
+        """
+        years_ones = np.ones(len(self.years))
+        energy_list = self.inputs[GlossaryEnergy.energy_list]
+        outputs = {path: np.asarray(value, dtype=float) for path, value in self.outputs.items()}
+
+        def flows_partials(flow_varname: str, conversion_factor: float) -> dict:
+            """Partials of the flows of flow_varname summed by consumed stream"""
+            consumed_streams, _, inputs_paths = self.get_flows_plan(flow_varname)
+            return {stream: {energy_inputs_paths[i]: conversion_factor * years_ones
+                             for energy_inputs_paths in inputs_paths if energy_inputs_paths[i] is not None}
+                    for i, stream in enumerate(consumed_streams)}
+
+        jacobian = {}
+
+        # raw production
+        raw_production = GlossaryEnergy.EnergyMixRawProductionValue
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit'].split(' or ')[0]][GlossaryEnergy.EnergyMixRawProduction['unit']]
+        for energy in energy_list:
+            jacobian[f'{raw_production}:{energy}'] = {f'{energy}.{GlossaryEnergy.StreamProductionValue}:{energy}': conversion_factor * years_ones}
+        jacobian[f'{raw_production}:Total'] = combine_diagonal_partials(*[(1., jacobian[f'{raw_production}:{energy}']) for energy in energy_list])
+
+        # consumptions of the energy sector
+        consumptions = GlossaryEnergy.EnergyMixEnergiesConsumptionDfValue
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyConsumption['unit']][GlossaryEnergy.EnergyMixEnergiesConsumptionDf['unit']]
+        consumptions_partials = flows_partials(GlossaryEnergy.StreamEnergyConsumptionValue, conversion_factor)
+        for energy in energy_list:
+            jacobian[f'{consumptions}:{energy}'] = consumptions_partials.get(energy, {})
+        jacobian[f'{consumptions}:Total'] = combine_diagonal_partials(*[(1., jacobian[f'{consumptions}:{energy}']) for energy in energy_list])
+
+        # net production
+        net_production = GlossaryEnergy.EnergyMixNetProductionsDfValue
+        for energy in energy_list:
+            if energy in self.raw_to_net_dict:
+                net = self.raw_to_net_dict[energy] * outputs[f'{raw_production}:{energy}']
+                partials = combine_diagonal_partials((self.raw_to_net_dict[energy], jacobian[f'{raw_production}:{energy}']))
+            else:
+                net = outputs[f'{raw_production}:{energy}'] - outputs[f'{consumptions}:{energy}']
+                partials = combine_diagonal_partials((1., jacobian[f'{raw_production}:{energy}']), (-1., jacobian[f'{consumptions}:{energy}']))
+            # null where the net production is floored, halved at the floor as the automatic differentiation does
+            jacobian[f'{net_production}:{energy}'] = combine_diagonal_partials(((net > 1e-3) + 0.5 * (net == 1e-3), partials))
+        heat_losses_partials = combine_diagonal_partials((- self.inputs['heat_losses_percentage'] / 100., jacobian[f'{raw_production}:Total']))
+        heat_losses_partials['heat_losses_percentage'] = - outputs[f'{raw_production}:Total'] / 100.
+        jacobian[f'{net_production}:heat_losses'] = heat_losses_partials
+        jacobian[f'{net_production}:Total'] = combine_diagonal_partials(*[(1., jacobian[f'{net_production}:{energy}']) for energy in energy_list],
+                                                       (1., heat_losses_partials))
+
+        # demands
+        demands = GlossaryEnergy.EnergyMixEnergiesDemandsDfValue
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyDemand['unit']][GlossaryEnergy.EnergyMixEnergiesDemandsDf['unit']]
+        for stream, partials in flows_partials(GlossaryEnergy.StreamEnergyDemandValue, conversion_factor).items():
+            jacobian[f'{demands}:{stream}'] = partials
+        for output_varname, flow_varname, input_dict, output_dict in (
+                (GlossaryEnergy.EnergyMixCCSDemandsDfValue, GlossaryEnergy.StreamCCSDemandValue,
+                 GlossaryEnergy.StreamCCSDemand, GlossaryEnergy.EnergyMixCCSDemandsDf),
+                (GlossaryEnergy.EnergyMixCCSConsumptionDfValue, GlossaryEnergy.StreamCCSConsumptionValue,
+                 GlossaryEnergy.StreamCCSConsumption, GlossaryEnergy.EnergyMixCCSConsumptionDf)):
+            conversion_factor = GlossaryEnergy.conversion_dict[input_dict['unit']][output_dict['unit']]
+            for stream, partials in flows_partials(flow_varname, conversion_factor).items():
+                jacobian[f'{output_varname}:{stream}'] = partials
+
+        # availability ratios, max(min(raw production / demand, 1), 0), constant outside [0, 1] and halved at the bounds
+        for stream in self.get_flows_plan(GlossaryEnergy.StreamEnergyDemandValue)[0]:
+            if f'{raw_production}:{stream}' in outputs:
+                demand = outputs[f'{demands}:{stream}'] + 1e-6
+                ratio = outputs[f'{raw_production}:{stream}'] / demand
+                unsaturated = ((ratio > 0) & (ratio < 1)) + 0.5 * ((ratio == 0) | (ratio == 1))
+                jacobian[f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{stream}'] = combine_diagonal_partials(
+                    (100. * unsaturated / demand, jacobian[f'{raw_production}:{stream}']),
+                    (- 100. * unsaturated * ratio / demand, jacobian[f'{demands}:{stream}']))
+
+        # prices, energy mix and mean price
+        for energy in energy_list:
+            jacobian[f'{GlossaryEnergy.StreamPricesValue}:{energy}'] = {f'{energy}.{GlossaryEnergy.StreamPricesValue}:{energy}': years_ones}
+        total_net_production_partials = combine_diagonal_partials(*[(1., jacobian[f'{net_production}:{energy}']) for energy in energy_list])
+        total_net_production = outputs[f'{net_production}:Total'] - outputs[f'{net_production}:heat_losses']
+        for energy in energy_list:
+            jacobian[f'energy_mix:{energy}'] = combine_diagonal_partials(
+                (100. / total_net_production, jacobian[f'{net_production}:{energy}']),
+                (- 100. * outputs[f'{net_production}:{energy}'] / total_net_production ** 2, total_net_production_partials))
+        jacobian[f'{GlossaryEnergy.EnergyMeanPriceValue}:{GlossaryEnergy.EnergyPriceValue}'] = combine_diagonal_partials(
+            *[(1. / 100., jacobian[f'energy_mix:{energy}']) for energy in energy_list])
+
+        # greenhouse gases
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamScope1GHGEmissions['unit']][GlossaryEnergy.GHGEnergyEmissionsDf['unit']]
+        for ghg in GlossaryEnergy.GreenHouseGases:
+            for energy in energy_list:
+                jacobian[f'{ghg}_intensity_by_energy:{energy}'] = {f'{energy}.{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}': years_ones}
+                jacobian[f'{ghg}_emissions_by_energy:{energy}'] = {f'{energy}.{GlossaryEnergy.StreamScope1GHGEmissionsValue}:{ghg}': conversion_factor * years_ones}
+            jacobian[f'{GlossaryEnergy.GHGEnergyEmissionsDfValue}:{ghg}'] = combine_diagonal_partials(
+                *[(1., jacobian[f'{ghg}_emissions_by_energy:{energy}']) for energy in energy_list])
+
+        # land use and capital
+        for energy in energy_list:
+            df_name = f'{energy}.{GlossaryEnergy.LandUseRequiredValue}'
+            for col in self.get_colnames_input_dataframe(df_name=df_name, expect_years=True):
+                jacobian[f'land_demand_df:{col}'] = {f'{df_name}:{col}': years_ones}
+        conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyTypeCapitalDf['unit']][GlossaryEnergy.EnergyMixCapitalDf['unit']]
+        for column in (GlossaryEnergy.Capital, GlossaryEnergy.NonUseCapital):
+            jacobian[f'{GlossaryEnergy.EnergyMixCapitalDfValue}:{column}'] = {
+                f'{energy}.{GlossaryEnergy.EnergyTypeCapitalDfValue}:{column}': conversion_factor * years_ones for energy in energy_list}
+
+        # target production constraint, (net production - target) / (target + 1e-3)
+        target_path = f"{GlossaryEnergy.TargetEnergyProductionValue}:{GlossaryEnergy.TargetEnergyProductionValue}"
+        target = np.asarray(self.inputs[target_path], dtype=float) + 1e-3
+        constraint_partials = combine_diagonal_partials((1. / target, jacobian[f'{net_production}:Total']))
+        constraint_partials[target_path] = constraint_partials.get(target_path, 0.) - (outputs[f'{net_production}:Total'] + 1e-3) / target ** 2
+        jacobian[f"{GlossaryEnergy.TargetProductionConstraintValue}:{GlossaryEnergy.TargetProductionConstraintValue}"] = constraint_partials
+
+        return {output_path: partials for output_path, partials in jacobian.items() if partials}
 
     def compute_energy_sector_capital(self):
         """Energy sector capital = sum of all energy streams capital"""
@@ -87,14 +251,14 @@ class EnergyMix(DifferentiableModel):
             energy_type_capitals.append(
                 self.inputs[f"{energy}.{GlossaryEnergy.EnergyTypeCapitalDfValue}:{GlossaryEnergy.Capital}"])
 
-        energy_capital = np.sum(energy_type_capitals, axis=0) * conversion_factor
+        energy_capital = self.np.sum(self.np.stack(energy_type_capitals), axis=0) * conversion_factor
 
         energy_type_non_use_capitals = []
         for energy in self.inputs[GlossaryEnergy.energy_list]:
             energy_type_non_use_capitals.append(
                 self.inputs[f"{energy}.{GlossaryEnergy.EnergyTypeCapitalDfValue}:{GlossaryEnergy.NonUseCapital}"])
 
-        energy_non_use_capital = np.sum(energy_type_non_use_capitals, axis=0) * conversion_factor
+        energy_non_use_capital = self.np.sum(self.np.stack(energy_type_non_use_capitals), axis=0) * conversion_factor
 
         self.outputs[f"{GlossaryEnergy.EnergyMixCapitalDfValue}:{GlossaryEnergy.Years}"] = self.years
         self.outputs[f"{GlossaryEnergy.EnergyMixCapitalDfValue}:{GlossaryEnergy.Capital}"] = energy_capital
@@ -228,31 +392,21 @@ class EnergyMix(DifferentiableModel):
         """Sums all demands of all stream for each available product"""
         self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesDemandsDfValue}:{GlossaryEnergy.Years}"] = self.years
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyDemand['unit']][GlossaryEnergy.EnergyMixEnergiesDemandsDf['unit']]
-        for energy in self.inputs[GlossaryEnergy.energy_list]:
-            for other_energy_demand in self.get_colnames_input_dataframe(
-                    df_name=f'{energy}.{GlossaryEnergy.StreamEnergyDemandValue}', expect_years=True, full_path=False):
-                if f"{GlossaryEnergy.EnergyMixEnergiesDemandsDfValue}:{other_energy_demand}" not in self.outputs:
-                    self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesDemandsDfValue}:{other_energy_demand}"] = self.zeros_array
-                self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesDemandsDfValue}:{other_energy_demand}"] = \
-                    self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesDemandsDfValue}:{other_energy_demand}"] + \
-                    self.inputs[f'{energy}.{GlossaryEnergy.StreamEnergyDemandValue}:{other_energy_demand}'] * conversion_factor
+        demanded_streams, _, demands = self.get_flows_tensor(GlossaryEnergy.StreamEnergyDemandValue)
+        demands_by_stream = self.np.sum(demands, axis=0) * conversion_factor
+        for i, demanded_stream in enumerate(demanded_streams):
+            self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesDemandsDfValue}:{demanded_stream}"] = demands_by_stream[i]
 
     def compute_energy_consumptions_by_energy_sector(self):
         """For each energy, sum what has been consumed by other energy"""
 
         self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesConsumptionDfValue}:{GlossaryEnergy.Years}"] = self.years
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyConsumption['unit']][GlossaryEnergy.EnergyMixEnergiesConsumptionDf['unit']]
+        _, consumed_streams_indices, consumptions = self.get_flows_tensor(GlossaryEnergy.StreamEnergyConsumptionValue)
+        consumptions_by_stream = self.np.sum(consumptions, axis=0) * conversion_factor
         for energy in self.inputs[GlossaryEnergy.energy_list]:
-            consumed_energy_by_energy_list = []
-            for other_energy in self.inputs[GlossaryEnergy.energy_list]:
-                consumptions_of_other_energy = self.get_colnames_input_dataframe(df_name=f'{other_energy}.{GlossaryEnergy.StreamEnergyConsumptionValue}', expect_years=True, full_path=False)
-                if energy in consumptions_of_other_energy:
-                    consumed_energy_by_energy_list.append(
-                        self.inputs[f'{other_energy}.{GlossaryEnergy.StreamEnergyConsumptionValue}:{energy}'])
-
-            consumed_energy_by_other_energy_sum = self.sum_cols(consumed_energy_by_energy_list) * conversion_factor if consumed_energy_by_energy_list else self.zeros_array
-            self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesConsumptionDfValue}:{energy}"] = consumed_energy_by_other_energy_sum
-
+            self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesConsumptionDfValue}:{energy}"] = \
+                consumptions_by_stream[consumed_streams_indices[energy]] if energy in consumed_streams_indices else self.zeros_array
 
         self.outputs[f"{GlossaryEnergy.EnergyMixEnergiesConsumptionDfValue}:Total"] = self.sum_cols(
             self.get_cols_output_dataframe(df_name=GlossaryEnergy.EnergyMixEnergiesConsumptionDfValue, expect_years=True)
@@ -294,44 +448,28 @@ class EnergyMix(DifferentiableModel):
 
     def compute_energy_sector_ccs_demand(self):
         """Sums all demands of ccs streams of each energy"""
-        self.outputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.Years}"] = self.years
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamCCSDemand['unit']][GlossaryEnergy.EnergyMixCCSDemandsDf['unit']]
-
-        for energy in self.inputs[GlossaryEnergy.energy_list]:
-            for ccs_stream in self.get_colnames_input_dataframe(
-                    df_name=f'{energy}.{GlossaryEnergy.StreamCCSDemandValue}', expect_years=True, full_path=False):
-
-                if f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{ccs_stream}" not in self.outputs:
-                    self.outputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{ccs_stream}"] = self.zeros_array
-
-                self.outputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{ccs_stream}"] = \
-                    self.outputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{ccs_stream}"] + \
-                    self.inputs[f'{energy}.{GlossaryEnergy.StreamCCSDemandValue}:{ccs_stream}'] * conversion_factor
-
-        if f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_captured}" not in self.outputs:
-            self.outputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_captured}"] = self.zeros_array
-        if f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_storage}" not in self.outputs:
-            self.outputs[f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{GlossaryEnergy.carbon_storage}"] = self.zeros_array
+        self._sum_flows_by_consumed_stream(output_varname=GlossaryEnergy.EnergyMixCCSDemandsDfValue,
+                                           flow_varname=GlossaryEnergy.StreamCCSDemandValue,
+                                           conversion_factor=conversion_factor)
 
     def compute_energy_sector_ccs_consumption(self):
-        self.outputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.Years}"] = self.years
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamCCSConsumption['unit']][GlossaryEnergy.EnergyMixCCSConsumptionDf['unit']]
+        self._sum_flows_by_consumed_stream(output_varname=GlossaryEnergy.EnergyMixCCSConsumptionDfValue,
+                                           flow_varname=GlossaryEnergy.StreamCCSConsumptionValue,
+                                           conversion_factor=conversion_factor)
 
-        for energy in self.inputs[GlossaryEnergy.energy_list]:
-            for ccs_stream in self.get_colnames_input_dataframe(
-                    df_name=f'{energy}.{GlossaryEnergy.StreamCCSConsumptionValue}', expect_years=True, full_path=False):
-
-                if f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{ccs_stream}" not in self.outputs:
-                    self.outputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{ccs_stream}"] = self.zeros_array
-
-                self.outputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{ccs_stream}"] = \
-                    self.outputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{ccs_stream}"] + \
-                    self.inputs[f'{energy}.{GlossaryEnergy.StreamCCSConsumptionValue}:{ccs_stream}'] * conversion_factor
-
-        if f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.carbon_captured}" not in self.outputs:
-            self.outputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.carbon_captured}"] = self.zeros_array
-        if f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.carbon_storage}" not in self.outputs:
-            self.outputs[f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{GlossaryEnergy.carbon_storage}"] = self.zeros_array
+    def _sum_flows_by_consumed_stream(self, output_varname: str, flow_varname: str, conversion_factor: float):
+        """Sum of the flows of ccs streams over the energies, carbon captured and carbon storage always in the output"""
+        self.outputs[f"{output_varname}:{GlossaryEnergy.Years}"] = self.years
+        ccs_streams, _, flows = self.get_flows_tensor(flow_varname)
+        flows_by_stream = self.np.sum(flows, axis=0) * conversion_factor
+        for i, ccs_stream in enumerate(ccs_streams):
+            self.outputs[f"{output_varname}:{ccs_stream}"] = flows_by_stream[i]
+
+        for ccs_stream in (GlossaryEnergy.carbon_captured, GlossaryEnergy.carbon_storage):
+            if f"{output_varname}:{ccs_stream}" not in self.outputs:
+                self.outputs[f"{output_varname}:{ccs_stream}"] = self.zeros_array
 
     def compute_ghg_emissions_intensity_by_energy(self):
         """Gather all ghg intensities into one dataframe, for each ghg."""
@@ -14,7 +14,6 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
-import re
 from typing import Union
 
 import numpy as np
@@ -23,11 +22,6 @@ from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 from sostrades_optimization_plugins.models.autodifferentiated_discipline import (
     AutodifferentiedDisc,
 )
@@ -42,10 +36,19 @@ from sostrades_optimization_plugins.tools.plot_tools.plotting import (
 )
 
 from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.jacobian_sparsity import DiagonalJacobianMixin
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
+from energy_models.core.linearization_cache import LinearizationCacheMixin
+from energy_models.core.sankey_fluxes import SankeyFluxes, SankeyFluxesMixin
+from energy_models.core.steps_timer import StepsTimer
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
-class Energy_Mix_Discipline(AutodifferentiedDisc):
+class Energy_Mix_Discipline(LinearizationCacheMixin, DiagonalJacobianMixin, SankeyFluxesMixin, AutodifferentiedDisc):
     # ontology information
     _ontology_data = {
         "label": "Energy Mix Model",
@@ -148,7 +151,10 @@ class Energy_Mix_Discipline(AutodifferentiedDisc):
             'Emissions intensities',
             'Demands',
             'Target energy production constraint',
-            GlossaryEnergy.Capital]
+            GlossaryEnergy.Capital,
+            'Energy flows']
+        if StepsTimer.get_model_timer(getattr(self, 'model', None)) is not None:
+            chart_list.append('Compute steps timings')
 
         chart_filters.append(ChartFilter(
             'Charts', chart_list, chart_list, 'charts'))
@@ -326,6 +332,19 @@ class Energy_Mix_Discipline(AutodifferentiedDisc):
             if new_chart is not None:
                 instanciated_charts.append(new_chart)
 
+        if 'Energy flows' in charts:
+            new_chart = self.get_chart_sankey_fluxes(chart_name=f"Flow of energy streams ({GlossaryEnergy.EnergyMixNetProductionsDf['unit']})")
+            new_chart.post_processing_section_name = "Energy flows"
+            instanciated_charts.append(new_chart)
+
+            new_chart = self.get_chart_sankey_fluxes(chart_name="Flow of energy streams (schematic)", normalized_links=True)
+            new_chart.post_processing_section_name = "Energy flows"
+            instanciated_charts.append(new_chart)
+
+        steps_timer = StepsTimer.get_model_timer(getattr(self, 'model', None))
+        if 'Compute steps timings' in charts and steps_timer is not None:
+            instanciated_charts.append(steps_timer.get_chart())
+
         return instanciated_charts
 
     def get_chart_energy_mean_price_in_dollar_mwh(self):
@@ -367,6 +386,24 @@ class Energy_Mix_Discipline(AutodifferentiedDisc):
         new_chart.post_processing_section_name = "Capital"
         return new_chart
 
+    def compute_sankey_fluxes(self):
+        """Consumptions and productions of the energies, net productions as available for final consumption"""
+        energy_list = self.get_sosdisc_inputs(GlossaryEnergy.energy_list)
+        years = self.get_sosdisc_inputs(GlossaryEnergy.TargetEnergyProductionValue)[GlossaryEnergy.Years]
+        actors_dataframes = {
+            energy: (self.get_sosdisc_inputs(f"{energy}.{GlossaryEnergy.StreamEnergyConsumptionValue}"),
+                     self.get_sosdisc_inputs(f"{energy}.{GlossaryEnergy.StreamProductionValue}"))
+            for energy in energy_list}
+
+        # Switch prod /consumption as we want the node to "consume" the available streams
+        net_production = self.get_sosdisc_outputs(GlossaryEnergy.EnergyMixNetProductionsDfValue)[[GlossaryEnergy.Years, *energy_list]]
+        actors_dataframes["available<br>for final consumption"] = (net_production, None)
+
+        # negative productions as a source
+        energies_net_production = net_production[energy_list]
+        actors_dataframes["neg_balance"] = (None, energies_net_production.where(energies_net_production < 0, 0).abs())
+        return SankeyFluxes.from_dataframes(years.to_numpy(), actors_dataframes)
+
     def get_chart_sankey_fluxes(
         self,
         chart_name="Energy Flow",
@@ -376,103 +413,7 @@ class Energy_Mix_Discipline(AutodifferentiedDisc):
     ):
         """Create sankey chart correlating production and consumption of all actors in energy mix."""
 
-        # Get list of energy technologies
-        energy_list = self.get_sosdisc_inputs(GlossaryEnergy.EnergyListName)
-
-        # Get dataframe that has Years column for sure
-        target_energy_production_df = self.get_sosdisc_inputs(
-            GlossaryEnergy.TargetEnergyProductionValue
-        )
-        years = list(target_energy_production_df[GlossaryEnergy.Years])
-
-        # Initialize dictionary with all consumptions / productions
-        energy_dictionary = {}
-
-        # Get dataframes and put them in dictionary format
-        for energy in energy_list:
-            # Gets dataframes
-            ns_energy = self.get_ns_stream(energy)
-            consumption = self.get_sosdisc_inputs(
-                f"{ns_energy}.{GlossaryEnergy.StreamConsumptionValue}"
-            ).copy()
-            production = self.get_sosdisc_inputs(
-                f"{ns_energy}.{GlossaryEnergy.EnergyProductionValue}"
-            ).copy()
-
-            # Add Years to dataframes
-            if GlossaryEnergy.Years not in consumption.columns:
-                consumption[GlossaryEnergy.Years] = years
-
-            if GlossaryEnergy.Years not in production.columns:
-                production[GlossaryEnergy.Years] = years
-
-            # Update dictionary
-            energy_dictionary[energy] = {
-                "input": consumption,
-                "output": production,
-            }
-
-        # Get Net Production
-        production = self.get_sosdisc_outputs(
-            f"{GlossaryEnergy.StreamProductionDetailedValue}"
-        ).copy()
-        production.columns = [c.replace("production ", "") for c in production.columns]
-        consumption = pd.DataFrame({GlossaryEnergy.Years: years})
-
-        # Add Years to dataframes
-        if GlossaryEnergy.Years not in production.columns:
-            production[GlossaryEnergy.Years] = years
-
-        # Switch prod /consumption as we want the node to "consume" the available streams
-        energy_dictionary["available<br>for final consumption"] = {
-            "input": production,
-            "output": consumption,
-        }
-
-        # Get dataframe with negative productions to add as a source
-        df_negative = production.copy()
-        columns_to_process = [
-            col for col in df_negative.columns if col != GlossaryEnergy.Years
-        ]
-        df_negative[columns_to_process] = df_negative[columns_to_process].where(
-            df_negative[columns_to_process] < 0, 0
-        )
-        df_negative[columns_to_process] = df_negative[columns_to_process].abs()
-
-        energy_dictionary["neg_balance"] = {
-            "input": consumption,
-            "output": df_negative,
-        }
-
-        # Filter out resources
-        for dfs in energy_dictionary.values():
-            dfs["input"] = dfs["input"][
-                [c for c in dfs["input"].columns if "(Mt)" not in c]
-            ]
-            dfs["output"] = dfs["output"][
-                [c for c in dfs["output"].columns if "(Mt)" not in c]
-            ]
-
-        # Remove units from all streams, to handle inconsistent naming
-        for actor in energy_dictionary:
-            energy_dictionary[actor]["input"].columns = [
-                re.sub(r"\s*\([^)]*\)", "", c)
-                for c in energy_dictionary[actor]["input"].columns
-            ]
-            energy_dictionary[actor]["output"].columns = [
-                re.sub(r"\s*\([^)]*\)", "", c)
-                for c in energy_dictionary[actor]["output"].columns
-            ]
-
-        # filter streams
-        if streams_filter is not None:
-            for dfs in energy_dictionary.values():
-                existing_columns = list(set(streams_filter) & set(dfs["input"].columns))
-                dfs["input"] = dfs["input"][[GlossaryEnergy.Years, *existing_columns]]
-                existing_columns = list(
-                    set(streams_filter) & set(dfs["output"].columns)
-                )
-                dfs["output"] = dfs["output"][[GlossaryEnergy.Years, *existing_columns]]
+        energy_dictionary = self.get_sankey_fluxes().get_actors_dictionary(streams_filter)
 
         # Create sankey plot
         colormap = available_colormaps["energy"]
@@ -19,18 +19,16 @@ import logging
 import numpy as np
 import pandas as pd
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
-from sostrades_core.tools.post_processing.pie_charts.instanciated_pie_chart import (
-    InstanciatedPieChart,
-)
 
 from energy_models.core.energy_mix.energy_mix import EnergyMix
 from energy_models.core.investments.base_invest import compute_norm_mix
 from energy_models.core.investments.energy_invest import EnergyInvest
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedPieChart,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
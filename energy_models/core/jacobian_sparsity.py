@@ -0,0 +1,197 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from energy_models.core.techno_type.step_cache import is_same_value
+
+# Sparsity of the jacobian blocks of the disciplines.
+#
+# Most partial derivatives of the models are diagonal or banded in the years dimension (prices vs stream prices,
+# production vs utilisation ratio...). The year x year blocks computed densely by automatic differentiation are
+# passed to the jacobian as sparse matrices : diagonal or banded blocks as dia matrices, other blocks with few non zero
+# values as csr matrices. Null blocks are not passed at all, the jacobian is initialized with zeros.
+# Only the blocks declared by the disciplines are converted, so that known dense blocks (vs investments) are not scanned.
+
+ZERO = 'zero'
+DIAGONAL = 'diagonal'
+BANDED = 'banded'
+SPARSE = 'sparse'
+DENSE = 'dense'
+# declared structure of blocks whose structure is detected from their values
+DETECT = 'detect'
+
+# a banded block is stored as a dia matrix if its number of diagonals is at most this share of its size
+MAX_BANDS_SHARE = 0.25
+# a block is stored as a csr matrix if its share of non zero values is at most this share
+MAX_DENSITY = 0.1
+
+
+def get_block_structure(block: np.ndarray) -> tuple[str, int, int]:
+    """
+    Structure of a jacobian block : (kind, number of sub-diagonals, number of super-diagonals)
+    kind is ZERO, DIAGONAL, BANDED, SPARSE or DENSE
+    """
+    rows, columns = np.nonzero(block)
+    if len(rows) == 0:
+        return ZERO, 0, 0
+    offsets = columns - rows
+    lower, upper = max(-offsets.min(), 0), max(offsets.max(), 0)
+    n_rows, n_columns = block.shape
+    if lower == 0 and upper == 0:
+        return DIAGONAL, 0, 0
+    if lower + upper + 1 <= MAX_BANDS_SHARE * min(n_rows, n_columns):
+        return BANDED, lower, upper
+    if len(rows) <= MAX_DENSITY * block.size:
+        return SPARSE, lower, upper
+    return DENSE, lower, upper
+
+
+def to_sparse_block(block: np.ndarray, declared_structure: str | None = None):
+    """
+    Jacobian block in its most compact form : None for a null block, a sparse matrix or the dense block.
+    declared_structure overrides the detection : DIAGONAL keeps only the diagonal of the block, DENSE keeps the block
+    as is, SPARSE stores it as a csr matrix.
+    """
+    if declared_structure == DENSE:
+        return block
+    if declared_structure == SPARSE:
+        return sparse.csr_matrix(block)
+    if declared_structure == DIAGONAL and block.shape[0] == block.shape[1]:
+        return sparse.dia_matrix((np.diag(block)[np.newaxis, :], [0]), shape=block.shape)
+
+    kind, lower, upper = get_block_structure(block)
+    if kind == ZERO:
+        return None
+    if kind in (DIAGONAL, BANDED):
+        offsets = np.arange(-lower, upper + 1)
+        # data of a dia matrix are aligned on the columns
+        data = np.zeros((len(offsets), block.shape[1]))
+        for i, offset in enumerate(offsets):
+            diagonal = np.diagonal(block, offset)
+            start = max(offset, 0)
+            data[i, start: start + len(diagonal)] = diagonal
+        return sparse.dia_matrix((data, offsets), shape=block.shape)
+    if kind == SPARSE:
+        return sparse.csr_matrix(block)
+    return block
+
+
+class SparseJacobianMixin:
+    """
+    Mixin for disciplines setting their jacobian with set_partial_derivative_for_other_types, as autodifferentiated
+    disciplines : dense blocks are passed as sparse matrices when they are diagonal, banded or mostly null.
+
+    jacobian_sparsity declares the structure of blocks, by (output name, input name), input name or output name in
+    this order of precedence : DETECT to detect it from the values, DIAGONAL, SPARSE or DENSE to skip the detection.
+    Blocks that are not declared are passed as computed, as all the blocks when sparse_jacobian is False.
+    """
+
+    sparse_jacobian = True
+    jacobian_sparsity = {}
+
+    def get_declared_jacobian_structure(self, y_key_column, x_key_column) -> str | None:
+        output_name = y_key_column[0] if isinstance(y_key_column, tuple) else y_key_column
+        input_name = x_key_column[0] if isinstance(x_key_column, tuple) else x_key_column
+        for key in ((output_name, input_name), input_name, output_name):
+            if key in self.jacobian_sparsity:
+                return self.jacobian_sparsity[key]
+        return None
+
+    def set_partial_derivative_for_other_types(self, y_key_column, x_key_column, value):
+        declared_structure = self.get_declared_jacobian_structure(y_key_column, x_key_column) if self.sparse_jacobian else None
+        if declared_structure is not None and isinstance(value, np.ndarray) and value.ndim == 2:
+            value = to_sparse_block(value, None if declared_structure == DETECT else declared_structure)
+            if value is None:
+                return
+        super().set_partial_derivative_for_other_types(y_key_column, x_key_column, value)
+
+
+def combine_diagonal_partials(*terms) -> dict:
+    """
+    Sum of (factor, partials) terms, partials as {input path: diagonal} : diagonal partials of a linear combination
+    of outputs, or of an elementwise function of outputs with factors its elementwise derivatives
+    """
+    combined = {}
+    for factor, partials in terms:
+        for input_path, diagonal in partials.items():
+            combined[input_path] = combined.get(input_path, 0.) + factor * diagonal
+    return combined
+
+
+class DiagonalJacobianMixin:
+    """
+    Mixin for autodifferentiated disciplines whose model outputs only depend on the same year of their inputs : the
+    model returns the diagonals of the jacobian blocks with compute_diagonal_jacobian, {output path: {input path:
+    diagonal}} with paths as 'dataframe:column' or 'name', and they are set as dia matrices instead of the dense
+    year x year blocks of the automatic differentiation.
+
+    The diagonals are computed at the inputs of the last compute of the model, the automatic differentiation is used
+    when the discipline is linearized at other inputs or when diagonal_jacobian is False.
+
+    Blocks of outputs that are not aligned on the years (objectives) are returned as 2D arrays, set as they are.
+    """
+
+    diagonal_jacobian = True
+
+    def is_model_computed_at_inputs(self) -> bool:
+        """True if the inputs of the last compute of the model, as 'dataframe:column' or 'name', are the current inputs"""
+        if not self.model.inputs:
+            return False
+        inputs = self.get_sosdisc_inputs()
+        # {dataframe name: {column: values}}
+        inputs_columns = {}
+        for path, value in self.model.inputs.items():
+            name, _, column = path.partition(':')
+            if name not in inputs:
+                return False
+            input_value = inputs[name]
+            if column:
+                if name not in inputs_columns:
+                    if isinstance(input_value, pd.DataFrame):
+                        inputs_columns[name] = dict(zip(input_value.columns, input_value.to_numpy().T))
+                    elif isinstance(input_value, dict):
+                        inputs_columns[name] = input_value
+                    else:
+                        return False
+                if column not in inputs_columns[name]:
+                    return False
+                input_value = inputs_columns[name][column]
+            if not is_same_value(value, input_value):
+                return False
+        return True
+
+    def compute_sos_jacobian(self):
+        if not self.diagonal_jacobian or not self.is_model_computed_at_inputs():
+            super().compute_sos_jacobian()
+            return
+
+        for output_path, partials in self.model.compute_diagonal_jacobian().items():
+            y_key_column = tuple(output_path.split(':', 1))
+            for input_path, diagonal in partials.items():
+                x_key_column = tuple(input_path.split(':', 1))
+                diagonal = np.asarray(diagonal, dtype=float)
+                if diagonal.ndim == 2:
+                    value = diagonal
+                elif len(x_key_column) == 1:
+                    # float input : the block is a column
+                    value = diagonal.reshape(-1, 1)
+                else:
+                    value = sparse.dia_matrix((diagonal[np.newaxis, :], [0]), shape=(len(diagonal), len(diagonal)))
+                self.set_partial_derivative_for_other_types(y_key_column, x_key_column, value)
@@ -0,0 +1,79 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+import importlib
+
+# Plotting dependencies of the disciplines (plotly, matplotlib, sostrades charts), imported on first use.
+#
+# Disciplines import them from here instead of importing them directly : building a process imports all its
+# discipline modules, workers that never build a chart do not pay the import of the plotting libraries.
+
+
+class LazyModule:
+    """Module imported on first access to one of its attributes"""
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return f"<lazy module '{self._module_name}'>"
+
+
+class LazyAttribute:
+    """Attribute of a module (a class, a function), imported when called or when one of its attributes is accessed"""
+
+    def __init__(self, module_name: str, attribute_name: str):
+        self._module_name = module_name
+        self._attribute_name = attribute_name
+        self._attribute = None
+
+    def _load(self):
+        if self._attribute is None:
+            self._attribute = getattr(importlib.import_module(self._module_name), self._attribute_name)
+        return self._attribute
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return f"<lazy '{self._module_name}.{self._attribute_name}'>"
+
+
+go = LazyModule('plotly.graph_objects')
+ff = LazyModule('plotly.figure_factory')
+plt = LazyModule('matplotlib.pyplot')
+mcolors = LazyModule('matplotlib.colors')
+
+ChartFilter = LazyAttribute('sostrades_core.tools.post_processing.charts.chart_filter', 'ChartFilter')
+InstanciatedSeries = LazyAttribute('sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart', 'InstanciatedSeries')
+TwoAxesInstanciatedChart = LazyAttribute('sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart', 'TwoAxesInstanciatedChart')
+InstanciatedPieChart = LazyAttribute('sostrades_core.tools.post_processing.pie_charts.instanciated_pie_chart', 'InstanciatedPieChart')
+InstantiatedPlotlyNativeChart = LazyAttribute('sostrades_core.tools.post_processing.plotly_native_charts.instantiated_plotly_native_chart',
+                                              'InstantiatedPlotlyNativeChart')
+InstanciatedTable = LazyAttribute('sostrades_core.tools.post_processing.tables.instanciated_table', 'InstanciatedTable')
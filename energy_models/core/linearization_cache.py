@@ -0,0 +1,117 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from energy_models.core.techno_type.step_cache import fingerprint
+
+
+def get_block_nbytes(value) -> int:
+    """Memory used by a jacobian block, dense or sparse"""
+    if sparse.issparse(value):
+        return sum(getattr(value, attribute).nbytes for attribute in ('data', 'indices', 'indptr', 'offsets')
+                   if hasattr(value, attribute))
+    return np.asarray(value).nbytes
+
+
+class LinearizationCache:
+    """Least recently used jacobians, bounded in number and in memory, with hit and miss counters"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # {inputs fingerprint: (blocks set in the jacobian, memory used)}
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Blocks of the jacobian linearized at the inputs fingerprinted by key, None if not cached"""
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+
+    def put(self, key, blocks: list):
+        nbytes = sum(get_block_nbytes(value) for _, _, value in blocks)
+        if self.max_entries <= 0 or nbytes > self.max_bytes:
+            return
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        while self.entries and (len(self.entries) >= self.max_entries or self.nbytes + nbytes > self.max_bytes):
+            self.nbytes -= self.entries.popitem(last=False)[1][1]
+        self.entries[key] = (blocks, nbytes)
+        self.nbytes += nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+
+class LinearizationCacheMixin:
+    """
+    Mixin for disciplines setting their jacobian with set_partial_derivative_for_other_types in compute_sos_jacobian :
+    the blocks set are recorded under a fingerprint of the inputs, and set again without computing them when the
+    discipline is linearized at the same inputs (line search backtracking, repeated linearizations of an MDA...).
+
+    Set linearization_cache_max_entries to 0 to disable the cache.
+    """
+
+    linearization_cache_max_entries = 8
+    linearization_cache_max_bytes = 64 * 2 ** 20
+
+    def get_linearization_cache(self) -> LinearizationCache:
+        if getattr(self, 'linearization_cache', None) is None:
+            self.linearization_cache = LinearizationCache(self.linearization_cache_max_entries, self.linearization_cache_max_bytes)
+        return self.linearization_cache
+
+    def get_linearization_fingerprint(self):
+        """Fingerprint of the inputs of the discipline, None if they can not be fingerprinted"""
+        try:
+            key = fingerprint(self.get_sosdisc_inputs())
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def compute_sos_jacobian(self):
+        cache = self.get_linearization_cache()
+        key = self.get_linearization_fingerprint() if cache.max_entries > 0 else None
+        blocks = cache.get(key) if key is not None else None
+        if blocks is not None:
+            for y_key_column, x_key_column, value in blocks:
+                super().set_partial_derivative_for_other_types(y_key_column, x_key_column, value)
+            return
+
+        self.recorded_jacobian_blocks = []
+        try:
+            super().compute_sos_jacobian()
+            if key is not None:
+                cache.put(key, self.recorded_jacobian_blocks)
+        finally:
+            self.recorded_jacobian_blocks = None
+
+    def set_partial_derivative_for_other_types(self, y_key_column, x_key_column, value):
+        if getattr(self, 'recorded_jacobian_blocks', None) is not None:
+            self.recorded_jacobian_blocks.append((y_key_column, x_key_column, value))
+        super().set_partial_derivative_for_other_types(y_key_column, x_key_column, value)
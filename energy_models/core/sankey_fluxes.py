@@ -0,0 +1,127 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+import re
+from abc import abstractmethod
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from energy_models.glossaryenergy import GlossaryEnergy
+
+# Flows of streams between the actors of a Sankey chart (technos of a stream, energies of the energy mix).
+#
+# The consumptions and productions of the actors are gathered once per executed state of a discipline as
+# [actor, stream, year] arrays. The Sankey charts of all the years, normalized or not, are rendered from these arrays
+# without reading and cleaning the dataframes of every actor again.
+
+INPUT = 'input'
+OUTPUT = 'output'
+
+
+@lru_cache(maxsize=4096)
+def get_stream_name(column: str) -> str | None:
+    """Stream of a column of consumption or production without its unit, None for years and resources"""
+    if column == GlossaryEnergy.Years or '(Mt)' in column:
+        return None
+    return re.sub(r"\s*\([^)]*\)", "", column)
+
+
+class SankeyFluxes:
+    """
+    Consumptions (inputs) and productions (outputs) of streams by actors, as [actor, stream, year] arrays.
+    Streams an actor does not consume or produce are not linked to it in the charts, they are null in the arrays.
+    """
+
+    def __init__(self, years: np.ndarray, actors: list[str], streams: list[str], flows: dict[str, np.ndarray],
+                 actors_streams: dict[str, list[list[int]]]):
+        self.years = years
+        self.actors = actors
+        self.streams = streams
+        # {INPUT or OUTPUT: [actor, stream, year] array}
+        self.flows = flows
+        # {INPUT or OUTPUT: [actor][indices of the streams of the actor, in order of its columns]}
+        self.actors_streams = actors_streams
+
+    @classmethod
+    def from_dataframes(cls, years: np.ndarray, actors_dataframes: dict[str, tuple]) -> SankeyFluxes:
+        """
+        :param actors_dataframes: {actor: (consumption dataframe, production dataframe)}, None for no flow,
+        columns with their units, resources columns are ignored, columns of a same stream are summed
+        """
+        actors = list(actors_dataframes)
+        streams_indices = {}
+        actors_columns = {INPUT: [], OUTPUT: []}
+        for dataframes in actors_dataframes.values():
+            for kind, df in zip((INPUT, OUTPUT), dataframes):
+                columns = [] if df is None else [(column, get_stream_name(column)) for column in df.columns]
+                columns = [(column, stream) for column, stream in columns if stream is not None]
+                for _, stream in columns:
+                    streams_indices.setdefault(stream, len(streams_indices))
+                actors_columns[kind].append(columns)
+
+        flows = {}
+        actors_streams = {}
+        for kind, i_dataframe in ((INPUT, 0), (OUTPUT, 1)):
+            flows[kind] = np.zeros((len(actors), len(streams_indices), len(years)))
+            actors_streams[kind] = []
+            for i_actor, (dataframes, columns) in enumerate(zip(actors_dataframes.values(), actors_columns[kind])):
+                actor_streams = []
+                for column, stream in columns:
+                    i_stream = streams_indices[stream]
+                    flows[kind][i_actor, i_stream] += dataframes[i_dataframe][column].to_numpy(dtype=float)
+                    if i_stream not in actor_streams:
+                        actor_streams.append(i_stream)
+                actors_streams[kind].append(actor_streams)
+        return cls(np.asarray(years), actors, list(streams_indices), flows, actors_streams)
+
+    def get_actors_dictionary(self, streams_filter: list | None = None) -> dict:
+        """Flows as {actor: {'input': dataframe, 'output': dataframe}} with years, as expected by the Sankey factory"""
+        actors_dictionary = {}
+        for i_actor, actor in enumerate(self.actors):
+            actors_dictionary[actor] = {}
+            for kind in (INPUT, OUTPUT):
+                columns = {GlossaryEnergy.Years: self.years}
+                for i_stream in self.actors_streams[kind][i_actor]:
+                    if streams_filter is None or self.streams[i_stream] in streams_filter:
+                        columns[self.streams[i_stream]] = self.flows[kind][i_actor, i_stream]
+                actors_dictionary[actor][kind] = pd.DataFrame(columns)
+        return actors_dictionary
+
+
+class SankeyFluxesMixin:
+    """
+    Mixin for disciplines drawing Sankey charts : the fluxes returned by compute_sankey_fluxes are built once per
+    executed state, at the end of run, and reused by all the charts. They are built on the first chart request when
+    the discipline has not been run by this instance (study loaded from its data, run in another process).
+    """
+
+    sankey_fluxes = None
+
+    def run(self):
+        super().run()
+        self.sankey_fluxes = self.compute_sankey_fluxes()
+
+    @abstractmethod
+    def compute_sankey_fluxes(self) -> SankeyFluxes:
+        """Fluxes of the inputs and outputs of the discipline"""
+
+    def get_sankey_fluxes(self) -> SankeyFluxes:
+        if self.sankey_fluxes is None:
+            self.sankey_fluxes = self.compute_sankey_fluxes()
+        return self.sankey_fluxes
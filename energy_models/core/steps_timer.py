@@ -0,0 +1,150 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+import inspect
+import weakref
+from collections import deque
+from functools import wraps
+from time import perf_counter
+
+from energy_models.core.lazy_charts import (
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
+
+
+class StepsTimer:
+    """
+    Opt-in timing of the steps of a model (TechnoType, BaseStream, EnergyMix...).
+
+    Set StepsTimer.enabled = True before the models are instanciated : each model then times its compute and all its
+    compute_*, configure_*, aggregate_* and apply_* methods. Each call of compute adds a record
+    {step name: duration in seconds} to the records of the model, that is one record per MDA iteration.
+    Only the last max_records records are kept, older ones are aggregated in the summary.
+    Durations of steps exclude the durations of the timed steps they call, so that they add up to the compute duration.
+    The steps are wrapped once on the class of the model, so that the timed models can still be pickled, and the wrapped
+    steps of models without timer call the steps directly.
+    """
+
+    enabled = False
+    step_prefixes = ('compute_', 'configure_', 'aggregate_', 'apply_')
+    max_records = 100
+    # timers of the models alive, to aggregate the timings of all the models of a process
+    timers = weakref.WeakSet()
+    # classes of models whose steps are wrapped
+    timed_classes = set()
+
+    def __init__(self, model):
+        self.model_name = model.name
+        self.model_class = type(model)
+        self.records = deque(maxlen=self.max_records)
+        # summary of the records dropped from the records
+        self.dropped_summary = {}
+        self.nb_dropped_records = 0
+        # durations of the timed steps called by each running step
+        self.nested_durations = []
+        self.time_steps(self.model_class)
+        StepsTimer.timers.add(self)
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        # timer of a model unpickled, possibly in another process
+        self.time_steps(self.model_class)
+        StepsTimer.timers.add(self)
+
+    @classmethod
+    def time_steps(cls, model_class: type):
+        """Wraps the compute and the compute_*, configure_*, aggregate_* and apply_* methods of the class of a model"""
+        if model_class in cls.timed_classes:
+            return
+        for step_name, step in inspect.getmembers(model_class, predicate=inspect.isfunction):
+            if (step_name == 'compute' or step_name.startswith(cls.step_prefixes)) and not hasattr(step, 'timed_step_name') \
+                    and not isinstance(inspect.getattr_static(model_class, step_name), staticmethod):
+                setattr(model_class, step_name, cls.timed(step_name, step))
+        cls.timed_classes.add(model_class)
+
+    @staticmethod
+    def timed(step_name: str, step):
+        @wraps(step)
+        def timed_step(model, *args, **kwargs):
+            steps_timer = getattr(model, 'steps_timer', None)
+            if steps_timer is None:
+                return step(model, *args, **kwargs)
+            return steps_timer.time_step(step_name, step, model, *args, **kwargs)
+
+        timed_step.timed_step_name = step_name
+        return timed_step
+
+    def new_record(self):
+        if len(self.records) == self.records.maxlen:
+            self.add_to_summary(self.dropped_summary, self.records[0])
+            self.nb_dropped_records += 1
+        self.records.append({})
+
+    def time_step(self, step_name: str, step, *args, **kwargs):
+        if step_name == 'compute' or not self.records:
+            self.new_record()
+        record = self.records[-1]
+        self.nested_durations.append(0.)
+        start = perf_counter()
+        try:
+            result = step(*args, **kwargs)
+        finally:
+            duration = perf_counter() - start
+            record[step_name] = record.get(step_name, 0.) + duration - self.nested_durations.pop()
+            if self.nested_durations:
+                self.nested_durations[-1] += duration
+        return result
+
+    @staticmethod
+    def add_to_summary(summary: dict, record: dict):
+        for step_name, duration in record.items():
+            step_summary = summary.setdefault(step_name, {'total': 0., 'max': 0., 'calls': 0})
+            step_summary['total'] += duration
+            step_summary['max'] = max(step_summary['max'], duration)
+            step_summary['calls'] += 1
+
+    def get_summary(self) -> dict[str, dict[str, float]]:
+        """Total, mean and max duration of each step over all the compute calls, in seconds, slowest steps first"""
+        summary = {step_name: dict(step_summary) for step_name, step_summary in self.dropped_summary.items()}
+        for record in self.records:
+            self.add_to_summary(summary, record)
+        for step_summary in summary.values():
+            step_summary['mean'] = step_summary['total'] / step_summary['calls']
+        return dict(sorted(summary.items(), key=lambda item: item[1]['total'], reverse=True))
+
+    @staticmethod
+    def get_model_timer(model) -> StepsTimer | None:
+        """Timer of the model if it has been timed"""
+        steps_timer = getattr(model, 'steps_timer', None)
+        return steps_timer if steps_timer is not None and steps_timer.records else None
+
+    @classmethod
+    def get_all_summaries(cls) -> dict[str, dict[str, dict[str, float]]]:
+        """Summaries of all the models timed, by model name"""
+        return {timer.model_name: timer.get_summary() for timer in cls.timers}
+
+    def get_chart(self, nb_steps: int = 10):
+        """Stacked durations of the slowest steps for each of the last compute calls"""
+        chart_name = f'Compute steps timings of {self.model_name}'
+        new_chart = TwoAxesInstanciatedChart('Compute call', 'Duration [ms]', chart_name=chart_name, stacked_bar=True)
+        calls = list(range(self.nb_dropped_records + 1, self.nb_dropped_records + len(self.records) + 1))
+        for step_name in list(self.get_summary())[:nb_steps]:
+            durations = [record.get(step_name, 0.) * 1e3 for record in self.records]
+            new_chart.series.append(InstanciatedSeries(calls, durations, step_name, 'bar'))
+        new_chart.post_processing_section_name = "Performances"
+        return new_chart
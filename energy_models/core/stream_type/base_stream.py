@@ -15,10 +15,12 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
+import numpy as np
 from sostrades_optimization_plugins.models.differentiable_model import (
     DifferentiableModel,
 )
 
+from energy_models.core.steps_timer import StepsTimer
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
@@ -34,6 +36,11 @@ class BaseStream(DifferentiableModel):
         self.name = name
         self.year_start = None
         self.year_end = None
+        # column alignments of the aggregations, kept while the inputs columns are unchanged
+        self.aggregation_inputs_signature = None
+        self.aggregation_plans = {}
+        # opt-in timing of the compute steps
+        self.steps_timer = StepsTimer(self) if StepsTimer.enabled else None
 
     @property
     def zeros_array(self):
@@ -46,6 +53,14 @@ class BaseStream(DifferentiableModel):
         self.year_start = self.inputs[GlossaryEnergy.YearStart]
         self.year_end = self.inputs[GlossaryEnergy.YearEnd]
         self.years = self.np.arange(self.year_start, self.year_end + 1)
+        self.configure_aggregation_plans()
+
+    def configure_aggregation_plans(self):
+        """Drop the column alignments of the aggregations when the technos or their input columns change"""
+        inputs_signature = tuple(self.inputs)
+        if inputs_signature != self.aggregation_inputs_signature:
+            self.aggregation_inputs_signature = inputs_signature
+            self.aggregation_plans = {}
 
     def compute(self):
         self.configure_parameters()
@@ -67,34 +82,55 @@ class BaseStream(DifferentiableModel):
         self.compute_scope_1_emissions()
         self.compute_scope_1_ghg_intensity()
 
-    def _aggregate_column_from_all_technos(self, output_varname: str, input_techno_varname: str, column_name: str):
-        self.outputs[f"{output_varname}:{GlossaryEnergy.Years}"] = self.years
-
-        for techno in self.inputs[GlossaryEnergy.techno_list]:
-            output_path = f"{output_varname}:{column_name}"
-            if output_path in self.outputs:
-                self.outputs[output_path] = \
-                    self.outputs[output_path] + \
-                    self.inputs[f'{techno}.{input_techno_varname}:{column_name}']
-            else:
-                self.outputs[output_path] = self.zeros_array + self.inputs[f'{techno}.{input_techno_varname}:{column_name}']
-
-    def _aggregate_from_all_technos(self, output_varname: str, input_techno_varname: str, conversion_factor: float):
+    def get_aggregation_plan(self, input_techno_varname: str, output_columns_renaming: tuple = ()):
+        """
+        Alignment of the columns of a dataframe of the technos on the columns of the aggregated dataframe :
+        (aggregated columns, inputs columns paths, matrix summing the inputs columns into the aggregated columns)
+        output_columns_renaming is a list of (old, new) replacements applied to the inputs columns names
+        """
+        plan_key = (input_techno_varname, output_columns_renaming)
+        if plan_key not in self.aggregation_plans:
+            output_columns = []
+            inputs_paths = []
+            output_indices = []
+            for techno in self.inputs[GlossaryEnergy.techno_list]:
+                techno_columns = self.get_colnames_input_dataframe(df_name=f'{techno}.{input_techno_varname}', expect_years=True)
+                for col in techno_columns:
+                    output_column = col
+                    for old, new in output_columns_renaming:
+                        output_column = output_column.replace(old, new)
+                    if output_column not in output_columns:
+                        output_columns.append(output_column)
+                    inputs_paths.append(f'{techno}.{input_techno_varname}:{col}')
+                    output_indices.append(output_columns.index(output_column))
+            summation_matrix = np.zeros((len(output_columns), len(inputs_paths)))
+            summation_matrix[output_indices, np.arange(len(inputs_paths))] = 1.
+            self.aggregation_plans[plan_key] = (output_columns, inputs_paths, summation_matrix)
+        return self.aggregation_plans[plan_key]
+
+    def get_technos_tensor(self, input_techno_varname: str, columns: list):
+        """
+        Columns of a dataframe of all the technos of the stream, as a [techno, column, year] tensor
+        columns names can refer to the techno as {techno}
+        """
+        technos = self.inputs[GlossaryEnergy.techno_list]
+        if not technos:
+            return self.np.zeros((0, len(columns), len(self.years)))
+        stacked_columns = self.np.stack([self.inputs[f'{techno}.{input_techno_varname}:{column.format(techno=techno)}']
+                                         for techno in technos for column in columns])
+        return self.np.reshape(stacked_columns, (len(technos), len(columns), len(self.years)))
+
+    def _aggregate_from_all_technos(self, output_varname: str, input_techno_varname: str, conversion_factor: float,
+                                    output_columns_renaming: tuple = ()):
         self.outputs[f"{output_varname}:{GlossaryEnergy.Years}"] = self.years
 
-        for techno in self.inputs[GlossaryEnergy.techno_list]:
-            techno_columns = self.get_colnames_input_dataframe(df_name=f'{techno}.{input_techno_varname}', expect_years=True)
-            for col in techno_columns:
-                output_path = f"{output_varname}:{col}"
-                if output_path in self.outputs:
-                    self.outputs[output_path] = \
-                        self.outputs[output_path] + \
-                        self.inputs[f'{techno}.{input_techno_varname}:{col}'] * conversion_factor
-
-                else:
-                    self.outputs[output_path] = \
-                        self.zeros_array + \
-                        self.inputs[f'{techno}.{input_techno_varname}:{col}'] * conversion_factor
+        output_columns, inputs_paths, summation_matrix = self.get_aggregation_plan(input_techno_varname, output_columns_renaming)
+        if not inputs_paths:
+            return
+        stacked_columns = self.np.stack([self.inputs[input_path] for input_path in inputs_paths])
+        aggregated_columns = self.np.dot(summation_matrix, stacked_columns) * conversion_factor
+        for i, output_column in enumerate(output_columns):
+            self.outputs[f"{output_varname}:{output_column}"] = aggregated_columns[i]
 
     def compute_productions(self):
         """Sum all the productions from technos of the stream (main stream and by products)"""
@@ -105,20 +141,18 @@ class BaseStream(DifferentiableModel):
         conversion_factor_stream_prod_detailed = GlossaryEnergy.conversion_dict[GlossaryEnergy.TechnoProductionDf['unit']][GlossaryEnergy.StreamProductionDetailedDf['unit']]
         inputs_units = GlossaryEnergy.TechnoProductionDf['unit'].split(' or ')
         outputs_units = GlossaryEnergy.StreamProductionDf['unit'].split(' or ')
-        for techno in self.inputs[GlossaryEnergy.techno_list]:
-            self.outputs[f"{GlossaryEnergy.StreamProductionDetailedValue}:{techno}"] = \
-                self.inputs[f'{techno}.{GlossaryEnergy.TechnoProductionValue}:{self.name}'] * conversion_factor_stream_prod_detailed
-            techno_products = self.get_colnames_input_dataframe(df_name=f'{techno}.{GlossaryEnergy.TechnoProductionValue}', expect_years=True)
-            for techno_product in techno_products:
-                techno_product_outputname = techno_product
-                for iu, ou in zip(inputs_units, outputs_units):
-                    techno_product_outputname = techno_product_outputname.replace(f"({iu})", f"({ou})")
-                output_path = f"{GlossaryEnergy.StreamProductionValue}:{techno_product_outputname}"
-                if output_path in self.outputs:
-                    self.outputs[output_path] = self.outputs[output_path] + self.inputs[f'{techno}.{GlossaryEnergy.TechnoProductionValue}:{techno_product}'] * conversion_factor_stream_prod
-                else:
-                    self.outputs[output_path] = self.zeros_array + self.inputs[f'{techno}.{GlossaryEnergy.TechnoProductionValue}:{techno_product}'] * conversion_factor_stream_prod
 
+        # [techno, year] production of the main stream by each techno
+        self.technos_main_production = self.get_technos_tensor(GlossaryEnergy.TechnoProductionValue, [self.name])[:, 0]
+        technos_production_detailed = self.technos_main_production * conversion_factor_stream_prod_detailed
+        for i, techno in enumerate(self.inputs[GlossaryEnergy.techno_list]):
+            self.outputs[f"{GlossaryEnergy.StreamProductionDetailedValue}:{techno}"] = technos_production_detailed[i]
+
+        self._aggregate_from_all_technos(
+            output_varname=GlossaryEnergy.StreamProductionValue,
+            input_techno_varname=GlossaryEnergy.TechnoProductionValue,
+            conversion_factor=conversion_factor_stream_prod,
+            output_columns_renaming=tuple((f"({iu})", f"({ou})") for iu, ou in zip(inputs_units, outputs_units)))
 
     def compute_energy_type_capital(self):
         technos = self.inputs[GlossaryEnergy.techno_list]
@@ -142,42 +176,34 @@ class BaseStream(DifferentiableModel):
         '''
         self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{GlossaryEnergy.Years}'] = self.years
         self.outputs[f'energy_detailed_techno_prices:{GlossaryEnergy.Years}'] = self.years
-        self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}'] = self.zeros_array
-        self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}_wotaxes'] = self.zeros_array
-
-        for techno in self.inputs[GlossaryEnergy.techno_list]:
-            self.outputs[f'energy_detailed_techno_prices:{techno}'] = self.inputs[f'{techno}.{GlossaryEnergy.TechnoPricesValue}:{techno}']
-            techno_share_of_total_stream_prod = self.outputs[f'techno_mix:{techno}'] / 100.
 
-            self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}'] = \
-                self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}'] + \
-                self.inputs[f'{techno}.{GlossaryEnergy.TechnoPricesValue}:{techno}'] * techno_share_of_total_stream_prod
+        technos = self.inputs[GlossaryEnergy.techno_list]
+        # [techno, (price, price without taxes), year]
+        technos_prices = self.get_technos_tensor(GlossaryEnergy.TechnoPricesValue, ['{techno}', '{techno}_wotaxes'])
+        for i, techno in enumerate(technos):
+            self.outputs[f'energy_detailed_techno_prices:{techno}'] = technos_prices[i, 0]
 
-            self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}_wotaxes'] = \
-                self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}_wotaxes'] + \
-                self.inputs[f'{techno}.{GlossaryEnergy.TechnoPricesValue}:{techno}_wotaxes'] * techno_share_of_total_stream_prod
+        stream_prices = self.zeros_array + self.np.einsum('ty,tky->ky', self.technos_mix / 100., technos_prices)
+        self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}'] = stream_prices[0]
+        self.outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.name}_wotaxes'] = stream_prices[1]
 
     def compute_land_use(self):
         """Sum the land uses of the technos to obtain land use of the stream"""
         self.outputs[f'{GlossaryEnergy.LandUseRequiredValue}:{GlossaryEnergy.Years}'] = self.years
-        self.outputs[f'{GlossaryEnergy.LandUseRequiredValue}:Land use'] = self.zeros_array
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.TechnoLandUseDf['unit']][GlossaryEnergy.StreamLandUseDf['unit']]
-        for techno in self.inputs[GlossaryEnergy.techno_list]:
-                self.outputs[f'{GlossaryEnergy.LandUseRequiredValue}:Land use'] = \
-                    self.outputs[f'{GlossaryEnergy.LandUseRequiredValue}:Land use'] + \
-                    self.inputs[f'{techno}.{GlossaryEnergy.LandUseRequiredValue}:Land use'] \
-                    * conversion_factor
-
+        technos_land_use = self.get_technos_tensor(GlossaryEnergy.LandUseRequiredValue, ['Land use'])[:, 0]
+        self.outputs[f'{GlossaryEnergy.LandUseRequiredValue}:Land use'] = \
+            self.zeros_array + self.np.sum(technos_land_use, axis=0) * conversion_factor
 
     def compute_techno_mix(self):
         """Compute the contribution of each techno for the production of the main stream (in %) [0, 100]"""
         self.outputs[f'techno_mix:{GlossaryEnergy.Years}'] = self.years
         conversion_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.TechnoProductionDf['unit']][GlossaryEnergy.StreamProductionDf['unit']]
         stream_total_prod = self.outputs[f'{GlossaryEnergy.StreamProductionValue}:{self.name}']
-        for techno in self.inputs[GlossaryEnergy.techno_list]:
-            techno_share_of_total_stream_prod = self.inputs[
-                                                    f'{techno}.{GlossaryEnergy.TechnoProductionValue}:{self.name}'] * conversion_factor / (stream_total_prod + 1e-9)
-            self.outputs[f'techno_mix:{techno}'] = techno_share_of_total_stream_prod * 100.
+        # [techno, year] share of each techno in the production of the main stream, in %
+        self.technos_mix = self.technos_main_production * conversion_factor / (stream_total_prod + 1e-9) * 100.
+        for i, techno in enumerate(self.inputs[GlossaryEnergy.techno_list]):
+            self.outputs[f'techno_mix:{techno}'] = self.technos_mix[i]
 
     def compute_energy_consumptions(self):
         """Compute all energy consumptions in stream"""
@@ -217,21 +243,20 @@ class BaseStream(DifferentiableModel):
 
     def compute_scope_1_emissions(self):
         """Compute the scope 1 emissions of the stream : emissions associated to production"""
-        for ghg in GlossaryEnergy.GreenHouseGases:
-            self._aggregate_column_from_all_technos(
-                output_varname=GlossaryEnergy.StreamScope1GHGEmissionsValue,
-                input_techno_varname=GlossaryEnergy.TechnoScope1GHGEmissionsValue,
-                column_name=ghg)
+        self.outputs[f"{GlossaryEnergy.StreamScope1GHGEmissionsValue}:{GlossaryEnergy.Years}"] = self.years
+        # [techno, ghg, year]
+        self.technos_scope_1_emissions = self.get_technos_tensor(GlossaryEnergy.TechnoScope1GHGEmissionsValue,
+                                                                 GlossaryEnergy.GreenHouseGases)
+        stream_emissions = self.zeros_array + self.np.sum(self.technos_scope_1_emissions, axis=0)
+        for i, ghg in enumerate(GlossaryEnergy.GreenHouseGases):
+            self.outputs[f"{GlossaryEnergy.StreamScope1GHGEmissionsValue}:{ghg}"] = stream_emissions[i]
 
     def compute_scope_1_ghg_intensity(self):
         """Compute weighted average of scope 1 ghg intensity for each GHG (CO2, CH4, N2O)"""
         self.outputs[f"{GlossaryEnergy.StreamScope1GHGIntensityValue}:{GlossaryEnergy.Years}"] = self.years
-        for ghg in GlossaryEnergy.GreenHouseGases:
-            self.outputs[f"{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}"] = self.zeros_array
-            for techno in self.inputs[GlossaryEnergy.techno_list]:
-                self.outputs[f"{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}"] = self.outputs[f"{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}"] + \
-                                                               self.outputs[f'techno_mix:{techno}'] / 100. * \
-                                                               self.inputs[f"{techno}.{GlossaryEnergy.TechnoScope1GHGEmissionsValue}:{ghg}"]
+        stream_intensities = self.zeros_array + self.np.einsum('ty,tgy->gy', self.technos_mix / 100., self.technos_scope_1_emissions)
+        for i, ghg in enumerate(GlossaryEnergy.GreenHouseGases):
+            self.outputs[f"{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}"] = stream_intensities[i]
 
     def compute_ccs_demand(self):
         conversion_factor = GlossaryEnergy.conversion_dict[
@@ -15,11 +15,10 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
+from energy_models.core.lazy_charts import (
     InstanciatedSeries,
     TwoAxesInstanciatedChart,
 )
-
 from energy_models.core.stream_type.stream_disc import StreamDiscipline
 from energy_models.glossaryenergy import GlossaryEnergy
 
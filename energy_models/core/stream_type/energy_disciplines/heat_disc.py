@@ -16,21 +16,18 @@ limitations under the License.
 import logging
 
 import numpy as np
-import pandas as pd
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
+
+from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedPieChart,
     InstanciatedSeries,
     TwoAxesInstanciatedChart,
 )
-from sostrades_core.tools.post_processing.pie_charts.instanciated_pie_chart import (
-    InstanciatedPieChart,
-)
-
-from energy_models.core.energy_mix.energy_mix import EnergyMix
 from energy_models.core.stream_type.energy_disciplines.high_heat_disc import (
     HighHeatDiscipline,
 )
@@ -40,6 +37,11 @@ from energy_models.core.stream_type.energy_disciplines.low_heat_disc import (
 from energy_models.core.stream_type.energy_disciplines.medium_heat_disc import (
     MediumHeatDiscipline,
 )
+from energy_models.core.stream_type.streams_aggregation import (
+    AGGREGATED_VARIABLES,
+    aggregate_streams,
+    get_streams_aggregation_partials,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
@@ -135,73 +137,29 @@ class HeatDiscipline(SoSWrapp):
         '''
         Overload SoSDiscipline run
         '''
-
-        # init dataframes
         year_start, year_end = self.get_sosdisc_inputs(
             [GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd])
         years = np.arange(year_start, year_end + 1)
 
-        energy_prices = pd.DataFrame({GlossaryEnergy.Years: years})
-        energy_detailed_techno_prices = pd.DataFrame({GlossaryEnergy.Years: years})
-        energy_production = pd.DataFrame({GlossaryEnergy.Years: years})
-        energy_consumption = pd.DataFrame({GlossaryEnergy.Years: years})
-        energy_production_detailed = pd.DataFrame({GlossaryEnergy.Years: years})
-        energy_prices[GlossaryEnergy.heat] = 0
-        energy_prices['heat_production'] = 0
-
-        # loop over heat energies
-        for energy in self.energy_list:
-            energy_price = self.get_sosdisc_inputs(f'{energy}.{GlossaryEnergy.StreamPricesValue}')
-            energy_techno_prices = self.get_sosdisc_inputs(
-                f'{energy}.energy_detailed_techno_prices')
-            energy_cons = self.get_sosdisc_inputs(
-                f'{energy}.{GlossaryEnergy.StreamEnergyConsumptionValue}')
-            energy_prod = self.get_sosdisc_inputs(
-                f'{energy}.{GlossaryEnergy.StreamProductionValue}')
-            energy_techno_prod = self.get_sosdisc_inputs(
-                f'{energy}.{GlossaryEnergy.StreamProductionDetailedValue}')
-            # energy_heat_flux = self.get_sosdisc_inputs(
-            #     f'{energy}.energy_heat_flux_detailed')
-
-            energy_prices = pd.concat(
-                [energy_prices, energy_price.drop(GlossaryEnergy.Years, axis=1)], axis=1)
-            energy_detailed_techno_prices = pd.concat(
-                [energy_detailed_techno_prices, energy_techno_prices.drop(GlossaryEnergy.Years, axis=1)], axis=1)
-            energy_production = pd.concat(
-                [energy_production, energy_prod.drop(GlossaryEnergy.Years, axis=1)], axis=1)
-            energy_consumption = pd.concat(
-                [energy_consumption, energy_cons.drop(GlossaryEnergy.Years, axis=1)], axis=1)
-            energy_production_detailed = pd.concat(
-                [energy_production_detailed, energy_techno_prod.drop(GlossaryEnergy.Years, axis=1)], axis=1)
-            # energy_heat_flux_detailed = pd.concat(
-            #     [energy_heat_flux_detailed, energy_heat_flux.drop(GlossaryEnergy.Years, axis=1)], axis=1)
-
-            # mean price weighted with production for each energy
-            energy_prices[GlossaryEnergy.heat] += [price * production for price,
-                                                             production in
-                                      zip(energy_prices[energy], energy_production[energy])]
-            energy_prices['heat_production'] += energy_production[energy]
-
-        # aggregations
-        energy_prices[GlossaryEnergy.heat] = energy_prices[GlossaryEnergy.heat] / \
-                                energy_prices['heat_production']
-        energy_prices.drop('heat_production', axis=1)
-        energy_production = energy_production.groupby(level=0, axis=1).sum()
-        energy_consumption = energy_consumption.groupby(level=0, axis=1).sum()
-        energy_production_detailed = energy_production_detailed.groupby(
-            level=0, axis=1).sum()
-        # energy_heat_flux_detailed = energy_heat_flux_detailed.groupby(level=0, axis=1).sum()
-
-        outputs_dict = {GlossaryEnergy.StreamPricesValue: energy_prices,
-                        'energy_detailed_techno_prices': energy_detailed_techno_prices,
-                        GlossaryEnergy.StreamProductionValue: energy_production,
-                        GlossaryEnergy.StreamEnergyConsumptionValue: energy_consumption,
-                        GlossaryEnergy.StreamProductionDetailedValue: energy_production_detailed,
-                        # 'energy_heat_flux_detailed': energy_heat_flux_detailed,
-                        }
+        outputs_dict = aggregate_streams(years, self.get_streams_inputs(), GlossaryEnergy.heat)
 
         self.store_sos_outputs_values(outputs_dict)
 
+    def get_streams_inputs(self):
+        """{energy: {variable name: dataframe}} of the heat energies"""
+        return {energy: {variable: self.get_sosdisc_inputs(f'{energy}.{variable}') for variable in AGGREGATED_VARIABLES}
+                for energy in self.energy_list}
+
+    def compute_sos_jacobian(self):
+        year_start, year_end = self.get_sosdisc_inputs(
+            [GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd])
+        years = np.arange(year_start, year_end + 1)
+
+        for (output_name, output_column), (energy, input_name, input_column), value in \
+                get_streams_aggregation_partials(years, self.get_streams_inputs(), GlossaryEnergy.heat):
+            self.set_partial_derivative_for_other_types(
+                (output_name, output_column), (f'{energy}.{input_name}', input_column), value)
+
     # POST PROCESSING
     def get_chart_filter_list(self):
 
@@ -17,14 +17,14 @@ limitations under the License.
 
 
 import numpy as np
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 from sostrades_optimization_plugins.models.autodifferentiated_discipline import (
     AutodifferentiedDisc,
 )
 
+from energy_models.core.lazy_charts import (
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.core.stream_type.energy_disc import EnergyDiscipline
 from energy_models.core.stream_type.energy_models.syngas import (
     Syngas,
@@ -22,12 +22,12 @@ from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
+
+from energy_models.core.lazy_charts import (
+    ChartFilter,
     InstanciatedSeries,
     TwoAxesInstanciatedChart,
 )
-
 from energy_models.core.stream_type.resources_models.resource_glossary import (
     ResourceGlossary,
 )
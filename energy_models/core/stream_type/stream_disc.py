@@ -16,18 +16,10 @@ limitations under the License.
 '''
 from __future__ import annotations
 
-import re
-
 import numpy as np
-import pandas as pd
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
 from sostrades_optimization_plugins.models.autodifferentiated_discipline import (
     AutodifferentiedDisc,
 )
@@ -41,10 +33,19 @@ from sostrades_optimization_plugins.tools.plot_tools.plotting import (
     InstantiatedPlotlyNativeChart,
 )
 
+from energy_models.core.jacobian_sparsity import DETECT, SparseJacobianMixin
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
+from energy_models.core.linearization_cache import LinearizationCacheMixin
+from energy_models.core.sankey_fluxes import SankeyFluxes, SankeyFluxesMixin
+from energy_models.core.steps_timer import StepsTimer
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
-class StreamDiscipline(AutodifferentiedDisc):
+class StreamDiscipline(SparseJacobianMixin, LinearizationCacheMixin, SankeyFluxesMixin, AutodifferentiedDisc):
     # ontology information
     _ontology_data = {
         "label": "Core Stream Type Model",
@@ -89,6 +90,8 @@ class StreamDiscipline(AutodifferentiedDisc):
     _maturity = 'Research'
     stream_name = 'stream'
     unit = ""
+    # the outputs of a year only depend on the inputs of the same year
+    jacobian_sparsity = {output_name: DETECT for output_name in [*DESC_OUT, GlossaryEnergy.StreamPricesValue]}
 
     def setup_sos_disciplines(self):
         dynamic_inputs = {}
@@ -137,6 +140,8 @@ class StreamDiscipline(AutodifferentiedDisc):
                       "Production",
                       "Consumption",
                       GlossaryEnergy.Capital]
+        if StepsTimer.get_model_timer(getattr(self, 'model', None)) is not None:
+            chart_list.append('Compute steps timings')
         chart_filters.append(ChartFilter(
             'Charts', chart_list, chart_list, 'charts'))
 
@@ -220,6 +225,10 @@ class StreamDiscipline(AutodifferentiedDisc):
             new_chart.post_processing_section_name = "Detailed Stream Flow"
             instanciated_charts.append(new_chart)
 
+        steps_timer = StepsTimer.get_model_timer(getattr(self, 'model', None))
+        if 'Compute steps timings' in charts and steps_timer is not None:
+            instanciated_charts.append(steps_timer.get_chart())
+
         return instanciated_charts
 
     def get_chart_energy_price_in_dollar_kwh(self):
@@ -421,6 +430,21 @@ class StreamDiscipline(AutodifferentiedDisc):
         return val
 
 
+    def compute_sankey_fluxes(self):
+        """Consumptions and productions of the technos, production of the stream as available, consumption as requested"""
+        techno_list = self.get_sosdisc_inputs(GlossaryEnergy.TechnoListName)
+        year_start, year_end = self.get_sosdisc_inputs([GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd])
+        actors_dataframes = {
+            techno: (self.get_sosdisc_inputs(f"{techno}.{GlossaryEnergy.TechnoEnergyConsumptionValue}"),
+                     self.get_sosdisc_inputs(f"{techno}.{GlossaryEnergy.TechnoProductionValue}"))
+            for techno in techno_list}
+
+        # Switch prod /consumption as we want the node to "consume" the available streams
+        production = self.get_sosdisc_outputs(GlossaryEnergy.StreamProductionValue)
+        actors_dataframes["available"] = (production.rename(columns=lambda c: c.replace("production ", "")), None)
+        actors_dataframes["requested"] = (None, self.get_sosdisc_outputs(GlossaryEnergy.StreamEnergyConsumptionValue))
+        return SankeyFluxes.from_dataframes(np.arange(year_start, year_end + 1), actors_dataframes)
+
     def get_chart_sankey_fluxes(
         self,
         years_list,
@@ -431,98 +455,7 @@ class StreamDiscipline(AutodifferentiedDisc):
     ):
         """Create sankey chart correlating production and consumption of all technos in stream disc."""
 
-        # Get list of energy technologies
-        techno_list = self.get_sosdisc_inputs(GlossaryEnergy.TechnoListName)
-        year_start, year_end = self.get_sosdisc_inputs([GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd])
-        years = np.arange(year_start, year_end + 1)
-
-        # Initialize dictionary with all consumptions / productions
-        techno_dictionary = {}
-
-        # Get dataframes and put them in dictionary format
-        for techno in techno_list:
-            consumption = self.get_sosdisc_inputs(
-                f"{techno}.{GlossaryEnergy.TechnoEnergyConsumptionValue}"
-            ).copy()
-            production = self.get_sosdisc_inputs(
-                f"{techno}.{GlossaryEnergy.TechnoProductionValue}"
-            ).copy()
-
-            # Add Years to dataframes
-            if GlossaryEnergy.Years not in consumption.columns:
-                consumption[GlossaryEnergy.Years] = years
-
-            if GlossaryEnergy.Years not in production.columns:
-                production[GlossaryEnergy.Years] = years
-
-            # Update dictionary
-            techno_dictionary[techno] = {
-                "input": consumption,
-                "output": production,
-            }
-
-        # Get Net Production
-        production = self.get_sosdisc_outputs(
-            f"{GlossaryEnergy.StreamProductionValue}"
-        ).copy()
-        production.columns = [c.replace("production ", "") for c in production.columns]
-        consumption = pd.DataFrame({GlossaryEnergy.Years: years})
-
-        # Add Years to dataframes
-        if GlossaryEnergy.Years not in production.columns:
-            production[GlossaryEnergy.Years] = years
-
-        # Switch prod /consumption as we want the node to "consume" the available streams
-        techno_dictionary["available"] = {
-            "input": production,
-            "output": consumption,
-        }
-
-        # Get Consumption
-        consumption = self.get_sosdisc_outputs(
-            f"{GlossaryEnergy.StreamEnergyConsumptionValue}"
-        ).copy()
-        production = pd.DataFrame({GlossaryEnergy.Years: years})
-
-        # Add Years to dataframes
-        if GlossaryEnergy.Years not in consumption.columns:
-            consumption[GlossaryEnergy.Years] = years
-
-        # Switch prod /consumption as we want the node to "consume" the available streams
-        techno_dictionary["requested"] = {
-            "input": production,
-            "output": consumption,
-        }
-
-        # Filter out resources
-        for dfs in techno_dictionary.values():
-            dfs["input"] = dfs["input"][
-                [c for c in dfs["input"].columns if "(Mt)" not in c]
-            ]
-            dfs["output"] = dfs["output"][
-                [c for c in dfs["output"].columns if "(Mt)" not in c]
-            ]
-
-        # Remove units from all streams, to handle inconsistent naming
-        for actor in techno_dictionary:
-            techno_dictionary[actor]["input"].columns = [
-                re.sub(r"\s*\([^)]*\)", "", c)
-                for c in techno_dictionary[actor]["input"].columns
-            ]
-            techno_dictionary[actor]["output"].columns = [
-                re.sub(r"\s*\([^)]*\)", "", c)
-                for c in techno_dictionary[actor]["output"].columns
-            ]
-
-        # filter streams
-        if streams_filter is not None:
-            for dfs in techno_dictionary.values():
-                existing_columns = list(set(streams_filter) & set(dfs["input"].columns))
-                dfs["input"] = dfs["input"][[GlossaryEnergy.Years] + existing_columns]
-                existing_columns = list(
-                    set(streams_filter) & set(dfs["output"].columns)
-                )
-                dfs["output"] = dfs["output"][[GlossaryEnergy.Years] + existing_columns]
+        techno_dictionary = self.get_sankey_fluxes().get_actors_dictionary(streams_filter)
 
         # Create sankey plot
         colormap = available_colormaps["energy"]
@@ -0,0 +1,140 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from energy_models.glossaryenergy import GlossaryEnergy
+
+# Aggregation of several streams into one (heat from low, medium and high temperature heat, fuel from the liquid
+# fuels) : prices are weighted by the productions, consumptions and productions are summed column by column.
+
+STREAM_PRICES = GlossaryEnergy.StreamPricesValue
+TECHNO_PRICES = 'energy_detailed_techno_prices'
+# dataframes of the streams summed column by column
+SUMMED_VARIABLES = (GlossaryEnergy.StreamProductionValue,
+                    GlossaryEnergy.StreamEnergyConsumptionValue,
+                    GlossaryEnergy.StreamProductionDetailedValue)
+AGGREGATED_VARIABLES = (STREAM_PRICES, TECHNO_PRICES) + SUMMED_VARIABLES
+
+
+@lru_cache(maxsize=256)
+def get_columns_mapping(columns_lists: tuple) -> tuple:
+    """
+    Columns of the sum of dataframes, sorted with the years as a groupby on the columns names,
+    and for each dataframe the indices of its columns in the sum
+    """
+    output_columns = sorted({GlossaryEnergy.Years}.union(*columns_lists))
+    output_indices = {column: i for i, column in enumerate(output_columns)}
+    return output_columns, tuple(np.array([output_indices[column] for column in columns], dtype=int)
+                                 for columns in columns_lists)
+
+
+def get_value_columns(df: pd.DataFrame) -> tuple:
+    return tuple(column for column in df.columns if column != GlossaryEnergy.Years)
+
+
+def sum_dataframes(years: np.ndarray, dataframes: list) -> pd.DataFrame:
+    """Sum of dataframes with years, column by column"""
+    columns_lists = tuple(get_value_columns(df) for df in dataframes)
+    output_columns, indices = get_columns_mapping(columns_lists)
+    values = np.zeros((len(years), len(output_columns)))
+    for df, columns, df_indices in zip(dataframes, columns_lists, indices):
+        values[:, df_indices] += df[list(columns)].to_numpy(dtype=float)
+    summed_df = pd.DataFrame(values, columns=output_columns)
+    summed_df[GlossaryEnergy.Years] = years
+    return summed_df
+
+
+def concat_dataframes(years: np.ndarray, first_columns: dict, dataframes: list) -> pd.DataFrame:
+    """Years, first columns and the columns of the dataframes side by side"""
+    columns = {GlossaryEnergy.Years: years}
+    columns.update(first_columns)
+    for df in dataframes:
+        for column in get_value_columns(df):
+            columns[column] = df[column].to_numpy()
+    return pd.DataFrame(columns)
+
+
+def get_prices_and_productions(years: np.ndarray, streams_inputs: dict) -> tuple:
+    """Prices and productions of the streams, as [stream, year] arrays"""
+    prices, productions = [np.array([streams_inputs[stream][variable][stream].to_numpy(dtype=float) for stream in streams_inputs])
+                           .reshape(len(streams_inputs), len(years)) for variable in (STREAM_PRICES, GlossaryEnergy.StreamProductionValue)]
+    return prices, productions
+
+
+def get_production_weighted_price(prices: np.ndarray, productions: np.ndarray) -> tuple:
+    """
+    Total production, price weighted by the productions and inverse of the total production, for [stream, year] prices
+    and productions. Years without production have no weighted price (NaN) and a null inverse of the total production,
+    so that the partial derivatives of the weighted price are null for them.
+    """
+    total_production = productions.sum(axis=0)
+    has_production = total_production != 0
+    aggregated_price = np.divide((prices * productions).sum(axis=0), total_production,
+                                 out=np.full_like(total_production, np.nan), where=has_production)
+    inverse_total_production = np.divide(1., total_production, out=np.zeros_like(total_production), where=has_production)
+    return total_production, aggregated_price, inverse_total_production
+
+
+def aggregate_streams(years: np.ndarray, streams_inputs: dict, aggregated_name: str) -> dict:
+    """
+    Outputs of the aggregated stream
+    :param streams_inputs: {stream name: {variable name of AGGREGATED_VARIABLES: dataframe}}
+    :param aggregated_name: name of the aggregated stream, column of its price weighted by the productions
+    """
+    streams = list(streams_inputs)
+    prices, productions = get_prices_and_productions(years, streams_inputs)
+    total_production, aggregated_price, _ = get_production_weighted_price(prices, productions)
+
+    outputs = {
+        STREAM_PRICES: concat_dataframes(
+            years, {aggregated_name: aggregated_price, f'{aggregated_name}_production': total_production},
+            [streams_inputs[stream][STREAM_PRICES] for stream in streams]),
+        TECHNO_PRICES: concat_dataframes(years, {}, [streams_inputs[stream][TECHNO_PRICES] for stream in streams]),
+    }
+    for variable in SUMMED_VARIABLES:
+        outputs[variable] = sum_dataframes(years, [streams_inputs[stream][variable] for stream in streams])
+    return outputs
+
+
+def get_streams_aggregation_partials(years: np.ndarray, streams_inputs: dict, aggregated_name: str) -> list:
+    """
+    Non null partial derivatives of the outputs of aggregate_streams, as
+    [((output name, output column), (stream name, input variable name, input column), value)]
+    """
+    identity = np.identity(len(years))
+    prices, productions = get_prices_and_productions(years, streams_inputs)
+    _, aggregated_price, inverse_total_production = get_production_weighted_price(prices, productions)
+    aggregated_price = np.nan_to_num(aggregated_price)
+
+    partials = []
+    for i_stream, stream in enumerate(streams_inputs):
+        # weighted price
+        partials.append(((STREAM_PRICES, aggregated_name), (stream, STREAM_PRICES, stream),
+                         np.diag(productions[i_stream] * inverse_total_production)))
+        partials.append(((STREAM_PRICES, aggregated_name), (stream, GlossaryEnergy.StreamProductionValue, stream),
+                         np.diag((prices[i_stream] - aggregated_price) * inverse_total_production)))
+        partials.append(((STREAM_PRICES, f'{aggregated_name}_production'), (stream, GlossaryEnergy.StreamProductionValue, stream),
+                         identity))
+        # columns copied or summed
+        for variable in (STREAM_PRICES, TECHNO_PRICES) + SUMMED_VARIABLES:
+            for column in get_value_columns(streams_inputs[stream][variable]):
+                partials.append(((variable, column), (stream, variable, column), identity))
+    return partials
@@ -0,0 +1,89 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import numpy as np
+
+# Sliding window operators over a plant lifetime (or an amortization period).
+#
+# A plant built in year i produces from year i to year i + lifetime - 1, so most stock quantities of a techno
+# are trailing window sums of a yearly flow. Those operators are linear and banded in the year dimension :
+# they are computed here with cumulative sums in O(n_years) instead of dense n_years x n_years masks.
+#
+# Each operator takes the numpy module to use (the model's self.np) so that it stays compatible with the
+# automatic differentiation of the models. Years are always the last axis, so the operators also apply to
+# arrays with leading scenario axes.
+
+
+def _shift(xp, x, width: int):
+    """x shifted of width years forward, zeros before"""
+    n_years = x.shape[-1]
+    zeros = xp.zeros(x.shape[:-1] + (min(width, n_years),))
+    if width >= n_years:
+        return zeros
+    return xp.concatenate([zeros, x[..., :n_years - width]], axis=-1)
+
+
+def lifetime_window_sum(x, width: int, xp=np):
+    """
+    Trailing window sum : y[t] = sum_{k=0}^{width-1} x[t - k]
+
+    Example : production capacity of year t = sum of the capacities installed during the last lifetime years
+    """
+    cumulated_x = xp.cumsum(x, axis=-1)
+    return cumulated_x - _shift(xp, cumulated_x, width)
+
+
+def lifetime_window_age_sum(x, width: int, xp=np):
+    """
+    Trailing window sum weighted by age : y[t] = sum_{k=0}^{width-1} k * x[t - k]
+
+    Example : sum over the producing plants of the age of the plant times its production capacity
+    """
+    ages = np.arange(x.shape[-1])
+    cumulated_x = xp.cumsum(x, axis=-1)
+    cumulated_age_x = xp.cumsum(x * ages, axis=-1)
+    window_x = cumulated_x - _shift(xp, cumulated_x, width)
+    window_age_x = cumulated_age_x - _shift(xp, cumulated_age_x, width)
+    return ages * window_x - window_age_x
+
+
+def remaining_share_of_initial_plants(initial_age_distrib, xp=np):
+    """
+    Share (in % of initial production) of the plants existing at year start that are still producing,
+    for the lifetime years following year start.
+
+    initial_age_distrib[a] is the share of initial plants of age a. They are dismantled when reaching the lifetime, so
+    remaining share [k] = sum_{a <= lifetime - 1 - k} initial_age_distrib[a]
+    """
+    return xp.flip(xp.cumsum(initial_age_distrib))
+
+
+def mean_age_of_initial_plants(initial_age_distrib, xp=np):
+    """
+    Mean age of the plants existing at year start that are still producing, for the lifetime years
+    following year start (initial_age_distrib as in remaining_share_of_initial_plants) :
+
+    mean age [k] = sum_{a <= lifetime - 1 - k} (lifetime - 1 - a) * initial_age_distrib[a] / remaining share [k]
+    """
+    lifetime = len(initial_age_distrib)
+    weighted_ages = xp.flip(xp.cumsum(initial_age_distrib * np.arange(lifetime - 1, -1, -1)))
+    return weighted_ages / remaining_share_of_initial_plants(initial_age_distrib, xp=xp)
+
+
+def pad_to_years(x, n_years: int, xp=np):
+    """Truncate x to n_years values or complete it with zeros"""
+    if x.shape[-1] >= n_years:
+        return x[..., :n_years]
+    return xp.concatenate([x, xp.zeros(x.shape[:-1] + (n_years - x.shape[-1],))], axis=-1)
@@ -0,0 +1,68 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+
+# Helpers to compare and fingerprint the values read by the caches of the disciplines
+
+
+def is_plain_value(value) -> bool:
+    """True for values made of numbers, strings, and numpy arrays of those"""
+    if value is None or isinstance(value, (Number, str, np.generic)):
+        return True
+    if isinstance(value, np.ndarray):
+        return value.dtype != object
+    if isinstance(value, dict):
+        return all(is_plain_value(element) for element in value.values())
+    if isinstance(value, (list, tuple)):
+        return all(is_plain_value(element) for element in value)
+    return False
+
+
+def is_same_value(value, other_value) -> bool:
+    """Equality of plain values, arrays included"""
+    if isinstance(value, np.ndarray) or isinstance(other_value, np.ndarray):
+        return np.shape(value) == np.shape(other_value) and np.array_equal(value, other_value)
+    if isinstance(value, dict) and isinstance(other_value, dict):
+        return value.keys() == other_value.keys() and all(is_same_value(value[key], other_value[key]) for key in value)
+    if isinstance(value, (list, tuple)) and isinstance(other_value, (list, tuple)):
+        return len(value) == len(other_value) and all(is_same_value(a, b) for a, b in zip(value, other_value))
+    if isinstance(value, (Number, np.generic)) and isinstance(other_value, (Number, np.generic)):
+        return bool(value == other_value)
+    return type(value) is type(other_value) and value == other_value
+
+
+def fingerprint(value):
+    """Hashable fingerprint of a plain value or a dataframe, equal for equal values"""
+    if isinstance(value, pd.DataFrame):
+        return 'DataFrame', fingerprint(list(value.columns)), pd.util.hash_pandas_object(value).values.tobytes()
+    if isinstance(value, np.ndarray):
+        return 'ndarray', value.shape, value.dtype.str, value.tobytes()
+    if isinstance(value, dict):
+        return ('dict',) + tuple(sorted((str(key), fingerprint(element)) for key, element in value.items()))
+    if isinstance(value, (list, tuple)):
+        return ('list',) + tuple(fingerprint(element) for element in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def is_base_implementation(model_class: type, defining_class_name: str, methods_names: tuple) -> bool:
+    """True if none of the methods is overloaded by the model class"""
+    return all(getattr(model_class, method_name).__qualname__ == f'{defining_class_name}.{method_name}'
+               for method_name in methods_names)
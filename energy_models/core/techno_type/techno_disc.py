@@ -14,6 +14,9 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+from __future__ import annotations
+
+from copy import deepcopy
 
 import numpy as np
 import pandas as pd
@@ -23,30 +26,36 @@ from climateeconomics.core.core_resources.resource_mix.resource_mix import (
 from climateeconomics.core.core_witness.climateeco_discipline import (
     ClimateEcoDiscipline,
 )
-from plotly import graph_objects as go
 from sostrades_core.execution_engine.sos_wrapp import SoSWrapp
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
-from sostrades_core.tools.post_processing.plotly_native_charts.instantiated_plotly_native_chart import (
-    InstantiatedPlotlyNativeChart,
-)
 from sostrades_optimization_plugins.models.autodifferentiated_discipline import (
     AutodifferentiedDisc,
 )
 
 from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.jacobian_sparsity import DETECT, SparseJacobianMixin
+from energy_models.core.lazy_charts import (
+    ChartFilter,
+    InstanciatedSeries,
+    InstantiatedPlotlyNativeChart,
+    TwoAxesInstanciatedChart,
+    go,
+)
+from energy_models.core.linearization_cache import LinearizationCacheMixin
+from energy_models.core.steps_timer import StepsTimer
 from energy_models.core.stream_type.resources_data_disc import (
     get_default_resources_CO2_emissions,
     get_default_resources_prices,
 )
+from energy_models.core.techno_type.step_cache import (
+    fingerprint,
+    is_base_implementation,
+)
+from energy_models.core.techno_type.techno_type import TechnoType
 from energy_models.database_witness_energy import DatabaseWitnessEnergy
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
-class TechnoDiscipline(AutodifferentiedDisc):
+class TechnoDiscipline(SparseJacobianMixin, LinearizationCacheMixin, AutodifferentiedDisc):
     # ontology information
     _ontology_data = {
         'label': 'Core Technology Type Model',
@@ -61,6 +70,13 @@ class TechnoDiscipline(AutodifferentiedDisc):
         'version': '',
     }
 
+    # blocks vs the investments are dense (capex learning curve, plants lifetime), the others are mostly diagonal
+    jacobian_sparsity = {input_name: DETECT for input_name in (
+        GlossaryEnergy.StreamPricesValue, GlossaryEnergy.ResourcesPriceValue, GlossaryEnergy.CO2TaxesValue,
+        GlossaryEnergy.MarginValue, GlossaryEnergy.UtilisationRatioValue, GlossaryEnergy.TransportCostValue,
+        GlossaryEnergy.TransportMarginValue, GlossaryEnergy.AllStreamsDemandRatioValue,
+        GlossaryEnergy.RessourcesCO2EmissionsValue, *[f"{ghg}_intensity_by_energy" for ghg in GlossaryEnergy.GreenHouseGases])}
+
     DESC_IN = {
         GlossaryEnergy.YearStart: dict({'structuring': True}, **ClimateEcoDiscipline.YEAR_START_DESC_IN),
         GlossaryEnergy.YearEnd: dict({'structuring': True}, **GlossaryEnergy.YearEndVar),
@@ -137,93 +153,120 @@ class TechnoDiscipline(AutodifferentiedDisc):
 
     techno_name = 'Fill techno name'
     stream_name = 'Fill the energy name for this techno'
+    # inputs the dynamic variables of the techno depend on, see get_dynamic_variables
+    dynamic_variables_structuring_inputs = (
+        GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd, GlossaryEnergy.ResourcesUsedForProductionValue,
+        GlossaryEnergy.EnergiesUsedForProductionValue, GlossaryEnergy.CCSUsedForProductionValue,
+        GlossaryEnergy.BoolApplyStreamRatio, GlossaryEnergy.BoolApplyResourceRatio, GlossaryEnergy.BoolApplyRatio,
+        'techno_is_ccus',
+    )
+
+    def __init__(self, sos_name, logger):
+        super().__init__(sos_name, logger)
+        # charts built, by chart method and arguments : (fingerprint of the variables read, charts)
+        self.charts_cache = {}
+        # (fingerprint of the structuring inputs, dynamic inputs, dynamic outputs) of the last configure
+        self.dynamic_variables_cache = None
 
     def setup_sos_disciplines(self):
-        dynamic_inputs = {}
-        dynamic_outputs = {}
         self.update_default_values()
+        structuring_values = {}
         if self.get_data_in() is not None:
-            if GlossaryEnergy.ResourcesUsedForProductionValue in self.get_data_in() and \
-                GlossaryEnergy.YearStart in self.get_data_in() and \
-                    GlossaryEnergy.YearEnd in self.get_data_in():
-                resources_used_for_production = self.get_sosdisc_inputs(GlossaryEnergy.ResourcesUsedForProductionValue)
-                year_start = self.get_sosdisc_inputs(GlossaryEnergy.YearStart)
-                year_end = self.get_sosdisc_inputs(GlossaryEnergy.YearEnd)
-                if resources_used_for_production is not None and year_start is not None and year_end is not None:
-                    cost_of_resource_usage_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.CostOfResourceUsageDf)
-                    cost_of_resource_usage_var["dataframe_descriptor"].update({resource: ("float", [0., 1e30], False) for resource in resources_used_for_production})
-                    dynamic_outputs[GlossaryEnergy.CostOfResourceUsageValue] = cost_of_resource_usage_var
-
-                    resources_co2_emissions_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.ResourcesCO2Emissions)
-                    resources_co2_emissions_var["dataframe_descriptor"] = {GlossaryEnergy.Years: ("int", [1900, 2100], False)}
-                    resources_co2_emissions_var["dataframe_descriptor"].update({energy: ("float", [0., 1e30], False) for energy in resources_used_for_production})
-
-                    years = np.arange(year_start, year_end + 1)
-                    default_resources = get_default_resources_CO2_emissions(years)
-                    resources_co2_emissions_var["default"] = default_resources
-                    dynamic_inputs.update({GlossaryEnergy.RessourcesCO2EmissionsValue: resources_co2_emissions_var})
-
-                    resources_prices = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.ResourcesPrice)
-                    resources_prices["dataframe_descriptor"] = {GlossaryEnergy.Years: ("int", [1900, 2100], False)}
-                    resources_prices["dataframe_descriptor"].update({energy: ("float", [0., 1e30], False) for energy in resources_used_for_production})
-
-                    years = np.arange(year_start, year_end + 1)
-                    default_resources_prices = get_default_resources_prices(years)
-                    resources_prices["default"] = default_resources_prices
-                    dynamic_inputs.update({GlossaryEnergy.ResourcesPriceValue: resources_prices})
-
-            values_dict, go = self.collect_var_for_dynamic_setup([GlossaryEnergy.EnergiesUsedForProductionValue])
-            if go:
-                energies_used_for_production = values_dict[GlossaryEnergy.EnergiesUsedForProductionValue]
-                cost_of_streams_usage_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.CostOfStreamsUsageDf)
-                cost_of_streams_usage_var["dataframe_descriptor"].update({stream: ("float", [0., 1e30], False) for stream in energies_used_for_production})
-                dynamic_outputs[GlossaryEnergy.CostOfStreamsUsageValue] = cost_of_streams_usage_var
-
-                dynamic_inputs.update({
-                    GlossaryEnergy.StreamPricesValue: GlossaryEnergy.get_stream_prices_df(stream_used_for_production=energies_used_for_production),
-                })
-
-            # ratios inputs:
-            values_dict, go = self.collect_var_for_dynamic_setup([
-                GlossaryEnergy.BoolApplyStreamRatio, GlossaryEnergy.BoolApplyResourceRatio,
-                GlossaryEnergy.BoolApplyRatio, GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd,
-                GlossaryEnergy.CCSUsedForProductionValue, 'techno_is_ccus'
-            ])
-            if go:
-                years = np.arange(values_dict[GlossaryEnergy.YearStart], values_dict[GlossaryEnergy.YearEnd] + 1)
-                if values_dict[GlossaryEnergy.BoolApplyStreamRatio]:
-                    if len(values_dict[GlossaryEnergy.CCSUsedForProductionValue]) > 0:
-                        default_ccs_ratios = pd.DataFrame({
-                            GlossaryEnergy.Years: years, GlossaryEnergy.carbon_captured: 100., GlossaryEnergy.carbon_storage: 100.,
-                        })
-                        ccus_availability_ratios_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.CCUSAvailabilityRatios)
-                        ccus_availability_ratios_var["default"] = default_ccs_ratios
-                        dynamic_inputs[GlossaryEnergy.CCUSAvailabilityRatiosValue] = ccus_availability_ratios_var
-                    if not values_dict['techno_is_ccus']:
-                        # Energy techno
-                        all_streams_demand_ratio_default = pd.DataFrame({GlossaryEnergy.Years: years})
-                        dynamic_inputs[GlossaryEnergy.AllStreamsDemandRatioValue] = {'type': 'dataframe', 'unit': '-',
-                                                                                     'default': all_streams_demand_ratio_default,
-                                                                                     'visibility': SoSWrapp.SHARED_VISIBILITY,
-                                                                                     'namespace': 'ns_energy',
-                                                                                     "dynamic_dataframe_columns": True,
-                                                                                     self.GRADIENTS: True,
-                                                                                     }
+            structuring_values = {name: self.get_sosdisc_inputs(name) for name in self.dynamic_variables_structuring_inputs
+                                  if name in self.get_data_in()}
+        structuring_values_fingerprint = fingerprint(structuring_values)
+        if self.dynamic_variables_cache is None or self.dynamic_variables_cache[0] != structuring_values_fingerprint:
+            self.dynamic_variables_cache = (structuring_values_fingerprint, *self.get_dynamic_variables(structuring_values))
+        _, dynamic_inputs, dynamic_outputs = self.dynamic_variables_cache
+
+        di, do = self.add_additionnal_dynamic_variables()
+        do.update(dynamic_outputs)
+        di.update(dynamic_inputs)
+        self.add_inputs(di)
+        self.add_outputs(do)
+
+    def get_dynamic_variables(self, structuring_values: dict) -> tuple[dict, dict]:
+        """Dynamic inputs and outputs of the techno given the values of its structuring inputs (None if not set)"""
+        dynamic_inputs = {}
+        dynamic_outputs = {}
+        values_dict = {name: structuring_values.get(name) for name in self.dynamic_variables_structuring_inputs}
+
+        if all(values_dict[name] is not None for name in [GlossaryEnergy.ResourcesUsedForProductionValue, GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd]):
+            resources_used_for_production = values_dict[GlossaryEnergy.ResourcesUsedForProductionValue]
+            year_start = values_dict[GlossaryEnergy.YearStart]
+            year_end = values_dict[GlossaryEnergy.YearEnd]
+            cost_of_resource_usage_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.CostOfResourceUsageDf)
+            cost_of_resource_usage_var["dataframe_descriptor"].update({resource: ("float", [0., 1e30], False) for resource in resources_used_for_production})
+            dynamic_outputs[GlossaryEnergy.CostOfResourceUsageValue] = cost_of_resource_usage_var
+
+            resources_co2_emissions_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.ResourcesCO2Emissions)
+            resources_co2_emissions_var["dataframe_descriptor"] = {GlossaryEnergy.Years: ("int", [1900, 2100], False)}
+            resources_co2_emissions_var["dataframe_descriptor"].update({energy: ("float", [0., 1e30], False) for energy in resources_used_for_production})
+
+            years = np.arange(year_start, year_end + 1)
+            default_resources = get_default_resources_CO2_emissions(years)
+            resources_co2_emissions_var["default"] = default_resources
+            dynamic_inputs.update({GlossaryEnergy.RessourcesCO2EmissionsValue: resources_co2_emissions_var})
+
+            resources_prices = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.ResourcesPrice)
+            resources_prices["dataframe_descriptor"] = {GlossaryEnergy.Years: ("int", [1900, 2100], False)}
+            resources_prices["dataframe_descriptor"].update({energy: ("float", [0., 1e30], False) for energy in resources_used_for_production})
+
+            years = np.arange(year_start, year_end + 1)
+            default_resources_prices = get_default_resources_prices(years)
+            resources_prices["default"] = default_resources_prices
+            dynamic_inputs.update({GlossaryEnergy.ResourcesPriceValue: resources_prices})
+
+        if values_dict[GlossaryEnergy.EnergiesUsedForProductionValue] is not None:
+            energies_used_for_production = values_dict[GlossaryEnergy.EnergiesUsedForProductionValue]
+            cost_of_streams_usage_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.CostOfStreamsUsageDf)
+            cost_of_streams_usage_var["dataframe_descriptor"].update({stream: ("float", [0., 1e30], False) for stream in energies_used_for_production})
+            dynamic_outputs[GlossaryEnergy.CostOfStreamsUsageValue] = cost_of_streams_usage_var
+
+            dynamic_inputs.update({
+                GlossaryEnergy.StreamPricesValue: GlossaryEnergy.get_stream_prices_df(stream_used_for_production=energies_used_for_production),
+            })
+
+        # ratios inputs:
+        if all(values_dict[name] is not None for name in [
+            GlossaryEnergy.BoolApplyStreamRatio, GlossaryEnergy.BoolApplyResourceRatio,
+            GlossaryEnergy.BoolApplyRatio, GlossaryEnergy.YearStart, GlossaryEnergy.YearEnd,
+            GlossaryEnergy.CCSUsedForProductionValue, 'techno_is_ccus'
+        ]):
+            years = np.arange(values_dict[GlossaryEnergy.YearStart], values_dict[GlossaryEnergy.YearEnd] + 1)
+            if values_dict[GlossaryEnergy.BoolApplyStreamRatio]:
+                if len(values_dict[GlossaryEnergy.CCSUsedForProductionValue]) > 0:
+                    default_ccs_ratios = pd.DataFrame({
+                        GlossaryEnergy.Years: years, GlossaryEnergy.carbon_captured: 100., GlossaryEnergy.carbon_storage: 100.,
+                    })
+                    ccus_availability_ratios_var = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.CCUSAvailabilityRatios)
+                    ccus_availability_ratios_var["default"] = default_ccs_ratios
+                    dynamic_inputs[GlossaryEnergy.CCUSAvailabilityRatiosValue] = ccus_availability_ratios_var
+                if not values_dict['techno_is_ccus']:
+                    # Energy techno
+                    all_streams_demand_ratio_default = pd.DataFrame({GlossaryEnergy.Years: years})
+                    dynamic_inputs[GlossaryEnergy.AllStreamsDemandRatioValue] = {'type': 'dataframe', 'unit': '-',
+                                                                                 'default': all_streams_demand_ratio_default,
+                                                                                 'visibility': SoSWrapp.SHARED_VISIBILITY,
+                                                                                 'namespace': 'ns_energy',
+                                                                                 "dynamic_dataframe_columns": True,
+                                                                                 self.GRADIENTS: True,
+                                                                                 }
                     
-                    else:
-                        # CCUS techno
-                        variable = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.EnergyMarketRatioAvailabilities)
-                        variable["default"]  = pd.DataFrame({GlossaryEnergy.Years: years})
-                        dynamic_inputs[GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue] = variable
-                if values_dict[GlossaryEnergy.BoolApplyResourceRatio]:
-                    resource_ratio_dict = dict(zip(EnergyMix.resource_list, np.ones(len(years)) * 100.0))
-                    resource_ratio_dict[GlossaryEnergy.Years] = years
-                    all_resource_ratio_usable_demand_default = pd.DataFrame(resource_ratio_dict)
-                    dynamic_inputs[ResourceMixModel.RATIO_USABLE_DEMAND] = {'type': 'dataframe', 'unit': '-',
-                                                                            'default': all_resource_ratio_usable_demand_default,
-                                                                            'visibility': SoSWrapp.SHARED_VISIBILITY,
-                                                                            'namespace': 'ns_resource',
-                                                                            "dynamic_dataframe_columns": True}
+                else:
+                    # CCUS techno
+                    variable = GlossaryEnergy.get_dynamic_variable(GlossaryEnergy.EnergyMarketRatioAvailabilities)
+                    variable["default"]  = pd.DataFrame({GlossaryEnergy.Years: years})
+                    dynamic_inputs[GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue] = variable
+            if values_dict[GlossaryEnergy.BoolApplyResourceRatio]:
+                resource_ratio_dict = dict(zip(EnergyMix.resource_list, np.ones(len(years)) * 100.0))
+                resource_ratio_dict[GlossaryEnergy.Years] = years
+                all_resource_ratio_usable_demand_default = pd.DataFrame(resource_ratio_dict)
+                dynamic_inputs[ResourceMixModel.RATIO_USABLE_DEMAND] = {'type': 'dataframe', 'unit': '-',
+                                                                        'default': all_resource_ratio_usable_demand_default,
+                                                                        'visibility': SoSWrapp.SHARED_VISIBILITY,
+                                                                        'namespace': 'ns_resource',
+                                                                        "dynamic_dataframe_columns": True}
 
         dynamic_outputs.update({
             GlossaryEnergy.TechnoPricesValue: GlossaryEnergy.get_techno_price_df(techno_name=self.techno_name),
@@ -233,11 +276,7 @@ class TechnoDiscipline(AutodifferentiedDisc):
             f"{self.stream_name}.{self.techno_name}.{GlossaryEnergy.TechnoFlueGasProductionValue}": GlossaryEnergy.TechnoFlueGasProduction,
         GlossaryEnergy.TechnoDetailedPricesValue: GlossaryEnergy.get_techno_detailed_price_df(techno_name=self.techno_name),
         })
-        di, do = self.add_additionnal_dynamic_variables()
-        do.update(dynamic_outputs)
-        di.update(dynamic_inputs)
-        self.add_inputs(di)
-        self.add_outputs(do)
+        return dynamic_inputs, dynamic_outputs
 
     def add_additionnal_dynamic_variables(self):
         """Temporary method to be able to do multiple add_outputs in setup_sos_disciplines before it is done generically in sostradescore"""
@@ -341,6 +380,8 @@ class TechnoDiscipline(AutodifferentiedDisc):
 
         if self.get_sosdisc_inputs(GlossaryEnergy.BoolApplyRatio):
             chart_list.extend(['Applied Ratio'])
+        if StepsTimer.get_model_timer(getattr(self, 'model', None)) is not None:
+            chart_list.append('Compute steps timings')
         chart_filters.append(ChartFilter(
             'Charts', chart_list, chart_list, 'charts'))
 
@@ -357,9 +398,6 @@ class TechnoDiscipline(AutodifferentiedDisc):
         instanciated_charts = []
         charts = []
         price_unit_list = ['$/MWh', '$/t']
-        inputs_dict = self.get_sosdisc_inputs()
-        data_fuel_dict = inputs_dict['data_fuel_dict']
-        technos_info_dict = inputs_dict['techno_infos_dict']
         # Overload default value with chart filter
         if filters is not None:
             for chart_filter in filters:
@@ -368,72 +406,99 @@ class TechnoDiscipline(AutodifferentiedDisc):
                 if chart_filter.filter_key == 'price_unit':
                     price_unit_list = chart_filter.selected_values
 
-        if 'Detailed prices' in charts and '$/MWh' in price_unit_list:
-            new_chart = self.get_chart_detailed_price_in_dollar_kwh()
-            instanciated_charts.append(new_chart)
-
-        if 'Detailed prices' in charts \
-                and '$/t' in price_unit_list \
-                and 'calorific_value' in data_fuel_dict:
-            new_chart = self.get_chart_detailed_price_in_dollar_kg()
-            instanciated_charts.append(new_chart)
-
-        if "Production":
-            new_chart = self.get_chart_production()
-            instanciated_charts.append(new_chart)
-
-        if "Production":
-            new_chart = self.get_chart_production_capacity()
-            instanciated_charts.append(new_chart)
+        for chart_method_name, args, variables_names in self.get_charts_descriptors(charts, price_unit_list):
+            instanciated_charts.extend(self.get_cached_charts(chart_method_name, args, variables_names))
 
-        if "Energy consumption":
-            instanciated_charts.extend(self.get_chart_energy_consumption())
+        steps_timer = StepsTimer.get_model_timer(getattr(self, 'model', None))
+        if 'Compute steps timings' in charts and steps_timer is not None:
+            instanciated_charts.append(steps_timer.get_chart())
 
-        if "Energy demand":
-            instanciated_charts.extend(self.get_chart_energy_demand())
+        return instanciated_charts
 
+    def get_charts_descriptors(self, charts: list, price_unit_list: list) -> list[tuple]:
+        """
+        Charts selected, without building them : (name of the method building the chart(s), its arguments,
+        names of the inputs and outputs it reads or None if the chart must be rebuilt at each call)
+        """
+        descriptors = []
+        prices = GlossaryEnergy.TechnoDetailedPricesValue
+        if 'Detailed prices' in charts and '$/MWh' in price_unit_list:
+            descriptors.append(('get_chart_detailed_price_in_dollar_kwh', (), (prices, 'percentage_resource')))
+        if 'Detailed prices' in charts and '$/t' in price_unit_list \
+                and 'calorific_value' in self.get_sosdisc_inputs('data_fuel_dict'):
+            descriptors.append(('get_chart_detailed_price_in_dollar_kg', (), (prices, 'data_fuel_dict', 'percentage_resource')))
+        if 'Production' in charts:
+            descriptors.append(('get_chart_production', (), ('techno_production_infos', GlossaryEnergy.TechnoProductionValue)))
+            descriptors.append(('get_chart_production_capacity', (), ('techno_production_infos',)))
+        if 'Energy consumption' in charts:
+            descriptors.append(('get_chart_energy_consumption', (), (GlossaryEnergy.TechnoEnergyConsumptionValue,)))
+        if 'Energy demand' in charts:
+            descriptors.append(('get_chart_energy_demand', (), (GlossaryEnergy.TechnoEnergyDemandsValue,)))
         if 'Applied Ratio' in charts:
-            new_chart = self.get_chart_applied_ratio()
-            instanciated_charts.append(new_chart)
-
+            # the limiting ratios depend on the columns of many inputs
+            descriptors.append(('get_chart_applied_ratio', (), None))
         if GlossaryEnergy.UtilisationRatioValue in charts:
-            new_chart = self.get_utilisation_ratio_chart()
-            instanciated_charts.append(new_chart)
-
+            descriptors.append(('get_utilisation_ratio_chart', (), (GlossaryEnergy.UtilisationRatioValue,)))
         if 'Initial Production' in charts:
-            new_chart = self.get_chart_initial_production()
-            instanciated_charts.append(new_chart)
-
+            descriptors.append(('get_chart_initial_production', (), (GlossaryEnergy.YearStart, GlossaryEnergy.InitialPlantsTechnoProductionValue,
+                                                                     GlossaryEnergy.TechnoTargetProductionValue)))
         if 'Factory Mean Age' in charts:
-            new_chart = self.get_chart_factory_mean_age()
-            instanciated_charts.append(new_chart)
-
+            descriptors.append(('get_chart_factory_mean_age', (), ('mean_age_production',)))
         for ghg in GlossaryEnergy.GreenHouseGases:
             if f'{ghg} intensity' in charts:
-                instanciated_charts.extend(self.get_chart_ghg_intensity_kwh(ghg))
-
+                descriptors.append(('get_chart_ghg_intensity_kwh', (ghg,), ('ghg_intensity_scope_1', 'ghg_intensity_scope_2',
+                                                                           f'ghg_intensity_scope_2_details_{ghg}')))
             if f'{ghg} emissions' in charts:
-                instanciated_charts.extend(self.get_chart_ghg_emissions(ghg))
-
+                descriptors.append(('get_chart_ghg_emissions', (ghg,), (GlossaryEnergy.TechnoScope1GHGEmissionsValue, 'techno_scope_2_ghg_emissions',
+                                                                       f"{self.stream_name}.{self.techno_name}.{GlossaryEnergy.TechnoFlueGasProductionValue}")))
         if 'Non-Use Capital' in charts:
-            new_chart = self.get_chart_non_use_capital()
-            instanciated_charts.append(new_chart)
+            descriptors.append(('get_chart_non_use_capital', (), (GlossaryEnergy.TechnoCapitalValue,)))
         if 'Installed capacity' in charts:
-            new_chart = self.get_chart_installed_capacity(technos_info_dict)
-            instanciated_charts.append(new_chart)
+            descriptors.append(('get_chart_installed_capacity', (self.get_sosdisc_inputs('techno_infos_dict'),), (GlossaryEnergy.InstalledCapacity,)))
         if 'Power plants initial age distribution' in charts:
-            new_chart = self.get_chart_initial_age_distrib()
-            instanciated_charts.append(new_chart)
-
+            descriptors.append(('get_chart_initial_age_distrib', (), ('initial_age_distrib',)))
         if 'Capex' in charts:
-            new_chart = self.get_chart_capex()
-            instanciated_charts.append(new_chart)
-
-        if "Investments" in charts:
-            new_chart = self.get_chart_investments()
-            instanciated_charts.append(new_chart)
-
-        return instanciated_charts
+            descriptors.append(('get_chart_capex', (), (prices,)))
+        if 'Investments' in charts:
+            descriptors.append(('get_chart_investments', (), (GlossaryEnergy.InvestLevelValue, GlossaryEnergy.InvestmentBeforeYearStartValue)))
+        return descriptors
+
+    def get_charts_variables_fingerprint(self, variables_names: tuple):
+        """Fingerprint of the values of the variables, None if they can not be fingerprinted"""
+        data_in, data_out = self.get_data_in(), self.get_data_out()
+        values = [self.get_sosdisc_outputs(name) if name in data_out else self.get_sosdisc_inputs(name) if name in data_in else None
+                  for name in variables_names]
+        try:
+            variables_fingerprint = fingerprint(values)
+            hash(variables_fingerprint)
+        except TypeError:
+            return None
+        return variables_fingerprint
+
+    def get_cached_charts(self, chart_method_name: str, args: tuple, variables_names: tuple | None) -> list:
+        """
+        Charts built by the method, reused while the variables it reads are unchanged.
+        Charts of methods overloaded by the discipline are always rebuilt, the overload may read other variables.
+        The cached charts are copies, the charts returned can be modified by the post-processing.
+        """
+        key, variables_fingerprint = None, None
+        if variables_names is not None and is_base_implementation(type(self), 'TechnoDiscipline', (chart_method_name,)):
+            variables_fingerprint = self.get_charts_variables_fingerprint(variables_names)
+            key = (chart_method_name, fingerprint(list(args)))
+            try:
+                hash(key)
+            except TypeError:
+                key = None
+        if key is not None and variables_fingerprint is not None and key in self.charts_cache:
+            cached_fingerprint, cached_charts = self.charts_cache[key]
+            if cached_fingerprint == variables_fingerprint:
+                return deepcopy(cached_charts)
+
+        new_charts = getattr(self, chart_method_name)(*args)
+        new_charts = [chart for chart in (new_charts if isinstance(new_charts, list) else [new_charts]) if chart is not None]
+        if key is not None and variables_fingerprint is not None:
+            self.charts_cache[key] = (variables_fingerprint, deepcopy(new_charts))
+        return new_charts
 
     def get_utilisation_ratio_chart(self):
         utilisation_ratio_df = self.get_sosdisc_inputs(GlossaryEnergy.UtilisationRatioValue)
@@ -622,16 +687,30 @@ class TechnoDiscipline(AutodifferentiedDisc):
 
         return new_chart
 
+    def get_limiting_ratios_names(self):
+        """Ratios considered by the model to compute the applied ratio, see TechnoType.compute_limiting_ratio"""
+        inputs_dict = self.get_sosdisc_inputs()
+        ratios_name_list = TechnoType.select_limiting_ratios(
+            apply_ratio=inputs_dict[GlossaryEnergy.BoolApplyRatio],
+            apply_resource_ratio=inputs_dict[GlossaryEnergy.BoolApplyResourceRatio],
+            apply_stream_ratio=inputs_dict[GlossaryEnergy.BoolApplyStreamRatio],
+            techno_is_ccus=inputs_dict['techno_is_ccus'],
+            resources_used=list(inputs_dict[GlossaryEnergy.ResourcesUsedForProductionValue]) + list(inputs_dict[GlossaryEnergy.ResourcesUsedForBuildingValue]),
+            energies_used=inputs_dict[GlossaryEnergy.EnergiesUsedForProductionValue])
+        return [ratio_name for ratio_name in ratios_name_list
+                if ratio_name.split(':')[0] in inputs_dict and ratio_name.split(':')[1] in inputs_dict[ratio_name.split(':')[0]]]
+
     def get_chart_applied_ratio(self):
         # Charts for consumption and prod
         applied_ratio = self.get_sosdisc_outputs('applied_ratio')
+        limiting_input = TechnoType.get_limiting_input_names(self.get_limiting_ratios_names(), applied_ratio['limiting_input_index'])
         chart_name = f'Ratio applied on {self.techno_name} technology energy Production'
         fig = go.Figure()
         fig.add_trace(go.Bar(x=list(applied_ratio[GlossaryEnergy.Years]),
                              y=list(applied_ratio['applied_ratio']),
                              marker=dict(color=list(applied_ratio['applied_ratio']),
                                          colorscale='Emrld'),
-                             hovertext=list(applied_ratio['limiting_input'])))
+                             hovertext=limiting_input))
         new_chart = InstantiatedPlotlyNativeChart(
             fig, chart_name=chart_name, default_title=True)
         new_chart.post_processing_section_name = "Ratios"
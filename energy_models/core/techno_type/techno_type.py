@@ -19,10 +19,19 @@ from __future__ import annotations
 import math as m
 from abc import abstractmethod
 
+import numpy as np
 from sostrades_optimization_plugins.models.differentiable_model import (
     DifferentiableModel,
 )
 
+from energy_models.core.steps_timer import StepsTimer
+from energy_models.core.techno_type.lifetime_operators import (
+    lifetime_window_age_sum,
+    lifetime_window_sum,
+    mean_age_of_initial_plants,
+    pad_to_years,
+    remaining_share_of_initial_plants,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 
 
@@ -37,7 +46,21 @@ class TechnoType(DifferentiableModel):
         super().__init__(sosname=name)
         self.years = None
         self.ratios_name_list = []
+        # (inputs the limiting ratios are selected from, ratios selected), see configure_limiting_ratios
+        self.limiting_ratios_cache = None
         self.name = name
+        # names of the outputs columns used on the hot path, formatted once per techno
+        self.price_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:{name}'
+        self.price_wotaxes_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:{name}_wotaxes'
+        self.capex_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{name}'
+        self.factory_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:{name}_factory'
+        self.amort_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:{name}_amort'
+        self.factory_amort_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:{name}_factory_amort'
+        self.factory_decommissioning_column = f'{GlossaryEnergy.TechnoDetailedPricesValue}:{name}_factory_decommissioning'
+        self.target_production_column = f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'
+        self.production_column = f'{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}'
+        # opt-in timing of the compute steps
+        self.steps_timer = StepsTimer(self) if StepsTimer.enabled else None
 
 
     def configure_parameters_update(self):
@@ -49,6 +72,7 @@ class TechnoType(DifferentiableModel):
         self.years = self.np.arange(self.year_start, self.year_end + 1)
 
         self.configure_energy_data()
+
     @property
     def zeros_array(self):
         return self.years * 0.
@@ -61,7 +85,13 @@ class TechnoType(DifferentiableModel):
         pass
 
     def compute(self):
-        """Main method"""
+        """
+        Main method
+
+        Time dependant inputs (investments, utilisation ratio, CO2 taxes, stream prices...) can be given with
+        leading scenario axes, for instance with shape [n_scenarios, n_years] : years are always the last axis and
+        all the outputs are then computed for all the scenarios at once, with the same leading axes.
+        """
         self.configure_parameters_update()
 
         self.compute_initial_age_distribution()
@@ -96,7 +126,7 @@ class TechnoType(DifferentiableModel):
         for resource in self.inputs[GlossaryEnergy.ResourcesUsedForProductionValue]:
             self.outputs[f'{GlossaryEnergy.TechnoResourceDemandsValue}:{resource} ({GlossaryEnergy.mass_unit})'] =\
                 self.outputs[f"{GlossaryEnergy.TechnoDetailedPricesValue}:{resource}_needs"] * \
-                self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+                self.outputs[self.target_production_column]
 
     def compute_energies_demand(self):
         """
@@ -108,7 +138,7 @@ class TechnoType(DifferentiableModel):
         for energy in self.inputs[GlossaryEnergy.EnergiesUsedForProductionValue]:
             self.outputs[f'{GlossaryEnergy.TechnoEnergyDemandsValue}:{energy}'] = \
                 self.outputs[f"{GlossaryEnergy.TechnoDetailedPricesValue}:{energy}_needs"] * \
-                self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+                self.outputs[self.target_production_column]
 
     def compute_byproducts_production(self):
         """
@@ -116,81 +146,103 @@ class TechnoType(DifferentiableModel):
         """
         pass
 
-    def compute_limiting_ratio(self):
+    @staticmethod
+    def select_limiting_ratios(apply_ratio: bool, apply_resource_ratio: bool, apply_stream_ratio: bool, techno_is_ccus: bool,
+                               resources_used: list[str], energies_used: list[str]) -> list[str]:
         """
-        Select the ratios that are meaningfull to consider to modulate the techno production (and therefore consumptions).
-        Finally computes the most constraining ratio (pseudo-minimium of all ratios)
+        Names ('dataframe:column') of the ratios that are meaningfull to consider to modulate the techno production
+        (and therefore consumptions), whether current techno is for Energy Mix or CCUS
         """
-        self.ratios_name_list = []
-        
-        # resources
-        if self.inputs[GlossaryEnergy.BoolApplyRatio] and self.inputs[GlossaryEnergy.BoolApplyResourceRatio]:
-            self.ratios_name_list.extend([f'all_resource_ratio_usable_demand:{resource}' for resource in self.inputs[GlossaryEnergy.ResourcesUsedForProductionValue]])
-            self.ratios_name_list.extend([f'all_resource_ratio_usable_demand:{resource}' for resource in self.inputs[GlossaryEnergy.ResourcesUsedForBuildingValue]])
-        
-        # energies (whether current techno is for Energy Mix or CCUS)
-        if self.inputs[GlossaryEnergy.BoolApplyRatio] and self.inputs[GlossaryEnergy.BoolApplyStreamRatio]:
-            if not self.inputs['techno_is_ccus']:
-                self.ratios_name_list.extend([f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{stream}' for stream in self.inputs[GlossaryEnergy.EnergiesUsedForProductionValue]])
+        ratios_name_list = []
+        if apply_ratio and apply_resource_ratio:
+            ratios_name_list.extend([f'all_resource_ratio_usable_demand:{resource}' for resource in resources_used])
+
+        if apply_ratio and apply_stream_ratio:
+            if not techno_is_ccus:
+                ratios_name_list.extend([f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{stream}' for stream in energies_used
+                                         if stream != GlossaryEnergy.biomass_dry])
             else:
-                self.ratios_name_list.extend([f'{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{stream}' for stream in self.inputs[GlossaryEnergy.EnergiesUsedForProductionValue]])
-                self.ratios_name_list.extend([f'{GlossaryEnergy.CCUSAvailabilityRatiosValue}:ratio'])
-
-
-        if f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{GlossaryEnergy.biomass_dry}' in self.ratios_name_list:
-            self.ratios_name_list.remove(f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{GlossaryEnergy.biomass_dry}')
-
-        ratio_values = self.np.ones(len(self.years))
-        limiting_input = self.np.array([''] * len(self.years))
-        valid_cols = list(filter(lambda col: col in self.inputs, self.ratios_name_list))
-        if len(valid_cols) == 1:
-            limiting_input = valid_cols[0]
-            limiting_input_name = valid_cols[0].split(':')[1]
-            ratio_values = self.inputs[limiting_input] / 100.
-            limiting_input = self.np.array([limiting_input_name] * len(self.years))
-        elif len(valid_cols) > 1:
-            ratios_array = self.np.vstack([self.inputs[col] for col in valid_cols]).T / 100.
+                ratios_name_list.extend([f'{GlossaryEnergy.EnergyMarketRatioAvailabilitiesValue}:{stream}' for stream in energies_used])
+                ratios_name_list.append(f'{GlossaryEnergy.CCUSAvailabilityRatiosValue}:ratio')
+        return ratios_name_list
+
+    def configure_limiting_ratios(self):
+        """
+        Ratios to consider, selected again only when the inputs they are selected from change. The ratios missing
+        from the inputs are filtered out by compute_limiting_ratio
+        """
+        resources_used = list(self.inputs[GlossaryEnergy.ResourcesUsedForProductionValue]) + list(self.inputs[GlossaryEnergy.ResourcesUsedForBuildingValue])
+        structuring_values = (self.inputs[GlossaryEnergy.BoolApplyRatio], self.inputs[GlossaryEnergy.BoolApplyResourceRatio],
+                              self.inputs[GlossaryEnergy.BoolApplyStreamRatio], self.inputs['techno_is_ccus'],
+                              tuple(resources_used), tuple(self.inputs[GlossaryEnergy.EnergiesUsedForProductionValue]))
+        if self.limiting_ratios_cache is None or self.limiting_ratios_cache[0] != structuring_values:
+            self.limiting_ratios_cache = (structuring_values, self.select_limiting_ratios(*structuring_values))
+        return self.limiting_ratios_cache[1]
+
+    def compute_limiting_ratio(self):
+        """
+        Computes the most constraining ratio (pseudo-minimium of all ratios).
+
+        The ratios are stacked in a single matrix [..., n_years, n_ratios] for the smooth minimum, and the limiting
+        input is given by its index in self.ratios_name_list (-1 if no ratio applies), see get_limiting_input_names
+        """
+        self.ratios_name_list = [ratio_name for ratio_name in self.configure_limiting_ratios() if ratio_name in self.inputs]
+
+        # shape of the target production : [..., n_years], with the leading scenario axes of the inputs if any
+        shape = self.np.shape(self.outputs[self.target_production_column])
+        ratio_values = self.np.ones(shape)
+        limiting_input_index = -np.ones(shape, dtype=int)
+        if len(self.ratios_name_list) == 1:
+            ratio_values = self.inputs[self.ratios_name_list[0]] / 100. + self.np.zeros(shape)
+            limiting_input_index = np.zeros(np.shape(ratio_values), dtype=int)
+        elif len(self.ratios_name_list) > 1:
+            ratios_array = self.np.stack([self.inputs[ratio_name] for ratio_name in self.ratios_name_list], axis=-1) / 100.
+            n_ratios = len(self.ratios_name_list)
             if self.inputs['smooth_type'] == 'cons_smooth_max':
-                ratio_values = - self.cons_smooth_maximum_vect(-ratios_array)
+                ratio_values = - self.cons_smooth_maximum_vect(-ratios_array.reshape(-1, n_ratios)).reshape(ratios_array.shape[:-1])
             else:
                 raise NotImplementedError("frge")
-            limiting_input = self.np.array(
-                [self.ratios_name_list[index].split(':')[1] for index in self.np.argmin(ratios_array, axis=1)])
+            limiting_input_index = np.broadcast_to(self.np.argmin(ratios_array, axis=-1), np.broadcast_shapes(shape, ratios_array.shape[:-1]))
 
         applied_ratio = ratio_values * 100.
         self.outputs[f'applied_ratio:{GlossaryEnergy.Years}'] = self.years
-        self.outputs['applied_ratio:limiting_input'] = limiting_input
+        self.outputs['applied_ratio:limiting_input_index'] = limiting_input_index
         self.outputs['applied_ratio:applied_ratio'] = applied_ratio
 
+    @staticmethod
+    def get_limiting_input_names(ratios_name_list: list[str], limiting_input_index) -> list[str]:
+        """Name of the limiting input for each year, from the index given by compute_limiting_ratio"""
+        inputs_names = [ratio_name.split(':')[1] for ratio_name in ratios_name_list] + ['']
+        return [inputs_names[index] for index in limiting_input_index]
+
+    # dataframes limited by the applied ratio : {limited dataframe: dataframe before limitation}
+    limited_dataframes = {
+        GlossaryEnergy.TechnoProductionValue: GlossaryEnergy.TechnoTargetProductionValue,
+        GlossaryEnergy.TechnoEnergyConsumptionValue: GlossaryEnergy.TechnoEnergyDemandsValue,
+        GlossaryEnergy.TechnoResourceConsumptionValue: GlossaryEnergy.TechnoResourceDemandsValue,
+        GlossaryEnergy.TechnoCCSConsumptionValue: GlossaryEnergy.TechnoCCSDemandsValue,
+    }
 
     def apply_limiting_ratio(self):
-        """! Select the most constraining ratio and apply it to production and consumption.
+        """! Apply the most constraining ratio to production and consumption.
         To avoid clipping effects, the applied ratio is not the minimum valu/e between all the ratios,
         but the smoothed minimum value between all the ratio (see func_manager documentation for more).
-        A model variables is set in this method:
-            -self.applied_ratio: the effective ratio applied for each year
-        The method "select_ratios" must have been called beforehand to have the self.ratio_df variable
+        The method "compute_limiting_ratio" must have been called beforehand.
+
+        Target production and all the demands are stacked in one matrix to apply the ratio at once, columns that do not
+        depend on the years or on the scenarios (constant by-products...) are broadcast to the shape of the ratio.
         """
         ratio_values = self.outputs['applied_ratio:applied_ratio'] / 100.
-        self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{GlossaryEnergy.Years}'] = self.years
-        # limit target production with ratio :
-        for col in self.get_colnames_output_dataframe(GlossaryEnergy.TechnoTargetProductionValue, expect_years=True):
-            self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{col}'] = self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{col}'] * ratio_values
-
-        # limit energy & resource consumption with ratio :
-        self.outputs[f'{GlossaryEnergy.TechnoEnergyConsumptionValue}:{GlossaryEnergy.Years}'] = self.years
-        for col in self.get_colnames_output_dataframe(GlossaryEnergy.TechnoEnergyDemandsValue, expect_years=True):
-            self.outputs[f'{GlossaryEnergy.TechnoEnergyConsumptionValue}:{col}'] = self.outputs[f'{GlossaryEnergy.TechnoEnergyDemandsValue}:{col}'] * ratio_values
-
-        self.outputs[f'{GlossaryEnergy.TechnoResourceConsumptionValue}:{GlossaryEnergy.Years}'] = self.years
-        for col in self.get_colnames_output_dataframe(GlossaryEnergy.TechnoResourceDemandsValue, expect_years=True):
-            self.outputs[f'{GlossaryEnergy.TechnoResourceConsumptionValue}:{col}'] = self.outputs[f'{GlossaryEnergy.TechnoResourceDemandsValue}:{col}'] * ratio_values
-
-        self.outputs[f'{GlossaryEnergy.TechnoCCSConsumptionValue}:{GlossaryEnergy.Years}'] = self.years
-        for col in self.get_colnames_output_dataframe(GlossaryEnergy.TechnoCCSDemandsValue, expect_years=True):
-            self.outputs[f'{GlossaryEnergy.TechnoCCSConsumptionValue}:{col}'] = self.outputs[f'{GlossaryEnergy.TechnoCCSDemandsValue}:{col}'] * ratio_values
-
+        limited_columns = []
+        for limited_df_name, df_name in self.limited_dataframes.items():
+            self.outputs[f'{limited_df_name}:{GlossaryEnergy.Years}'] = self.years
+            limited_columns.extend([(f'{limited_df_name}:{col}', f'{df_name}:{col}')
+                                    for col in self.get_colnames_output_dataframe(df_name, expect_years=True)])
 
+        shape = np.broadcast_shapes(self.np.shape(ratio_values), *[self.np.shape(self.outputs[column]) for _, column in limited_columns])
+        limited_values = self.np.stack([self.outputs[column] + self.np.zeros(shape) for _, column in limited_columns]) * ratio_values
+        for (limited_column, _), values in zip(limited_columns, limited_values):
+            self.outputs[limited_column] = values
 
     def compute_capital(self):
         '''
@@ -207,8 +259,8 @@ class TechnoType(DifferentiableModel):
         '''
         self.outputs[f'{GlossaryEnergy.TechnoCapitalValue}:{GlossaryEnergy.Years}'] = self.years
         self.outputs[f'{GlossaryEnergy.TechnoCapitalValue}:{GlossaryEnergy.Capital}'] = \
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] * \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] / 1e3
+            self.outputs[self.capex_column] * \
+            self.outputs[self.target_production_column] / 1e3
 
         self.outputs[f'{GlossaryEnergy.TechnoCapitalValue}:{GlossaryEnergy.NonUseCapital}'] = self.outputs[f'{GlossaryEnergy.TechnoCapitalValue}:{GlossaryEnergy.Capital}'] * (
                 1.0 - self.outputs['applied_ratio:applied_ratio'] / 100. * self.inputs[f'{GlossaryEnergy.UtilisationRatioValue}:{GlossaryEnergy.UtilisationRatioValue}'] / 100.)
@@ -219,79 +271,74 @@ class TechnoType(DifferentiableModel):
         """
         self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.Years}'] = self.years
 
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] = self.compute_capex() # $ / MWh (or $/tCO2)
+        self.outputs[self.capex_column] = self.compute_capex() # $ / MWh (or $/tCO2)
 
         capital_recovery_factor = self.compute_capital_recovery_factor()
         self.compute_other_primary_energy_costs()
 
         # Factory cost including CAPEX OPEX
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] * \
+        self.outputs[self.factory_column] = self.outputs[self.capex_column] * \
                                                     (capital_recovery_factor + self.inputs['techno_infos_dict']['Opex_percentage'])
 
         if 'decommissioning_percentage' in self.inputs['techno_infos_dict']:
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory_decommissioning'] = \
-                self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] * self.inputs['techno_infos_dict']['decommissioning_percentage']
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory'] +\
-                                                                                              self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory_decommissioning']
+            self.outputs[self.factory_decommissioning_column] = \
+                self.outputs[self.capex_column] * self.inputs['techno_infos_dict']['decommissioning_percentage']
+            self.outputs[self.factory_column] = self.outputs[self.factory_column] +\
+                                                                                              self.outputs[self.factory_decommissioning_column]
 
         # Compute and add transport
         self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:transport'] = self.compute_transport()
 
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory'] + self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:transport'] + \
+        self.outputs[self.price_column] = self.outputs[self.factory_column] + self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:transport'] + \
                                        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:energy_and_resources_costs']
 
 
-        price_with_margin = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] * self.inputs[f'{GlossaryEnergy.MarginValue}:{GlossaryEnergy.MarginValue}'] / 100.0
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.MarginValue}'] = price_with_margin - self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}']
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] = price_with_margin
+        price_with_margin = self.outputs[self.price_column] * self.inputs[f'{GlossaryEnergy.MarginValue}:{GlossaryEnergy.MarginValue}'] / 100.0
+        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.MarginValue}'] = price_with_margin - self.outputs[self.price_column]
+        self.outputs[self.price_column] = price_with_margin
 
         self.compute_co2_tax()
 
         if 'nb_years_amort_capex' in self.inputs['techno_infos_dict']:
             nb_years_amort_capex = self.inputs['techno_infos_dict']['nb_years_amort_capex']
 
-            # pylint: disable=no-member
-            len_y = max(self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.Years}']) + \
-                    1 - min(self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.Years}'])
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory_amort'] = (
-                    self.np.tril(self.np.triu(self.np.ones((len_y, len_y)), k=0), k=nb_years_amort_capex - 1).transpose() *
-                    self.np.array(self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory'] / nb_years_amort_capex)).T.sum(
-                axis=0)
-            # pylint: enable=no-member
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_amort'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_factory_amort'] + \
+            self.outputs[self.factory_amort_column] = lifetime_window_sum(
+                self.outputs[self.factory_column] / nb_years_amort_capex,
+                nb_years_amort_capex, xp=self.np)
+            self.outputs[self.amort_column] = self.outputs[self.factory_amort_column] + \
                                                       self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:transport'] + \
                                                       self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:energy_and_resources_costs']
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_amort'] = \
-                self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_amort'] * \
+            self.outputs[self.amort_column] = \
+                self.outputs[self.amort_column] * \
                 self.inputs[f'{GlossaryEnergy.MarginValue}:{GlossaryEnergy.MarginValue}'] / 100.0
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_amort'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_amort'] + \
+            self.outputs[self.amort_column] = self.outputs[self.amort_column] + \
                                                                                             self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CO2_taxes_factory']
 
         # Add transport and CO2 taxes
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] + \
+        self.outputs[self.price_column] = self.outputs[self.price_column] + \
                                                                                   self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CO2_taxes_factory']
 
         if 'CO2_taxes_factory' in self.get_colnames_output_dataframe(GlossaryEnergy.TechnoDetailedPricesValue):
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_wotaxes'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] - \
+            self.outputs[self.price_wotaxes_column] = self.outputs[self.price_column] - \
                                                         self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CO2_taxes_factory']
         else:
-            self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_wotaxes'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}']
+            self.outputs[self.price_wotaxes_column] = self.outputs[self.price_column]
 
         # CAPEX in ($/MWh)
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CAPEX_Part'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] * capital_recovery_factor
+        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CAPEX_Part'] = self.outputs[self.capex_column] * capital_recovery_factor
 
         # Running OPEX in ($/MWh)
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:OPEX_Part'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] * \
+        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:OPEX_Part'] = self.outputs[self.capex_column] * \
                                          (self.inputs['techno_infos_dict']['Opex_percentage']) + \
                                          self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:transport'] + self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:energy_and_resources_costs']
         # CO2 Tax in ($/MWh)
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CO2Tax_Part'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] - \
-                                           self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_wotaxes']
+        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:CO2Tax_Part'] = self.outputs[self.price_column] - \
+                                           self.outputs[self.price_wotaxes_column]
 
         # only coupling columns :
         self.outputs[f'{GlossaryEnergy.TechnoPricesValue}:{GlossaryEnergy.Years}'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.Years}']
-        self.outputs[f'{GlossaryEnergy.TechnoPricesValue}:{self.name}'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}']
-        self.outputs[f'{GlossaryEnergy.TechnoPricesValue}:{self.name}_wotaxes'] = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_wotaxes']
+        self.outputs[f'{GlossaryEnergy.TechnoPricesValue}:{self.name}'] = self.outputs[self.price_column]
+        self.outputs[f'{GlossaryEnergy.TechnoPricesValue}:{self.name}_wotaxes'] = self.outputs[self.price_wotaxes_column]
 
 
     def compute_cost_of_resources_usage(self):
@@ -344,59 +391,63 @@ class TechnoType(DifferentiableModel):
 
         unit : $ / MWh or ($/tCO2 for CCUS technos)
         """
-        invests = self.inputs[f'{GlossaryEnergy.InvestLevelValue}:{GlossaryEnergy.InvestValue}'] * 1e3  # G$ to M$
-        self.inputs['techno_infos_dict'] = self.inputs['techno_infos_dict']
-        expo_factor = self.compute_expo_factor()
         initial_capex = self.capex_unity_harmonizer() # $/MWh (or $/tCO2 for CCUS technos)
-        if expo_factor != 0.0:
-            capacity_factor = None
-            if 'capacity_factor_at_year_end' in self.inputs['techno_infos_dict'] and 'capacity_factor' in self.inputs['techno_infos_dict']:
-                capacity_factor = self.np.linspace(self.inputs['techno_infos_dict']['capacity_factor'],
-                                                   self.inputs['techno_infos_dict']['capacity_factor_at_year_end'],
-                                                   len(self.years))
-
-            capex_calc_list = []
-            invest_sum = self.inputs['initial_production'] * initial_capex
-            capex_year = initial_capex
-
-            for i, invest in enumerate(invests):
-
-                # below 1M$ investments has no influence on learning rate for capex
-                # decrease
-                if invest_sum < 10.0 or i == 0:
-                    # first capex calculation
-                    capex_year = initial_capex
-                else:
-                    if capacity_factor is not None:
-                        ratio_invest = ((invest_sum + invest) / invest_sum *
-                                        (capacity_factor[i] / self.inputs['techno_infos_dict']['capacity_factor'])) \
-                                       ** (-expo_factor)
-
-                    else:
-                        ratio_invest = ((invest_sum + invest) / invest_sum) ** (-expo_factor)
-
-                    # Check that the ratio is always above 0.95 but no strict threshold for
-                    # optim is equal to 0.92 when tends to zero:
-                    if ratio_invest < 0.95:
-                        ratio_invest = 0.9 + 0.05 * self.np.exp(ratio_invest - 0.9)
-                    capex_year = capex_year * ratio_invest
+        return self.compute_capex_learning_curve(initial_capex)
 
-                capex_calc_list.append(capex_year)
-                invest_sum += invest
+    def compute_capex_learning_curve(self, initial_capex: float):
+        """
+        Apply the learning curve on the initial capex given the cumulated investments in the techno.
 
-            if 'maximum_learning_capex_ratio' in self.inputs['techno_infos_dict']:
-                maximum_learning_capex_ratio = self.inputs['techno_infos_dict']['maximum_learning_capex_ratio']
-            else:
-                # if maximum learning_capex_ratio is not specified, the learning
-                # rate on capex ratio cannot decrease the initial capex mor ethan
-                # 10%
-                maximum_learning_capex_ratio = 0.9
+        Each year, capex(y) = capex(y-1) * ratio_invest(y) where
+        ratio_invest(y) = ((invest_sum(y) + invest(y)) / invest_sum(y) * cf(y) / cf) ** (-expo_factor)
+        and invest_sum(y) is the initial capital plus all investments made before year y.
+        Below 10 M$ of cumulated investments the learning rate has no influence and capex is reset to its initial value.
 
-            capex_calc_list = initial_capex * (maximum_learning_capex_ratio + (1.0 - maximum_learning_capex_ratio) * self.np.array(capex_calc_list) / initial_capex)
+        The recursion is a product of ratios restarting at each reset, so it is computed on the whole
+        array at once : cumulative sum of the log of the ratios, minus its value at the last reset.
+        """
+        invests = self.inputs[f'{GlossaryEnergy.InvestLevelValue}:{GlossaryEnergy.InvestValue}'] * 1e3  # G$ to M$
+        expo_factor = self.compute_expo_factor()
+        if expo_factor == 0.0:
+            return initial_capex * self.np.ones(self.np.shape(invests))
+
+        n_years = invests.shape[-1]
+        # invest sum at the beginning of each year, before the investment of the year
+        invest_sum = self.inputs['initial_production'] * initial_capex + \
+                     self.np.concatenate([self.np.zeros(invests.shape[:-1] + (1,)), self.np.cumsum(invests[..., :-1], axis=-1)], axis=-1)
+
+        # below 1M$ investments has no influence on learning rate for capex decrease
+        reset = (invest_sum < 10.0) | (self.np.arange(n_years) == 0)
+        invest_sum_safe = self.np.where(reset, 1.0, invest_sum)
+
+        ratio_invest = (invest_sum_safe + invests) / invest_sum_safe
+        if 'capacity_factor_at_year_end' in self.inputs['techno_infos_dict'] and 'capacity_factor' in self.inputs['techno_infos_dict']:
+            capacity_factor = self.np.linspace(self.inputs['techno_infos_dict']['capacity_factor'],
+                                               self.inputs['techno_infos_dict']['capacity_factor_at_year_end'],
+                                               n_years)
+            ratio_invest = ratio_invest * capacity_factor / self.inputs['techno_infos_dict']['capacity_factor']
+        ratio_invest = ratio_invest ** (-expo_factor)
+
+        # Check that the ratio is always above 0.95 but no strict threshold for
+        # optim is equal to 0.92 when tends to zero:
+        ratio_invest = self.np.where(ratio_invest < 0.95, 0.9 + 0.05 * self.np.exp(ratio_invest - 0.9), ratio_invest)
+        ratio_invest = self.np.where(reset, 1.0, ratio_invest)
+
+        # capex(y) = initial capex * product of the ratios since the last reset
+        cumulated_log_ratio = self.np.cumsum(self.np.log(ratio_invest), axis=-1)
+        index_last_reset = np.maximum.accumulate(np.where(reset, np.arange(n_years), 0), axis=-1)
+        index_scenarios = tuple(np.indices(index_last_reset.shape)[:-1])
+        capex_calc_list = initial_capex * self.np.exp(cumulated_log_ratio - cumulated_log_ratio[index_scenarios + (index_last_reset,)])
+
+        if 'maximum_learning_capex_ratio' in self.inputs['techno_infos_dict']:
+            maximum_learning_capex_ratio = self.inputs['techno_infos_dict']['maximum_learning_capex_ratio']
         else:
-            capex_calc_list = initial_capex * self.np.ones(len(invests))
+            # if maximum learning_capex_ratio is not specified, the learning
+            # rate on capex ratio cannot decrease the initial capex mor ethan
+            # 10%
+            maximum_learning_capex_ratio = 0.9
 
-        return self.np.array(capex_calc_list)
+        return initial_capex * (maximum_learning_capex_ratio + (1.0 - maximum_learning_capex_ratio) * capex_calc_list / initial_capex)
 
     def compute_expo_factor(self):
 
@@ -570,6 +621,9 @@ class TechnoType(DifferentiableModel):
         return energy_demand
 
     def compute_efficiency(self):
+        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:efficiency'] = self.compute_efficiency_curve()
+
+    def compute_efficiency_curve(self):
         # Compute efficiency evolving in time or not
         if 'techno_evo_time' in self.inputs['techno_infos_dict'] and self.inputs['techno_infos_dict']['techno_evo_eff'] == 'yes':
             middle_evolution_year = self.inputs['techno_infos_dict']['techno_evo_time']
@@ -586,7 +640,7 @@ class TechnoType(DifferentiableModel):
         else:
             efficiency = self.inputs['techno_infos_dict']['efficiency'] * self.np.ones_like(self.years)
 
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:efficiency'] = efficiency
+        return efficiency
     
     def sigmoid_function(self, x, eff_max, eff_ini, x_shift, slope):
         x = x - x_shift
@@ -741,24 +795,19 @@ class TechnoType(DifferentiableModel):
 
         # production from historical plants
         lifetime = self.inputs[GlossaryEnergy.LifetimeName]
-        max_theoritical_historical_plants_production = self.zeros_array
-        initial_age_distrib = self.outputs['initial_age_distrib:distrib']
-        fraction_of_historical_plants_still_active = self.np.flip(self.np.tril(initial_age_distrib)).sum(axis=1) / 100
         n_years = len(self.years)
-        max_theoritical_historical_plants_production[:min(lifetime, n_years)] += self.inputs['initial_production'] * fraction_of_historical_plants_still_active[:min(lifetime, n_years)]
+        initial_age_distrib = self.outputs['initial_age_distrib:distrib']
+        fraction_of_historical_plants_still_active = remaining_share_of_initial_plants(initial_age_distrib, xp=self.np) / 100
+        max_theoritical_historical_plants_production = self.inputs['initial_production'] * pad_to_years(fraction_of_historical_plants_still_active, n_years, xp=self.np)
 
         # production from newly builted plants (construction delay already taken into account into prod from invests)
         new_installations_production_capacity = self.outputs['techno_production_infos:new_installations_production_capacity']
-        mask_prod = self.np.zeros((n_years, n_years)).astype(int)
-        for i in range(n_years):
-            mask_prod[i, i: min(n_years, i + lifetime)] = 1
-
         utilisation_ratio = self.inputs[f'{GlossaryEnergy.UtilisationRatioValue}:{GlossaryEnergy.UtilisationRatioValue}'] / 100.
-        max_theoritical_new_plant_production = mask_prod.T @ new_installations_production_capacity
+        max_theoritical_new_plant_production = lifetime_window_sum(new_installations_production_capacity, lifetime, xp=self.np)
         max_theoritical_production = max_theoritical_historical_plants_production + max_theoritical_new_plant_production
         target_production = utilisation_ratio * max_theoritical_production
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.Years}'] = self.years
-        self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] = target_production
+        self.outputs[self.target_production_column] = target_production
 
         self.outputs[f'techno_production_infos:{GlossaryEnergy.Years}'] = self.years
         self.outputs['techno_production_infos:target_production'] = target_production
@@ -769,26 +818,17 @@ class TechnoType(DifferentiableModel):
     def compute_mean_age_of_production(self):
         """Computes the average age of the producing plants"""
         lifetime = self.inputs[GlossaryEnergy.LifetimeName]
+        n_years = len(self.years)
         max_theoritical_historical_plants_production = self.outputs['techno_production_infos:max_theoritical_historical_plants_production']
         initial_age_distrib = self.outputs['initial_age_distrib:distrib']
-        bb = self.np.flip(self.np.tril(initial_age_distrib))
-        bb = (bb.T / bb.sum(axis=1)).T
-        mean_age_historical_prod = bb @ self.np.arange(0, lifetime)
-        mean_age_historical_prod_complete = self.zeros_array
-        n_years = len(self.years)
-        mean_age_historical_prod_complete[:min(n_years, lifetime)] = mean_age_historical_prod[:min(n_years, lifetime)]
+        mean_age_historical_prod_complete = pad_to_years(mean_age_of_initial_plants(initial_age_distrib, xp=self.np), n_years, xp=self.np)
 
         # production from newly builted plants (construction delay already taken into account into prod from invests)
-        mask_age = self.np.zeros((n_years, n_years)).astype(int)
-        ages = self.np.concatenate([self.np.arange(0, lifetime), self.np.array([0] * (n_years - lifetime))])
-        for i in range(n_years):
-            mask_age[i, i:] = ages[:n_years - i]
-
         new_installations_production_capacity = self.outputs['techno_production_infos:new_installations_production_capacity']
         # minimum to avoid division by zero, no impact on gradients as mean age of production is strictly for information purpose, and not a coupling variable
-        mean_age_of_new_producing_plants = (mask_age.T @ new_installations_production_capacity) / \
+        mean_age_of_new_producing_plants = lifetime_window_age_sum(new_installations_production_capacity, lifetime, xp=self.np) / \
                                            self.np.maximum(self.outputs['techno_production_infos:max_theoritical_new_plant_production'], 1e-3)
-        target_total_production = self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+        target_total_production = self.outputs[self.target_production_column]
         max_theoritical_new_plant_production = self.outputs['techno_production_infos:max_theoritical_new_plant_production']
 
         # minimum to avoid division by zero, no impact on gradients as mean age of production is strictly for
@@ -813,8 +853,8 @@ class TechnoType(DifferentiableModel):
         self.outputs[f'{GlossaryEnergy.InstalledCapacity}:newly_installed_capacity'] = newly_installed_capacity
         self.outputs[f'{GlossaryEnergy.InstalledCapacity}:total_installed_capacity'] = total_installed_capacity
 
-        removed_installed_capacity = total_installed_capacity[:-1] - total_installed_capacity[1:] + newly_installed_capacity[1:]
-        removed_installed_capacity = self.np.concatenate([[0.], removed_installed_capacity])
+        removed_installed_capacity = total_installed_capacity[..., :-1] - total_installed_capacity[..., 1:] + newly_installed_capacity[..., 1:]
+        removed_installed_capacity = self.np.concatenate([self.np.zeros(removed_installed_capacity.shape[:-1] + (1,)), removed_installed_capacity], axis=-1)
         self.outputs[f'{GlossaryEnergy.InstalledCapacity}:removed_installed_capacity'] = removed_installed_capacity
 
     def compute_new_installations_production_capacity(self, additionnal_capex: float = 0.):
@@ -824,19 +864,20 @@ class TechnoType(DifferentiableModel):
         If any, additionnal_capex should be in ($/MWh)
         """
 
-        years_before_year_start = self.np.arange(self.year_start - self.inputs[GlossaryEnergy.ConstructionDelay], self.year_start)
         invest_before_year_start = self.inputs[f'{GlossaryEnergy.InvestmentBeforeYearStartValue}:{GlossaryEnergy.InvestValue}'] # G$
-        capex_after_year_start = self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:Capex_{self.name}'] # $ / MWh
-        capex_year_start = capex_after_year_start[0]
-        capexes_before_year_start = self.np.array([capex_year_start] * len(years_before_year_start))
+        capex_after_year_start = self.outputs[self.capex_column] # $ / MWh
+        # capex of year start is used for investments made before year start
+        capex_year_start = capex_after_year_start[..., :1]
 
         invest_after_year_start = self.inputs[f'{GlossaryEnergy.InvestLevelValue}:{GlossaryEnergy.InvestValue}'] # in G$
-        invests_period_of_interest = self.np.concatenate([invest_before_year_start, invest_after_year_start])
-        capex_period_of_interest = self.np.concatenate([capexes_before_year_start, capex_after_year_start])
-        new_installations_production_capacity = invests_period_of_interest / (capex_period_of_interest + additionnal_capex) * 1e3 # G$ / ($/ MWh) = (G * MWh) = 10^9 * 10^6 Wh = 10^15 Wh = k TWh so multiply by 1e3 to get TWh
+        # G$ / ($/ MWh) = (G * MWh) = 10^9 * 10^6 Wh = 10^15 Wh = k TWh so multiply by 1e3 to get TWh
+        new_installations_production_capacity = self.np.concatenate([
+            invest_before_year_start / (capex_year_start + additionnal_capex) * 1e3,
+            invest_after_year_start / (capex_after_year_start + additionnal_capex) * 1e3,
+        ], axis=-1)
 
         # keep only prod for years >= year_start and <= year_end
-        new_installations_production_capacity = new_installations_production_capacity[:len(self.years)]
+        new_installations_production_capacity = new_installations_production_capacity[..., :len(self.years)]
 
         self.outputs['techno_production_infos:new_installations_production_capacity'] = new_installations_production_capacity
 
@@ -869,7 +910,7 @@ class TechnoType(DifferentiableModel):
 
         if related_to == 'prod':
             self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GHG_type} ({GlossaryEnergy.mass_unit})'] = emission_factor * \
-                                                                                                                    self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+                                                                                                                    self.outputs[self.target_production_column]
         else:
             self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GHG_type} ({GlossaryEnergy.mass_unit})'] = emission_factor * \
                                                                                                                     self.outputs[f'{GlossaryEnergy.TechnoEnergyDemandsValue}:{related_to} ({self.product_unit})']
@@ -946,7 +987,7 @@ class TechnoType(DifferentiableModel):
         self.outputs[f"{GlossaryEnergy.TechnoScope1GHGEmissionsValue}:{GlossaryEnergy.Years}"] = self.years
         for ghg in GlossaryEnergy.GreenHouseGases:
             self.outputs[f"{GlossaryEnergy.TechnoScope1GHGEmissionsValue}:{ghg}"] = \
-                self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}'] * \
+                self.outputs[self.production_column] * \
                 self.outputs[f'ghg_intensity_scope_1:{ghg}']
 
     def compute_scope_2_ghg_emissions(self):
@@ -954,7 +995,7 @@ class TechnoType(DifferentiableModel):
         self.outputs[f"techno_scope_2_ghg_emissions:{GlossaryEnergy.Years}"] = self.years
         for ghg in GlossaryEnergy.GreenHouseGases:
             self.outputs[f"techno_scope_2_ghg_emissions:{ghg}"] = \
-                self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}'] * \
+                self.outputs[self.production_column] * \
                 self.outputs[f'ghg_intensity_scope_2:{ghg}']
 
     def compute_ccs_streams_demands(self):
@@ -962,7 +1003,7 @@ class TechnoType(DifferentiableModel):
         for stream in self.inputs[GlossaryEnergy.CCSUsedForProductionValue]:
             self.outputs[f'{GlossaryEnergy.TechnoCCSDemandsValue}:{stream} ({GlossaryEnergy.energy_unit})'] = \
                 self.outputs[f"{GlossaryEnergy.TechnoDetailedPricesValue}:{stream}_needs"] * \
-                self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+                self.outputs[self.target_production_column]
 
     def compute_co2_from_flue_gas_intensity_scope_1(self) -> float:
         """returns the intensity of co2 emissions through flue gas exhausts in Mt/TWh"""
@@ -975,5 +1016,5 @@ class TechnoType(DifferentiableModel):
 
         self.outputs[f'{self.stream_name}.{self.name}.{GlossaryEnergy.TechnoFlueGasProductionValue}:{GlossaryEnergy.Years}'] = self.years
         self.outputs[f'{self.stream_name}.{self.name}.{GlossaryEnergy.TechnoFlueGasProductionValue}:{GlossaryEnergy.CO2FromFlueGas}'] = \
-            self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}'] * \
+            self.outputs[self.production_column] * \
             co2_flue_gas_intensity
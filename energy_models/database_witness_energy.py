@@ -15,6 +15,8 @@ limitations under the License.
 '''
 import datetime
 import os
+import threading
+from copy import deepcopy
 from datetime import date
 from os.path import join
 from pathlib import Path
@@ -85,112 +87,124 @@ class DatabaseWitnessEnergy:
     )
 
     invest_before_year_start_folder = join(Path(__file__).parents[1], "data_energy", "techno_invests")
+    techno_production_historic_folder = join(Path(__file__).parents[1], "data_energy", "techno_production_historic")
+    techno_age_distrib_folder = join(Path(__file__).parents[1], "data_energy", "techno_factories_age")
+
+    # Process-wide store of the historical techno data files, filled lazily :
+    # {(path to csv, column to pick): (modification time of the file, heavy collected data, {query: result})}
+    # Each file is loaded once, the results of the queries on its data are kept in memory.
+    # An entry is reloaded when the modification time of its file changes.
+    techno_data_store = {}
+    techno_data_store_lock = threading.RLock()
 
     @classmethod
-    def get_techno_invest(cls, techno_name: str, year: int) -> float:
+    def get_techno_data_path(cls, folder: str, techno_name: str) -> str:
         name_formatted = techno_name.replace(".", "_")
         name_formatted = name_formatted.lower()
-        path_to_csv = os.path.join(cls.invest_before_year_start_folder, name_formatted) + ".csv"
-        heavy_collected_data = HeavyCollectedData(
-            value=path_to_csv,
-            description="",
-            unit="G$",
-            link="",
-            source="",
-            last_update_date=datetime.datetime.today(),
-            critical_at_year_start=True,
-            column_to_pick="invest"
-        )
-        return heavy_collected_data.get_value_at_year(year=year)
+        return os.path.join(folder, name_formatted) + ".csv"
+
+    @classmethod
+    def get_techno_heavy_collected_data(cls, folder: str, techno_name: str, column_to_pick: str, unit: str = None):
+        """
+        Heavy collected data of a historical techno data file, loaded once per process.
+        If unit is None, it is read in the column unit of the file.
+        The object returned is shared, it must not be modified.
+        """
+        heavy_collected_data, _ = cls._get_techno_data_entry(folder, techno_name, column_to_pick, unit)
+        return heavy_collected_data
+
+    @classmethod
+    def _get_techno_data_entry(cls, folder: str, techno_name: str, column_to_pick: str, unit: str = None):
+        path_to_csv = cls.get_techno_data_path(folder, techno_name)
+        modification_time = os.path.getmtime(path_to_csv)
+        key = (path_to_csv, column_to_pick)
+        with cls.techno_data_store_lock:
+            entry = cls.techno_data_store.get(key)
+            if entry is None or entry[0] != modification_time:
+                if unit is None:
+                    unit = pd.read_csv(path_to_csv)["unit"].values[0]
+                heavy_collected_data = HeavyCollectedData(
+                    value=path_to_csv,
+                    description="",
+                    unit=unit,
+                    link="",
+                    source="",
+                    last_update_date=datetime.datetime.today(),
+                    critical_at_year_start=True,
+                    column_to_pick=column_to_pick
+                )
+                entry = (modification_time, heavy_collected_data, {})
+                cls.techno_data_store[key] = entry
+            return entry[1], entry[2]
+
+    @classmethod
+    def _query_techno_data(cls, folder: str, techno_name: str, column_to_pick: str, query: tuple, unit: str = None):
+        """
+        Result of a query on the heavy collected data of a file, computed once per file and query :
+        ("value_at_year", year), ("is_available_at_year", year) or ("between_years", year_start, year_end)
+        Returns a copy of the result, and the heavy collected data
+        """
+        with cls.techno_data_store_lock:
+            heavy_collected_data, results = cls._get_techno_data_entry(folder, techno_name, column_to_pick, unit)
+            if query not in results:
+                query_name, *years = query
+                if query_name == "value_at_year":
+                    results[query] = heavy_collected_data.get_value_at_year(year=years[0])
+                elif query_name == "is_available_at_year":
+                    results[query] = heavy_collected_data.is_available_at_year(year=years[0])
+                elif query_name == "between_years":
+                    results[query] = heavy_collected_data.get_between_years(year_start=years[0], year_end=years[1])
+                else:
+                    raise ValueError(f"Unknown query {query_name} on techno data")
+            return deepcopy(results[query]), heavy_collected_data
+
+    @classmethod
+    def clear_techno_data_store(cls):
+        with cls.techno_data_store_lock:
+            cls.techno_data_store.clear()
+
+    @classmethod
+    def get_techno_invest(cls, techno_name: str, year: int) -> float:
+        out, _ = cls._query_techno_data(cls.invest_before_year_start_folder, techno_name, "invest", ("value_at_year", year), unit="G$")
+        return out
 
     @classmethod
     def get_techno_invest_df(cls, techno_name: str) -> pd.DataFrame:
-        name_formatted = techno_name.replace(".", "_")
-        name_formatted = name_formatted.lower()
-        path_to_csv = os.path.join(cls.invest_before_year_start_folder, name_formatted) + ".csv"
-        heavy_collected_data = HeavyCollectedData(
-            value=path_to_csv,
-            description="",
-            unit="G$",
-            link="",
-            source="",
-            last_update_date=datetime.datetime.today(),
-            critical_at_year_start=True,
-            column_to_pick="invest"
-        )
-        return heavy_collected_data.value
+        heavy_collected_data = cls.get_techno_heavy_collected_data(cls.invest_before_year_start_folder, techno_name, "invest", unit="G$")
+        return heavy_collected_data.value.copy()
 
     @classmethod
     def get_techno_invest_before_year_start(cls, techno_name: str, year_start: int, construction_delay: int, is_available_at_year: bool = False):
-        name_formatted = techno_name.replace(".", "_")
-        name_formatted = name_formatted.lower()
-        path_to_csv = os.path.join(cls.invest_before_year_start_folder, name_formatted) + ".csv"
-        df = pd.read_csv(path_to_csv)
-        heavy_collected_data = HeavyCollectedData(
-            value=path_to_csv,
-            description="",
-            unit="G$",
-            link="",
-            source="",
-            last_update_date=datetime.datetime.today(),
-            critical_at_year_start=True,
-            column_to_pick="invest"
-        )
-        out_df = df.loc[df['years'] < year_start]
+        folder = cls.invest_before_year_start_folder
+        heavy_collected_data = cls.get_techno_heavy_collected_data(folder, techno_name, "invest", unit="G$")
         if is_available_at_year:
-            return construction_delay == 0 or (heavy_collected_data.is_available_at_year(year_start - construction_delay) and heavy_collected_data.is_available_at_year(year_start - 1))
+            return construction_delay == 0 or (
+                cls._query_techno_data(folder, techno_name, "invest", ("is_available_at_year", year_start - construction_delay), unit="G$")[0] and
+                cls._query_techno_data(folder, techno_name, "invest", ("is_available_at_year", year_start - 1), unit="G$")[0])
         if construction_delay == 0:
             out_df = pd.DataFrame({
             "years": [],
             "invest": []
         })
         elif construction_delay > 0:
-            out_df = heavy_collected_data.get_between_years(year_start=year_start - construction_delay, year_end=year_start - 1)
+            out_df, _ = cls._query_techno_data(folder, techno_name, "invest", ("between_years", year_start - construction_delay, year_start - 1), unit="G$")
+        else:
+            df = heavy_collected_data.value
+            out_df = df.loc[df['years'] < year_start].copy()
         return out_df, heavy_collected_data
 
-    techno_production_historic_folder = join(Path(__file__).parents[1], "data_energy", "techno_production_historic")
-
     @classmethod
     def get_techno_prod(cls, techno_name: str, year: int, is_available_at_year: bool = False):
-        name_formatted = techno_name.replace(".", "_")
-        name_formatted = name_formatted.lower()
-        path_to_csv = os.path.join(cls.techno_production_historic_folder, name_formatted) + ".csv"
-        df = pd.read_csv(path_to_csv)
-        heavy_collected_data = HeavyCollectedData(
-            value=path_to_csv,
-            description="",
-            unit=df["unit"].values[0],
-            link="",
-            source="",
-            last_update_date=datetime.datetime.today(),
-            critical_at_year_start=True,
-            column_to_pick="production"
-        )
+        folder = cls.techno_production_historic_folder
         if is_available_at_year:
-            return heavy_collected_data.is_available_at_year(year=year)
-
-        out = heavy_collected_data.get_value_at_year(year=year)
-        return out, heavy_collected_data
+            return cls._query_techno_data(folder, techno_name, "production", ("is_available_at_year", year))[0]
 
-    techno_age_distrib_folder = join(Path(__file__).parents[1], "data_energy", "techno_factories_age")
+        return cls._query_techno_data(folder, techno_name, "production", ("value_at_year", year))
 
     @classmethod
     def get_techno_age_distrib_factor(cls, techno_name: str, year: int, is_available_at_year: bool = False):
-        name_formatted = techno_name.replace(".", "_")
-        name_formatted = name_formatted.lower()
-        path_to_csv = os.path.join(cls.techno_age_distrib_folder, name_formatted) + ".csv"
-        heavy_collected_data = HeavyCollectedData(
-            value=path_to_csv,
-            description="",
-            unit="-",
-            link="",
-            source="",
-            last_update_date=datetime.datetime.today(),
-            critical_at_year_start=True,
-            column_to_pick="growth_rate"
-        )
+        folder = cls.techno_age_distrib_folder
         if is_available_at_year:
-            return heavy_collected_data.is_available_at_year(year=year)
+            return cls._query_techno_data(folder, techno_name, "growth_rate", ("is_available_at_year", year), unit="-")[0]
 
-        out = heavy_collected_data.get_value_at_year(year=year)
-        return out, heavy_collected_data
+        return cls._query_techno_data(folder, techno_name, "growth_rate", ("value_at_year", year), unit="-")
@@ -17,14 +17,14 @@ limitations under the License.
 
 import numpy as np
 import pandas as pd
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
-    InstanciatedSeries,
-    TwoAxesInstanciatedChart,
-)
-
 from energy_models.core.techno_type.disciplines.biomass_dry_techno_disc import (
     BiomassDryTechnoDiscipline,
 )
+
+from energy_models.core.lazy_charts import (
+    InstanciatedSeries,
+    TwoAxesInstanciatedChart,
+)
 from energy_models.glossaryenergy import GlossaryEnergy
 from energy_models.models.biomass_dry.crop_energy.crop_energy import CropEnergy
 
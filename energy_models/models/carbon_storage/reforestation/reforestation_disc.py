@@ -15,18 +15,18 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
+from energy_models.models.carbon_storage.reforestation.reforestation import (
+    Reforestation,
+)
+
+from energy_models.core.lazy_charts import (
     InstanciatedSeries,
     TwoAxesInstanciatedChart,
 )
-
 from energy_models.core.techno_type.disciplines.carbon_storage_techno_disc import (
     CSTechnoDiscipline,
 )
 from energy_models.glossaryenergy import GlossaryEnergy
-from energy_models.models.carbon_storage.reforestation.reforestation import (
-    Reforestation,
-)
 
 
 class ReforestationDiscipline(CSTechnoDiscipline):
@@ -42,5 +42,5 @@ class BiomassFired(ElectricityTechno):
     def compute_byproducts_production(self):
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.hightemperatureheat_energyname}'] = \
             self.outputs[f'{GlossaryEnergy.TechnoEnergyDemandsValue}:{GlossaryEnergy.biomass_dry}'] - \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']  # TWh
+            self.outputs[self.target_production_column]  # TWh
 
@@ -15,11 +15,10 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
+from energy_models.core.lazy_charts import (
     InstanciatedSeries,
     TwoAxesInstanciatedChart,
 )
-
 from energy_models.core.techno_type.disciplines.electricity_techno_disc import (
     ElectricityTechnoDiscipline,
 )
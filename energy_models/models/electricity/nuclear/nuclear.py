@@ -85,8 +85,6 @@ class Nuclear(ElectricityTechno):
         overloads check_capex_unity that return the capex in $/MW to add the decommissioning cost
         decommissioning_cost unit is $/kW
         """
-        invests = self.inputs[f'{GlossaryEnergy.InvestLevelValue}:{GlossaryEnergy.InvestValue}'] * 1e3  # G$ to M$
-        expo_factor = self.compute_expo_factor()
         capex_init = self.capex_unity_harmonizer()
 
         # add decommissioning_cost
@@ -94,76 +92,4 @@ class Nuclear(ElectricityTechno):
                       / self.inputs['techno_infos_dict']['full_load_hours'] \
                       / self.inputs['techno_infos_dict']['capacity_factor']
 
-        if expo_factor != 0.0:
-            capacity_factor_list = None
-            if 'capacity_factor_at_year_end' in self.inputs['techno_infos_dict'] \
-                    and 'capacity_factor' in self.inputs['techno_infos_dict']:
-                capacity_factor_list = self.np.linspace(self.inputs['techno_infos_dict']['capacity_factor'],
-                                                         self.inputs['techno_infos_dict']['capacity_factor_at_year_end'],
-                                                         len(invests))
-
-            capex_calc_list = []
-            invest_sum = self.inputs['initial_production'] * capex_init
-            capex_year = capex_init
-
-            for i, invest in enumerate(invests):
-
-                # below 1M$ investments has no influence on learning rate for capex
-                # decrease
-                if invest_sum < 10.0 or i == 0.0:
-                    capex_year = capex_init
-                    # first capex calculation
-                else:
-                    self.np.seterr('raise')
-                    if capacity_factor_list is not None:
-                        try:
-                            ratio_invest = ((invest_sum + invest) / invest_sum *
-                                            (capacity_factor_list[i] / self.inputs['techno_infos_dict']['capacity_factor'])) \
-                                           ** (-expo_factor)
-
-                        except:
-                            raise Exception(
-                                f'invest is {invest} and invest sum {invest_sum} on techno {self.name}')
-
-                    else:
-                        self.np.seterr('raise')
-                        try:
-                            # try to calculate capex_year "normally"
-                            ratio_invest = ((invest_sum + invest) /
-                                            invest_sum) ** (-expo_factor)
-
-                            pass
-
-                        except FloatingPointError:
-                            # set invest as a complex to calculate capex_year as a
-                            # complex
-                            ratio_invest = ((invest_sum + self.np.complex128(invest)) /
-                                            invest_sum) ** (-expo_factor)
-
-                            pass
-                        self.np.seterr('warn')
-
-                    # Check that the ratio is always above 0.95 but no strict threshold for
-                    # optim is equal to 0.92 when tends to zero:
-                    if ratio_invest < 0.95:
-                        ratio_invest = 0.9 + \
-                                       0.05 * self.np.exp(ratio_invest - 0.9)
-                    capex_year = capex_year * ratio_invest
-
-                capex_calc_list.append(capex_year)
-                invest_sum += invest
-
-            if 'maximum_learning_capex_ratio' in self.inputs['techno_infos_dict']:
-                maximum_learning_capex_ratio = self.inputs['techno_infos_dict']['maximum_learning_capex_ratio']
-            else:
-                # if maximum learning_capex_ratio is not specified, the learning
-                # rate on capex ratio cannot decrease the initial capex mor ethan
-                # 10%
-                maximum_learning_capex_ratio = 0.9
-
-            capex_calc_list = capex_init * (maximum_learning_capex_ratio + (
-                    1.0 - maximum_learning_capex_ratio) * self.np.array(capex_calc_list) / capex_init)
-        else:
-            capex_calc_list = capex_init * self.np.ones(len(invests))
-
-        return self.np.array(capex_calc_list)
+        return self.compute_capex_learning_curve(capex_init)
@@ -16,11 +16,11 @@ limitations under the License.
 '''
 
 import numpy as np
-from sostrades_core.tools.post_processing.charts.two_axes_instanciated_chart import (
+
+from energy_models.core.lazy_charts import (
     InstanciatedSeries,
     TwoAxesInstanciatedChart,
 )
-
 from energy_models.core.techno_type.disciplines.electricity_techno_disc import (
     ElectricityTechnoDiscipline,
 )
@@ -30,7 +30,7 @@ class SolarThermal(ElectricityTechno):
         density_per_ha = self.inputs['techno_infos_dict']['density_per_ha']
 
         self.outputs[f'{GlossaryEnergy.LandUseRequiredValue}:Land use'] = \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] / \
+            self.outputs[self.target_production_column] / \
             density_per_ha
 
     def compute_byproducts_production(self):
@@ -41,5 +41,5 @@ class SolarThermal(ElectricityTechno):
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.hightemperatureheat_energyname}'] =\
             ((1 - self.inputs['techno_infos_dict']['efficiency']) *
-             self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']) \
+             self.outputs[self.target_production_column]) \
             / self.inputs['techno_infos_dict']['efficiency']
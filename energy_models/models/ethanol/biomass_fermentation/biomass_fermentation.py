@@ -45,7 +45,7 @@ class BiomassFermentation(EthanolTechno):
         carbon_production_factor = self.get_theoretical_co2_prod()
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.carbon_captured} ({GlossaryEnergy.mass_unit})'] =\
             carbon_production_factor * \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] / \
+            self.outputs[self.target_production_column] / \
             self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:efficiency']
 
     def get_theoretical_biomass_needs(self):
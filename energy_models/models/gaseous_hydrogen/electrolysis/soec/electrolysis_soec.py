@@ -73,7 +73,7 @@ class ElectrolysisSOEC(GaseousHydrogenTechno):
         o2_needs = self.get_oxygen_produced()
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:O2 ({GlossaryEnergy.mass_unit})'] = \
             o2_needs / self.inputs['data_fuel_dict']['calorific_value'] * \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+            self.outputs[self.target_production_column]
 
         # production
         # self.production[f'{lowheattechno.stream_name} ({self.product_unit})'] = \
@@ -42,8 +42,8 @@ class PlasmaCracking(GaseousHydrogenTechno):
         Add a percentage to the total price
         (for plasma cracking case we take only a percentage because the techno also creates graphene)
         '''
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}'] *= self.outputs[f'percentage_resource:{self.stream_name}'] / 100.
-        self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{self.name}_wotaxes'] *= self.outputs[f'percentage_resource:{self.stream_name}'] / 100.
+        self.outputs[self.price_column] *= self.outputs[f'percentage_resource:{self.stream_name}'] / 100.
+        self.outputs[self.price_wotaxes_column] *= self.outputs[f'percentage_resource:{self.stream_name}'] / 100.
 
     def compute_energies_needs(self):
         self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.electricity}_needs'] = self.get_electricity_needs()
@@ -53,7 +53,7 @@ class PlasmaCracking(GaseousHydrogenTechno):
         C_per_h2 = self.get_theoretical_solid_carbon_production()
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.SolidCarbon} ({GlossaryEnergy.mass_unit})'] = \
-            C_per_h2 * self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+            C_per_h2 * self.outputs[self.target_production_column]
 
     def get_theoretical_solid_carbon_production(self):
         '''
@@ -112,7 +112,7 @@ class PlasmaCracking(GaseousHydrogenTechno):
         '''Carbon storage for carbon production higher than carbon demand'''
         self.temp_variables[f'quantity:{GlossaryEnergy.Years}'] = self.years
         self.temp_variables['quantity:carbon_production'] = self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{GlossaryEnergy.SolidCarbon} ({GlossaryEnergy.mass_unit})'] * 1e3
-        self.temp_variables['quantity:hydrogen_production'] = self.outputs[f'{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}'] * 1e3
+        self.temp_variables['quantity:hydrogen_production'] = self.outputs[self.production_column] * 1e3
         self.temp_variables['quantity:carbon_demand'] = self.inputs['market_demand:carbon_demand']
         self.temp_variables['quantity:CO2_credits'] = self.inputs['CO2_credits:CO2_credits']
         self.temp_variables['quantity:hydrogen_price'] = self.inputs[f'{GlossaryEnergy.StreamPricesValue}:{self.stream_name}']
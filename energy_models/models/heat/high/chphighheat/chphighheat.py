@@ -41,8 +41,8 @@ class CHPHighHeat(highheattechno):
             self.outputs[f'{GlossaryEnergy.TechnoEnergyDemandsValue}:{Methane.name}']
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{ElectricityTechno.stream_name} ({GlossaryEnergy.energy_unit})'] = \
-            (self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] /
-             (1 - self.inputs['techno_infos_dict']['efficiency'])) - self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+            (self.outputs[self.target_production_column] /
+             (1 - self.inputs['techno_infos_dict']['efficiency'])) - self.outputs[self.target_production_column]
 
     def get_theoretical_methane_needs(self):
         # we need as output kwh/kwh
@@ -37,7 +37,7 @@ class GeothermalHeat(highheattechno):
         # TODO : ask valentin ?? geothermal high heat produces carbon capture ??
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.carbon_captured} ({GlossaryEnergy.mass_unit})'] = \
             carbon_production_factor * \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] /\
+            self.outputs[self.target_production_column] /\
             self.outputs[f'{GlossaryEnergy.TechnoDetailedPricesValue}:efficiency']
 
     def get_theoretical_electricity_needs(self):
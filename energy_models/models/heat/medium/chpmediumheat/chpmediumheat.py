@@ -45,7 +45,7 @@ class CHPMediumHeat(mediumheattechno):
 
     def compute_byproducts_production(self):
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{ElectricityTechno.stream_name} ({GlossaryEnergy.energy_unit})'] = \
-            (self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] /
+            (self.outputs[self.target_production_column] /
              (1 - self.inputs['techno_infos_dict']['efficiency'])) - self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:'
                 f'{self.stream_name}']
 
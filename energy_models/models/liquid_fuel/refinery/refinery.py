@@ -90,7 +90,7 @@ class Refinery(LiquidFuelTechno):
         for energy in self.other_energy_dict:
             # if it s a dict, so it is a data_energy_dict
             self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{energy}'] = \
-                self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] * \
+                self.outputs[self.target_production_column] * \
                 self.inputs['techno_infos_dict']['product_break_down'][energy] / 11.66 * \
                 self.other_energy_dict[energy]['calorific_value']
 
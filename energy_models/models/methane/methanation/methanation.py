@@ -42,7 +42,7 @@ class Methanation(MethaneTechno):
 
         # total H2O production
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{Water.name} ({GlossaryEnergy.mass_unit})'] = \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] * H2Oprod
+            self.outputs[self.target_production_column] * H2Oprod
 
     def get_h2o_production(self):
         """
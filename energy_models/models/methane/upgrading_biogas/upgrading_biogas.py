@@ -39,7 +39,7 @@ class UpgradingBiogas(MethaneTechno):
         # kg/kWh corresponds to Mt/TWh
         co2_prod = self.get_theoretical_co2_prod()
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.carbon_captured} ({GlossaryEnergy.mass_unit})'] = \
-            co2_prod * self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+            co2_prod * self.outputs[self.target_production_column]
 
         # production
         # self.production[f'{lowheattechno.stream_name} ({self.product_unit})'] = \
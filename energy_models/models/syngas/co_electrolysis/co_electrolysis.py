@@ -87,7 +87,7 @@ class CoElectrolysis(SyngasTechno):
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{Dioxygen.name} ({GlossaryEnergy.mass_unit})'] = \
             o2_production / self.inputs['data_energy_dict']['calorific_value'] * \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+            self.outputs[self.target_production_column]
 
     def get_h2o_production(self):
         """
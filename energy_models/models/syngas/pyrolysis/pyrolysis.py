@@ -40,9 +40,9 @@ class Pyrolysis(SyngasTechno):
     def compute_byproducts_production(self):
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:char ({GlossaryEnergy.mass_unit})'] = \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] * \
+            self.outputs[self.target_production_column] * \
             self.inputs['techno_infos_dict']['char_yield'] / self.inputs['techno_infos_dict']['syngas_yield']
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:bio_oil ({GlossaryEnergy.mass_unit})'] = \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}'] * \
+            self.outputs[self.target_production_column] * \
             self.inputs['techno_infos_dict']['bio_oil_yield'] / self.inputs['techno_infos_dict']['syngas_yield']
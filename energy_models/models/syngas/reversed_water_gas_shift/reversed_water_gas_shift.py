@@ -143,7 +143,7 @@ class RWGS(SyngasTechno):
         th_water_prod = self.get_theoretical_water_prod()
 
         self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{Water.name} ({GlossaryEnergy.mass_unit})'] = \
-            th_water_prod * self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']
+            th_water_prod * self.outputs[self.target_production_column]
 
     def compute_energies_demand(self):
         """
@@ -155,7 +155,7 @@ class RWGS(SyngasTechno):
 
         self.outputs[f'{GlossaryEnergy.TechnoEnergyDemandsValue}:{CarbonCapture.name} ({GlossaryEnergy.mass_unit})'] = \
             self.outputs[f"{GlossaryEnergy.TechnoDetailedPricesValue}:{GlossaryEnergy.CO2Resource}_needs"] * \
-            self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{self.stream_name}']  # in kg
+            self.outputs[self.target_production_column]  # in kg
 
     def get_theoretical_syngas_needs(self, syngas_ratio):
         '''
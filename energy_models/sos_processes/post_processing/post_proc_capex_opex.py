@@ -13,12 +13,11 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
-from plotly import graph_objects as go
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.plotly_native_charts.instantiated_plotly_native_chart import (
+from energy_models.core.lazy_charts import (
+    ChartFilter,
     InstantiatedPlotlyNativeChart,
+    go,
 )
-
 from energy_models.glossaryenergy import GlossaryEnergy
 
 YEAR_COMPARISON = [2023, 2050]
@@ -13,15 +13,12 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
-from plotly import figure_factory as ff
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.plotly_native_charts.instantiated_plotly_native_chart import (
-    InstantiatedPlotlyNativeChart,
-)
-from sostrades_core.tools.post_processing.tables.instanciated_table import (
+from energy_models.core.lazy_charts import (
+    ChartFilter,
     InstanciatedTable,
+    InstantiatedPlotlyNativeChart,
+    ff,
 )
-
 from energy_models.glossaryenergy import GlossaryEnergy
 
 YEAR_COMPARISON = [2023, 2050]
@@ -14,19 +14,17 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from plotly import figure_factory as ff
-from plotly import graph_objects as go
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.plotly_native_charts.instantiated_plotly_native_chart import (
-    InstantiatedPlotlyNativeChart,
-)
-from sostrades_core.tools.post_processing.tables.instanciated_table import (
+
+from energy_models.core.lazy_charts import (
+    ChartFilter,
     InstanciatedTable,
+    InstantiatedPlotlyNativeChart,
+    ff,
+    go,
+    plt,
 )
-
 from energy_models.glossaryenergy import GlossaryEnergy
 
 YEAR_COMPARISON = [2023, 2050]
@@ -15,12 +15,12 @@ limitations under the License.
 '''
 import numpy as np
 import pandas as pd
-from plotly import graph_objects as go
-from sostrades_core.tools.post_processing.charts.chart_filter import ChartFilter
-from sostrades_core.tools.post_processing.plotly_native_charts.instantiated_plotly_native_chart import (
+
+from energy_models.core.lazy_charts import (
+    ChartFilter,
     InstantiatedPlotlyNativeChart,
+    go,
 )
-
 from energy_models.glossaryenergy import GlossaryEnergy
 
 YEAR_COMPARISON = [2023, 2050]
@@ -13,10 +13,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 
 '''
-import matplotlib.colors as mcolors
-import matplotlib.pyplot as plt
 import numpy as np
 
+from energy_models.core.lazy_charts import (
+    mcolors,
+    plt,
+)
+
 # Define the technologies and their energy connections
 technologies = {
     'T1': {'consumes': ['E1'], 'produces': 'E2'},
@@ -0,0 +1,204 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+from autograd import grad
+from autograd import numpy as autograd_np
+
+from energy_models.core.stream_type.base_stream import BaseStream
+from energy_models.glossaryenergy import GlossaryEnergy
+
+# aggregated variable of the stream : (variable of the technos, units of the conversion factor)
+AGGREGATED_VARIABLES = {
+    GlossaryEnergy.StreamEnergyConsumptionValue: (GlossaryEnergy.TechnoEnergyConsumptionValue,
+                                                  GlossaryEnergy.TechnoEnergyConsumption, GlossaryEnergy.StreamEnergyConsumption),
+    GlossaryEnergy.StreamCCSConsumptionValue: (GlossaryEnergy.TechnoCCSConsumptionValue,
+                                               GlossaryEnergy.TechnoCCSConsumption, GlossaryEnergy.StreamCCSConsumption),
+    GlossaryEnergy.StreamResourceConsumptionValue: (GlossaryEnergy.TechnoResourceConsumptionValue,
+                                                    GlossaryEnergy.TechnoResourceDemands, GlossaryEnergy.StreamResourceConsumption),
+    GlossaryEnergy.StreamEnergyDemandValue: (GlossaryEnergy.TechnoEnergyDemandsValue,
+                                             GlossaryEnergy.TechnoEnergyDemands, GlossaryEnergy.StreamEnergyDemand),
+    GlossaryEnergy.StreamCCSDemandValue: (GlossaryEnergy.TechnoCCSDemandsValue,
+                                          GlossaryEnergy.TechnoCCSDemands, GlossaryEnergy.StreamCCSDemand),
+    GlossaryEnergy.StreamResourceDemandValue: (GlossaryEnergy.TechnoResourceDemandsValue,
+                                               GlossaryEnergy.TechnoResourceDemands, GlossaryEnergy.StreamResourceDemand),
+}
+
+
+def get_columns(inputs: dict, df_name: str) -> list:
+    """Columns of a flattened dataframe of the inputs, without the years"""
+    return [name.split(':', 1)[1] for name in inputs
+            if name.split(':', 1)[0] == df_name and name.split(':', 1)[1] != GlossaryEnergy.Years]
+
+
+def aggregate_technos_loop(stream_name: str, inputs: dict) -> dict:
+    """Outputs of a stream computed techno by techno and column by column, as BaseStream did before the tensors"""
+    technos = inputs[GlossaryEnergy.techno_list]
+    conversion_dict = GlossaryEnergy.conversion_dict
+    production_factor = conversion_dict[GlossaryEnergy.TechnoProductionDf['unit']][GlossaryEnergy.StreamProductionDf['unit']]
+    units_renaming = list(zip(GlossaryEnergy.TechnoProductionDf['unit'].split(' or '),
+                              GlossaryEnergy.StreamProductionDf['unit'].split(' or ')))
+
+    def aggregate(output_varname, input_varname, conversion_factor, renaming=()):
+        aggregated = {}
+        for techno in technos:
+            for column in get_columns(inputs, f'{techno}.{input_varname}'):
+                output_column = column
+                for input_unit, output_unit in renaming:
+                    output_column = output_column.replace(f'({input_unit})', f'({output_unit})')
+                value = inputs[f'{techno}.{input_varname}:{column}'] * conversion_factor
+                output_path = f'{output_varname}:{output_column}'
+                aggregated[output_path] = aggregated[output_path] + value if output_path in aggregated else value
+        return aggregated
+
+    outputs = aggregate(GlossaryEnergy.StreamProductionValue, GlossaryEnergy.TechnoProductionValue, production_factor, units_renaming)
+    for output_varname, (input_varname, input_unit, output_unit) in AGGREGATED_VARIABLES.items():
+        outputs.update(aggregate(output_varname, input_varname, conversion_dict[input_unit['unit']][output_unit['unit']]))
+
+    stream_production = outputs[f'{GlossaryEnergy.StreamProductionValue}:{stream_name}']
+    for techno in technos:
+        techno_production = inputs[f'{techno}.{GlossaryEnergy.TechnoProductionValue}:{stream_name}']
+        outputs[f'techno_mix:{techno}'] = techno_production * production_factor / (stream_production + 1e-9) * 100.
+
+    for column in (stream_name, f'{stream_name}_wotaxes'):
+        outputs[f'{GlossaryEnergy.StreamPricesValue}:{column}'] = sum(
+            inputs[f'{techno}.{GlossaryEnergy.TechnoPricesValue}:{column.replace(stream_name, techno)}'] *
+            outputs[f'techno_mix:{techno}'] / 100. for techno in technos)
+    for ghg in GlossaryEnergy.GreenHouseGases:
+        outputs[f'{GlossaryEnergy.StreamScope1GHGEmissionsValue}:{ghg}'] = sum(
+            inputs[f'{techno}.{GlossaryEnergy.TechnoScope1GHGEmissionsValue}:{ghg}'] for techno in technos)
+        outputs[f'{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}'] = sum(
+            inputs[f'{techno}.{GlossaryEnergy.TechnoScope1GHGEmissionsValue}:{ghg}'] * outputs[f'techno_mix:{techno}'] / 100.
+            for techno in technos)
+
+    land_use_factor = conversion_dict[GlossaryEnergy.TechnoLandUseDf['unit']][GlossaryEnergy.StreamLandUseDf['unit']]
+    outputs[f'{GlossaryEnergy.LandUseRequiredValue}:Land use'] = sum(
+        inputs[f'{techno}.{GlossaryEnergy.LandUseRequiredValue}:Land use'] * land_use_factor for techno in technos)
+    for column in (GlossaryEnergy.Capital, GlossaryEnergy.NonUseCapital):
+        outputs[f'{GlossaryEnergy.EnergyTypeCapitalDfValue}:{column}'] = sum(
+            inputs[f'{techno}.{GlossaryEnergy.TechnoCapitalValue}:{column}'] for techno in technos)
+    return outputs
+
+
+class BaseStreamAggregationTestCase(unittest.TestCase):
+    """
+    Aggregation of the technos of a stream against the techno by techno computation, with by-products and technos
+    missing some columns of the others
+    """
+
+    def setUp(self):
+        self.rng = np.random.default_rng(3)
+        self.stream_name = GlossaryEnergy.electricity
+        self.years = np.arange(2020, 2041)
+        mass_unit, energy_unit = GlossaryEnergy.mass_unit, GlossaryEnergy.energy_unit
+        technos_columns = {
+            # main stream, a captured by-product and a heat by-product
+            'TechnoA': {
+                GlossaryEnergy.TechnoProductionValue: [self.stream_name, f'{GlossaryEnergy.carbon_captured} ({mass_unit})',
+                                                       f'heat ({energy_unit})'],
+                GlossaryEnergy.TechnoEnergyConsumptionValue: [f'{GlossaryEnergy.methane} ({energy_unit})'],
+                GlossaryEnergy.TechnoEnergyDemandsValue: [f'{GlossaryEnergy.methane} ({energy_unit})'],
+                GlossaryEnergy.TechnoResourceConsumptionValue: [f'{GlossaryEnergy.CopperResource} ({mass_unit})'],
+                GlossaryEnergy.TechnoResourceDemandsValue: [f'{GlossaryEnergy.CopperResource} ({mass_unit})'],
+                GlossaryEnergy.TechnoCCSConsumptionValue: [f'{GlossaryEnergy.carbon_storage} ({mass_unit})'],
+                GlossaryEnergy.TechnoCCSDemandsValue: [f'{GlossaryEnergy.carbon_storage} ({mass_unit})'],
+            },
+            # by-products in another order, and a resource the other technos do not consume
+            'TechnoB': {
+                GlossaryEnergy.TechnoProductionValue: [f'heat ({energy_unit})', self.stream_name],
+                GlossaryEnergy.TechnoEnergyConsumptionValue: [f'{GlossaryEnergy.hydrogen} ({energy_unit})',
+                                                              f'{GlossaryEnergy.methane} ({energy_unit})'],
+                GlossaryEnergy.TechnoEnergyDemandsValue: [f'{GlossaryEnergy.hydrogen} ({energy_unit})'],
+                GlossaryEnergy.TechnoResourceConsumptionValue: [f'{GlossaryEnergy.WaterResource} ({mass_unit})',
+                                                                f'{GlossaryEnergy.CopperResource} ({mass_unit})'],
+                GlossaryEnergy.TechnoResourceDemandsValue: [f'{GlossaryEnergy.WaterResource} ({mass_unit})'],
+                GlossaryEnergy.TechnoCCSConsumptionValue: [],
+                GlossaryEnergy.TechnoCCSDemandsValue: [],
+            },
+            # main stream only, no consumption nor demand
+            'TechnoC': {
+                GlossaryEnergy.TechnoProductionValue: [self.stream_name],
+                **{varname: [] for varname, _, _ in AGGREGATED_VARIABLES.values()},
+            },
+        }
+        self.technos = list(technos_columns)
+        self.inputs = {GlossaryEnergy.YearStart: self.years[0], GlossaryEnergy.YearEnd: self.years[-1],
+                       GlossaryEnergy.techno_list: self.technos}
+        for techno, dataframes_columns in technos_columns.items():
+            dataframes_columns = dict(dataframes_columns, **{
+                GlossaryEnergy.TechnoPricesValue: [techno, f'{techno}_wotaxes'],
+                GlossaryEnergy.LandUseRequiredValue: ['Land use'],
+                GlossaryEnergy.TechnoCapitalValue: [GlossaryEnergy.Capital, GlossaryEnergy.NonUseCapital],
+                GlossaryEnergy.TechnoScope1GHGEmissionsValue: GlossaryEnergy.GreenHouseGases,
+            })
+            for df_name, columns in dataframes_columns.items():
+                self.inputs[f'{techno}.{df_name}:{GlossaryEnergy.Years}'] = self.years
+                for column in columns:
+                    self.inputs[f'{techno}.{df_name}:{column}'] = self.rng.uniform(1., 100., len(self.years))
+        # a techno not producing at the start
+        self.inputs[f'TechnoB.{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}'][:5] = 0.
+
+    def compute_stream(self, inputs: dict, xp=np) -> dict:
+        stream = BaseStream(self.stream_name)
+        stream.np = xp
+        stream.inputs = dict(inputs)
+        stream.compute()
+        return stream.outputs
+
+    def test_01_aggregation_vs_loops(self):
+        outputs = self.compute_stream(self.inputs)
+        expected_outputs = aggregate_technos_loop(self.stream_name, self.inputs)
+        outputs_columns = {}
+        for name in outputs:
+            df_name, column = name.split(':', 1)
+            if column != GlossaryEnergy.Years and not df_name.startswith(('energy_detailed_techno_prices',
+                                                                           GlossaryEnergy.StreamProductionDetailedValue)):
+                outputs_columns.setdefault(df_name, []).append(column)
+        expected_columns = {}
+        for name in expected_outputs:
+            df_name, column = name.split(':', 1)
+            expected_columns.setdefault(df_name, []).append(column)
+        # same columns, in the same order, for each aggregated dataframe
+        self.assertEqual(outputs_columns, expected_columns)
+        for name, expected_value in expected_outputs.items():
+            np.testing.assert_allclose(outputs[name], expected_value, rtol=1e-12, err_msg=name)
+
+        # aggregated dataframes without any column in the technos have only years
+        self.assertEqual(get_columns(outputs, GlossaryEnergy.StreamCCSConsumptionValue),
+                         [f'{GlossaryEnergy.carbon_storage} ({GlossaryEnergy.mass_unit})'])
+        for techno in self.technos:
+            np.testing.assert_allclose(outputs[f'energy_detailed_techno_prices:{techno}'],
+                                       self.inputs[f'{techno}.{GlossaryEnergy.TechnoPricesValue}:{techno}'])
+
+    def test_02_gradients_vs_loops(self):
+        """Gradients of the prices and intensities, which depend on the productions through the techno mix"""
+        for input_name in (f'TechnoB.{GlossaryEnergy.TechnoProductionValue}:{self.stream_name}',
+                           f'TechnoA.{GlossaryEnergy.TechnoPricesValue}:TechnoA',
+                           f'TechnoC.{GlossaryEnergy.TechnoScope1GHGEmissionsValue}:{GlossaryEnergy.GreenHouseGases[0]}'):
+            def objective(value, compute):
+                outputs = compute(dict(self.inputs, **{input_name: value}))
+                return autograd_np.sum(outputs[f'{GlossaryEnergy.StreamPricesValue}:{self.stream_name}']) + \
+                    autograd_np.sum(outputs[f'{GlossaryEnergy.StreamScope1GHGIntensityValue}:{GlossaryEnergy.GreenHouseGases[0]}'])
+
+            gradient = grad(objective)(self.inputs[input_name], lambda inputs: self.compute_stream(inputs, autograd_np))
+            expected_gradient = grad(objective)(self.inputs[input_name],
+                                                lambda inputs: aggregate_technos_loop(self.stream_name, inputs))
+            np.testing.assert_allclose(gradient, expected_gradient, rtol=1e-10, atol=1e-14, err_msg=input_name)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,123 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+from autograd import jacobian
+from autograd import numpy as autograd_np
+
+from energy_models.glossaryenergy import GlossaryEnergy
+from energy_models.models.electricity.wind_onshore.wind_onshore import WindOnshore
+from energy_models.tests.techno_model_inputs import (
+    INVEST_COLUMN,
+    get_wind_onshore_inputs,
+)
+
+
+def capex_learning_curve_loop(xp, invests, initial_capex: float, techno_infos_dict: dict, initial_production: float):
+    """Capex learning curve computed year by year, as TechnoType.compute_capex did before it was vectorized"""
+    invests = invests * 1e3
+    expo_factor = -np.log(1.0 - techno_infos_dict['learning_rate']) / np.log(2.0)
+    if expo_factor == 0.0:
+        return initial_capex * xp.ones(len(invests))
+    capacity_factor = None
+    if 'capacity_factor_at_year_end' in techno_infos_dict and 'capacity_factor' in techno_infos_dict:
+        capacity_factor = np.linspace(techno_infos_dict['capacity_factor'], techno_infos_dict['capacity_factor_at_year_end'], len(invests))
+
+    capex_calc_list = []
+    invest_sum = initial_production * initial_capex
+    capex_year = initial_capex
+    for i, invest in enumerate(invests):
+        if invest_sum < 10.0 or i == 0:
+            capex_year = initial_capex
+        else:
+            if capacity_factor is not None:
+                ratio_invest = ((invest_sum + invest) / invest_sum *
+                                (capacity_factor[i] / techno_infos_dict['capacity_factor'])) ** (-expo_factor)
+            else:
+                ratio_invest = ((invest_sum + invest) / invest_sum) ** (-expo_factor)
+            if ratio_invest < 0.95:
+                ratio_invest = 0.9 + 0.05 * xp.exp(ratio_invest - 0.9)
+            capex_year = capex_year * ratio_invest
+        capex_calc_list.append(capex_year)
+        invest_sum = invest_sum + invest
+
+    maximum_learning_capex_ratio = techno_infos_dict.get('maximum_learning_capex_ratio', 0.9)
+    return initial_capex * (maximum_learning_capex_ratio + (1.0 - maximum_learning_capex_ratio) * xp.array(capex_calc_list) / initial_capex)
+
+
+class CapexLearningCurveTestCase(unittest.TestCase):
+    """Check the vectorized capex learning curve against the year by year computation, values and gradients"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(2)
+        self.inputs = get_wind_onshore_inputs()
+        self.n_years = len(self.inputs[INVEST_COLUMN])
+
+    def get_cases(self):
+        """(name, inputs) with and without the capacity factor evolution, resets of the learning and no learning"""
+        techno_infos_dict = self.inputs['techno_infos_dict']
+        without_capacity_factor_evolution = {key: value for key, value in techno_infos_dict.items() if key != 'capacity_factor_at_year_end'}
+        low_invests = self.rng.uniform(0., 50., self.n_years) * (self.rng.uniform(size=self.n_years) > 0.3)
+        low_invests[:5] = 0.
+        return [
+            ('capacity factor at year end', self.inputs),
+            ('constant capacity factor', dict(self.inputs, techno_infos_dict=without_capacity_factor_evolution)),
+            ('maximum learning capex ratio', dict(self.inputs, techno_infos_dict=dict(techno_infos_dict, learning_rate=0.25,
+                                                                                     maximum_learning_capex_ratio=0.5))),
+            ('learning resets', dict(self.inputs, initial_production=0., **{INVEST_COLUMN: low_invests})),
+            ('no learning', dict(self.inputs, techno_infos_dict=dict(techno_infos_dict, learning_rate=0.))),
+        ]
+
+    @staticmethod
+    def get_model(inputs: dict, xp=np) -> WindOnshore:
+        model = WindOnshore(GlossaryEnergy.WindOnshore)
+        model.np = xp
+        model.inputs = dict(inputs)
+        model.configure_parameters_update()
+        return model
+
+    def test_01_values_and_gradients(self):
+        for name, inputs in self.get_cases():
+            model = self.get_model(inputs)
+            initial_capex = model.capex_unity_harmonizer()
+            args = (initial_capex, inputs['techno_infos_dict'], inputs['initial_production'])
+            np.testing.assert_allclose(model.compute_capex(),
+                                       capex_learning_curve_loop(np, inputs[INVEST_COLUMN], *args), rtol=1e-12, err_msg=name)
+
+            model = self.get_model(inputs, xp=autograd_np)
+
+            def capex(invests):
+                model.inputs[INVEST_COLUMN] = invests
+                return model.compute_capex()
+
+            gradient = jacobian(capex)(inputs[INVEST_COLUMN])
+            expected_gradient = jacobian(lambda invests: capex_learning_curve_loop(autograd_np, invests, *args))(inputs[INVEST_COLUMN])
+            np.testing.assert_allclose(gradient, expected_gradient, rtol=1e-10, atol=1e-12 * np.abs(expected_gradient).max(), err_msg=name)
+
+    def test_02_scenarios_axis(self):
+        """Capex of a batch of investments scenarios, [n_scenarios, n_years], computed at once"""
+        for name, inputs in self.get_cases():
+            invests = np.stack([inputs[INVEST_COLUMN], self.rng.uniform(0., 80., self.n_years), np.zeros(self.n_years)])
+            capex = self.get_model(dict(inputs, **{INVEST_COLUMN: invests})).compute_capex()
+            self.assertEqual(capex.shape, invests.shape, name)
+            for scenario_invests, scenario_capex in zip(invests, capex):
+                expected_capex = self.get_model(dict(inputs, **{INVEST_COLUMN: scenario_invests})).compute_capex()
+                np.testing.assert_allclose(scenario_capex, expected_capex, rtol=1e-12, err_msg=name)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,184 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+from autograd import jacobian
+from autograd import numpy as autograd_np
+
+from energy_models.core.ccus.ccus import CCUS
+from energy_models.glossaryenergy import GlossaryEnergy
+
+CARBON_CAPTURED = GlossaryEnergy.carbon_captured
+CARBON_STORAGE = GlossaryEnergy.carbon_storage
+ENERGY_MIX_DEMAND = f"{GlossaryEnergy.EnergyMixCCSDemandsDfValue}:{CARBON_CAPTURED}"
+ENERGY_MIX_CONSUMPTION = f"{GlossaryEnergy.EnergyMixCCSConsumptionDfValue}:{CARBON_CAPTURED}"
+
+
+def get_columns(inputs: dict, df_name: str) -> list:
+    """Columns of a flattened dataframe of the inputs, without the years"""
+    return [name.split(':', 1)[1] for name in inputs
+            if name.split(':', 1)[0] == df_name and name.split(':', 1)[1] != GlossaryEnergy.Years]
+
+
+def ccus_loops(inputs: dict) -> dict:
+    """Outputs of the CCUS model computed stream by stream, as CCUS did before compute_ccus_streams"""
+    conversion_dict = GlossaryEnergy.conversion_dict
+    production_factor = conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][GlossaryEnergy.CCUSOutput['unit']]
+    outputs = {}
+    for stream in (CARBON_STORAGE, CARBON_CAPTURED):
+        outputs[f"{GlossaryEnergy.CCUSOutputValue}:{stream}"] = inputs[f"{stream}.{GlossaryEnergy.StreamProductionValue}:{stream}"] * production_factor
+    to_store = outputs[f"{GlossaryEnergy.CCUSOutputValue}:{CARBON_CAPTURED}"] - inputs[ENERGY_MIX_CONSUMPTION]
+    outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured to store (after direct usages)"] = to_store
+    outputs[f"{GlossaryEnergy.CCUSOutputValue}:Carbon captured and stored"] = autograd_np.minimum(
+        to_store, outputs[f"{GlossaryEnergy.CCUSOutputValue}:{CARBON_STORAGE}"])
+
+    captured = inputs[f"{CARBON_CAPTURED}.{GlossaryEnergy.StreamProductionValue}:{CARBON_CAPTURED}"] * \
+        conversion_dict[GlossaryEnergy.StreamProductionDf['unit']]["Gt"]
+    energy_mix_demand = inputs[ENERGY_MIX_DEMAND] * conversion_dict[GlossaryEnergy.EnergyMixCCSDemandsDf['unit']]["Gt"]
+    outputs[f"{CARBON_CAPTURED}_demand_breakdown"] = {"Carbon captured demand for Energy Mix": energy_mix_demand}
+    outputs[f"{CARBON_STORAGE}_demand_breakdown"] = {"Carbon captured by CCUS": captured,
+                                                     "Carbon captured demand for Energy Mix": - energy_mix_demand}
+    outputs[f"demands_df:{CARBON_STORAGE}"] = captured - energy_mix_demand
+    outputs[f"demands_df:{CARBON_CAPTURED}"] = energy_mix_demand
+
+    for output_varname, flow_varname, input_dict, output_dict in (
+            (f"{GlossaryEnergy.CCUS}_{GlossaryEnergy.EnergyDemandValue}", GlossaryEnergy.StreamEnergyDemandValue,
+             GlossaryEnergy.StreamEnergyDemand, GlossaryEnergy.EnergyDemandDf),
+            (f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.EnergyConsumptionValue}", GlossaryEnergy.StreamEnergyConsumptionValue,
+             GlossaryEnergy.StreamEnergyConsumption, GlossaryEnergy.EnergyConsumptionDf)):
+        conversion_factor = conversion_dict[input_dict['unit']][output_dict['unit']]
+        for stream in CCUS.ccs_list:
+            for energy in get_columns(inputs, f'{stream}.{flow_varname}'):
+                output_path = f"{output_varname}:{energy}"
+                outputs[output_path] = outputs.get(output_path, 0.) + inputs[f'{stream}.{flow_varname}:{energy}'] * conversion_factor
+
+    land_use_factor = conversion_dict[GlossaryEnergy.StreamLandUseDf['unit']][GlossaryEnergy.StreamLandUseDf['unit']]
+    outputs[f"{GlossaryEnergy.CCUS}.{GlossaryEnergy.LandUseRequiredValue}:Land use"] = sum(
+        inputs[f"{stream}.{GlossaryEnergy.LandUseRequiredValue}:Land use"] * land_use_factor for stream in CCUS.ccs_list)
+    outputs[f"{GlossaryEnergy.CCUS_CO2EmissionsDfValue}:{GlossaryEnergy.CO2}"] = \
+        inputs[f"{CARBON_CAPTURED}.{GlossaryEnergy.StreamProductionValue}:{CARBON_CAPTURED}"] * \
+        conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][GlossaryEnergy.CCUS_CO2EmissionsDf['unit']]
+
+    for stream in (CARBON_CAPTURED, CARBON_STORAGE):
+        outputs[f"{GlossaryEnergy.CCUSAvailabilityRatiosValue}:{stream}"] = autograd_np.maximum(autograd_np.minimum(
+            outputs[f"{GlossaryEnergy.CCUSOutputValue}:{stream}"] / (outputs[f"demands_df:{stream}"] + 1e-6), 1), 0) * 100.
+    outputs[f'{GlossaryEnergy.CCUSPriceValue}:Captured and stored'] = \
+        inputs[f"{CARBON_CAPTURED}.{GlossaryEnergy.StreamPricesValue}:{CARBON_CAPTURED}"] + \
+        inputs[f"{CARBON_STORAGE}.{GlossaryEnergy.StreamPricesValue}:{CARBON_STORAGE}"]
+    return outputs
+
+
+class CCUSModelTestCase(unittest.TestCase):
+    """Check the CCUS model against the stream by stream computation, and its diagonal jacobian against autograd"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(4)
+        self.years = np.arange(2020, 2036)
+        self.production_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit']][GlossaryEnergy.CCUSOutput['unit']]
+        self.demand_to_gt = GlossaryEnergy.conversion_dict[GlossaryEnergy.EnergyMixCCSDemandsDf['unit']]["Gt"]
+
+    def get_inputs(self) -> dict:
+        n_years = len(self.years)
+        inputs = {GlossaryEnergy.YearStart: self.years[0], GlossaryEnergy.YearEnd: self.years[-1]}
+        # demand of the energy mix around the production of carbon captured, in the units compared by the availability
+        # ratio, to have saturated and unsaturated ratios
+        captured = self.rng.uniform(1., 3., n_years)
+        inputs[ENERGY_MIX_DEMAND] = captured * self.production_factor / self.demand_to_gt * self.rng.uniform(0.2, 2., n_years)
+        inputs[ENERGY_MIX_CONSUMPTION] = self.rng.uniform(0., 1., n_years) * captured * self.production_factor
+        # carbon captured and carbon storage use different energies, electricity is used by both
+        for stream, energies in ((CARBON_CAPTURED, [GlossaryEnergy.electricity, GlossaryEnergy.methane]),
+                                 (CARBON_STORAGE, [GlossaryEnergy.electricity, GlossaryEnergy.hydrogen])):
+            inputs[f'{stream}.{GlossaryEnergy.StreamProductionValue}:{stream}'] = \
+                captured if stream == CARBON_CAPTURED else self.rng.uniform(0.5, 2., n_years)
+            inputs[f'{stream}.{GlossaryEnergy.StreamPricesValue}:{stream}'] = self.rng.uniform(10., 100., n_years)
+            inputs[f'{stream}.{GlossaryEnergy.LandUseRequiredValue}:Land use'] = self.rng.uniform(0., 1., n_years)
+            for energy in energies:
+                inputs[f'{stream}.{GlossaryEnergy.StreamEnergyDemandValue}:{energy}'] = self.rng.uniform(0., 10., n_years)
+                inputs[f'{stream}.{GlossaryEnergy.StreamEnergyConsumptionValue}:{energy}'] = self.rng.uniform(0., 10., n_years)
+        return inputs
+
+    def get_edge_cases_inputs(self) -> dict:
+        """Inputs on the kinks : carbon stored limited by both terms at once, availability ratios exactly 0 and 1"""
+        inputs = self.get_inputs()
+        storage_path = f'{CARBON_STORAGE}.{GlossaryEnergy.StreamProductionValue}:{CARBON_STORAGE}'
+        captured_path = f'{CARBON_CAPTURED}.{GlossaryEnergy.StreamProductionValue}:{CARBON_CAPTURED}'
+        # carbon captured to store equal to the storage capacity
+        inputs[ENERGY_MIX_CONSUMPTION][0] = 0.
+        inputs[storage_path][0] = inputs[captured_path][0]
+        # no carbon captured : null ratio
+        inputs[captured_path][1] = 0.
+        # carbon captured ratio exactly 1
+        demand = inputs[ENERGY_MIX_DEMAND][2] * self.demand_to_gt + 1e-6
+        inputs[captured_path][2] = demand / self.production_factor
+        for _ in range(1000):
+            if inputs[captured_path][2] * self.production_factor / demand == 1.:
+                break
+            inputs[captured_path][2] = np.nextafter(inputs[captured_path][2], np.inf)
+        return inputs
+
+    def compute_ccus(self, inputs: dict, xp=np) -> CCUS:
+        model = CCUS(sosname=GlossaryEnergy.CCUS)
+        model.np = xp
+        model.inputs = dict(inputs)
+        model.compute()
+        return model
+
+    def test_01_outputs_vs_loops(self):
+        for inputs in (self.get_inputs(), self.get_edge_cases_inputs()):
+            outputs = self.compute_ccus(inputs).outputs
+            expected_outputs = ccus_loops(inputs)
+            self.assertEqual({path for path in outputs if not path.endswith(f':{GlossaryEnergy.Years}')}, set(expected_outputs))
+            for df_name in {path.split(':', 1)[0] for path in expected_outputs if ':' in path}:
+                self.assertEqual(get_columns(outputs, df_name), get_columns(expected_outputs, df_name), df_name)
+            for path, expected_value in expected_outputs.items():
+                if isinstance(expected_value, dict):
+                    self.assertEqual(list(outputs[path]), list(expected_value), path)
+                    for key, value in expected_value.items():
+                        np.testing.assert_allclose(outputs[path][key], value, rtol=1e-12, err_msg=f'{path} {key}')
+                else:
+                    np.testing.assert_allclose(outputs[path], expected_value, rtol=1e-12, err_msg=path)
+
+    def test_02_diagonal_jacobian_vs_autograd(self):
+        n_years = len(self.years)
+        for inputs in (self.get_inputs(), self.get_edge_cases_inputs()):
+            model = self.compute_ccus(inputs)
+            diagonal_jacobian = model.compute_diagonal_jacobian()
+            outputs_paths = [path for path in model.outputs if ':' in path and not path.endswith(f':{GlossaryEnergy.Years}')]
+            inputs_paths = [path for path, value in inputs.items() if isinstance(value, np.ndarray)]
+
+            def outputs(flat_inputs, inputs=inputs, inputs_paths=inputs_paths, outputs_paths=outputs_paths):
+                """All the outputs as a function of all the inputs, differentiated at once"""
+                differentiated_inputs = dict(inputs, **{path: flat_inputs[i * n_years:(i + 1) * n_years] for i, path in enumerate(inputs_paths)})
+                model = self.compute_ccus(differentiated_inputs, autograd_np)
+                return autograd_np.concatenate([model.outputs[path] * autograd_np.ones(n_years) for path in outputs_paths])
+
+            full_jacobian = jacobian(outputs)(np.concatenate([inputs[path] for path in inputs_paths]))
+            for i, output_path in enumerate(outputs_paths):
+                for j, input_path in enumerate(inputs_paths):
+                    block = full_jacobian[i * n_years:(i + 1) * n_years, j * n_years:(j + 1) * n_years]
+                    diagonal = diagonal_jacobian.get(output_path, {}).get(input_path)
+                    expected_block = np.zeros_like(block) if diagonal is None else np.diag(np.broadcast_to(diagonal, (n_years,)))
+                    np.testing.assert_allclose(block, expected_block, rtol=1e-10, atol=1e-12 * (1. + np.abs(block).max()),
+                                               err_msg=f'{output_path} / {input_path}')
+
+        ratios = model.outputs[f"{GlossaryEnergy.CCUSAvailabilityRatiosValue}:{CARBON_CAPTURED}"]
+        self.assertEqual(list(ratios[1:3]), [0., 100.])
+        self.assertTrue(np.any((ratios > 0.) & (ratios < 100.)))
+
+
+if '__main__' == __name__:
+    unittest.main()
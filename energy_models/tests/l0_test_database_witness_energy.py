@@ -0,0 +1,69 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from energy_models.database_witness_energy import DatabaseWitnessEnergy
+from energy_models.glossaryenergy import GlossaryEnergy
+
+
+class DatabaseWitnessEnergyTestCase(unittest.TestCase):
+    """Check the process-wide store of historical techno data"""
+
+    def setUp(self):
+        DatabaseWitnessEnergy.clear_techno_data_store()
+        self.techno_name = GlossaryEnergy.Nuclear
+
+    def tearDown(self):
+        DatabaseWitnessEnergy.clear_techno_data_store()
+
+    def test_01_one_load_per_file(self):
+        prod, heavy_collected_data = DatabaseWitnessEnergy.get_techno_prod(self.techno_name, year=2020)
+        other_prod, other_heavy_collected_data = DatabaseWitnessEnergy.get_techno_prod(self.techno_name, year=2020)
+        self.assertIs(heavy_collected_data, other_heavy_collected_data)
+        self.assertEqual(prod, other_prod)
+        self.assertEqual(prod, heavy_collected_data.get_value_at_year(year=2020))
+
+        invest_df, _ = DatabaseWitnessEnergy.get_techno_invest_before_year_start(self.techno_name, year_start=2020, construction_delay=3)
+        invest_df["invest"] = 0.
+        other_invest_df, _ = DatabaseWitnessEnergy.get_techno_invest_before_year_start(self.techno_name, year_start=2020, construction_delay=3)
+        self.assertFalse((other_invest_df["invest"] == 0.).all())
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda year: DatabaseWitnessEnergy.get_techno_age_distrib_factor(self.techno_name, year=year), [2020] * 16))
+        self.assertEqual(len({id(heavy_collected_data) for _, heavy_collected_data in results}), 1)
+
+    def test_02_reload_modified_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path_to_csv = DatabaseWitnessEnergy.get_techno_data_path(folder, self.techno_name)
+            pd.DataFrame({"years": [2019, 2020], "production": [1., 2.], "unit": "TWh"}).to_csv(path_to_csv, index=False)
+            heavy_collected_data = DatabaseWitnessEnergy.get_techno_heavy_collected_data(folder, self.techno_name, "production")
+            self.assertIs(heavy_collected_data, DatabaseWitnessEnergy.get_techno_heavy_collected_data(folder, self.techno_name, "production"))
+
+            pd.DataFrame({"years": [2019, 2020], "production": [1., 3.], "unit": "TWh"}).to_csv(path_to_csv, index=False)
+            modification_time = os.path.getmtime(path_to_csv) + 1.
+            os.utime(path_to_csv, (modification_time, modification_time))
+            new_heavy_collected_data = DatabaseWitnessEnergy.get_techno_heavy_collected_data(folder, self.techno_name, "production")
+            self.assertIsNot(heavy_collected_data, new_heavy_collected_data)
+            self.assertEqual(new_heavy_collected_data.get_value_at_year(year=2020), 3.)
+
+
+if '__main__' == __name__:
+    unittest.main()
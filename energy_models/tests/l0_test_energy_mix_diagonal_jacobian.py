@@ -0,0 +1,167 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import logging
+import unittest
+
+import numpy as np
+from autograd import jacobian
+from autograd import numpy as autograd_np
+
+from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.glossaryenergy import GlossaryEnergy
+
+
+def find_exact_input(output_function, value: float, target: float) -> float:
+    """Float next to value for which output_function(value) is exactly target, to reach the kinks of the model"""
+    for direction in (np.inf, -np.inf):
+        candidate = value
+        for _ in range(1000):
+            if output_function(candidate) == target:
+                return candidate
+            candidate = np.nextafter(candidate, direction)
+    raise ValueError(f'no input found reaching {target}')
+
+
+class EnergyMixDiagonalJacobianTestCase(unittest.TestCase):
+    """Check the analytical diagonal jacobian of the energy mix against the automatic differentiation, block by block"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.years = np.arange(2020, 2036)
+        self.energies = [GlossaryEnergy.methane, GlossaryEnergy.electricity, GlossaryEnergy.clean_energy, GlossaryEnergy.fossil]
+        self.production_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamProductionDf['unit'].split(' or ')[0]][
+            GlossaryEnergy.EnergyMixRawProduction['unit']]
+        self.demand_factor = GlossaryEnergy.conversion_dict[GlossaryEnergy.StreamEnergyDemand['unit']][
+            GlossaryEnergy.EnergyMixEnergiesDemandsDf['unit']]
+
+    def get_inputs(self) -> dict:
+        n_years = len(self.years)
+        inputs = {GlossaryEnergy.YearStart: self.years[0], GlossaryEnergy.YearEnd: self.years[-1],
+                  GlossaryEnergy.energy_list: self.energies, 'heat_losses_percentage': 7.,
+                  f'{GlossaryEnergy.TargetEnergyProductionValue}:{GlossaryEnergy.TargetEnergyProductionValue}':
+                      self.rng.uniform(50., 150., n_years) / self.production_factor}
+        for i, energy in enumerate(self.energies):
+            inputs[f'{energy}.{GlossaryEnergy.StreamProductionValue}:{energy}'] = self.rng.uniform(20., 40., n_years)
+            # each energy consumes some of the others, and a resource that is not produced in the energy mix
+            consumed_streams = [stream for stream in self.energies if stream != energy][:i + 1] + [f'{GlossaryEnergy.WaterResource} ({GlossaryEnergy.mass_unit})']
+            for stream in consumed_streams:
+                inputs[f'{energy}.{GlossaryEnergy.StreamEnergyConsumptionValue}:{stream}'] = self.rng.uniform(1., 5., n_years)
+                inputs[f'{energy}.{GlossaryEnergy.StreamEnergyDemandValue}:{stream}'] = self.rng.uniform(1., 30., n_years)
+            if i % 2:
+                for flow_varname in (GlossaryEnergy.StreamCCSDemandValue, GlossaryEnergy.StreamCCSConsumptionValue):
+                    inputs[f'{energy}.{flow_varname}:{GlossaryEnergy.carbon_captured}'] = self.rng.uniform(0., 1., n_years)
+            inputs[f'{energy}.{GlossaryEnergy.StreamPricesValue}:{energy}'] = self.rng.uniform(50., 100., n_years)
+            for ghg in GlossaryEnergy.GreenHouseGases:
+                inputs[f'{energy}.{GlossaryEnergy.StreamScope1GHGEmissionsValue}:{ghg}'] = self.rng.uniform(0., 1., n_years)
+                inputs[f'{energy}.{GlossaryEnergy.StreamScope1GHGIntensityValue}:{ghg}'] = self.rng.uniform(0., 1., n_years)
+            inputs[f'{energy}.{GlossaryEnergy.LandUseRequiredValue}:{energy} (Gha)'] = self.rng.uniform(0., 1., n_years)
+            for column in (GlossaryEnergy.Capital, GlossaryEnergy.NonUseCapital):
+                inputs[f'{energy}.{GlossaryEnergy.EnergyTypeCapitalDfValue}:{column}'] = self.rng.uniform(0., 1., n_years)
+        return inputs
+
+    def compute_energy_mix(self, inputs: dict, xp=np) -> EnergyMix:
+        model = EnergyMix('EnergyMix', logging.getLogger(__name__))
+        model.np = xp
+        model.inputs = dict(inputs)
+        model.compute()
+        return model
+
+    def check_diagonal_jacobian(self, inputs: dict):
+        """Every block of the automatic differentiation is the diagonal one, or null when no diagonal is given"""
+        model = self.compute_energy_mix(inputs)
+        diagonal_jacobian = model.compute_diagonal_jacobian()
+        n_years = len(self.years)
+        outputs_paths = [path for path in model.outputs if path.split(':', 1)[1] != GlossaryEnergy.Years]
+        self.assertTrue(set(diagonal_jacobian) <= set(outputs_paths))
+        inputs_paths = [path for path, value in inputs.items() if isinstance(value, (float, np.ndarray))]
+        inputs_sizes = [np.size(inputs[path]) for path in inputs_paths]
+        inputs_offsets = np.cumsum([0] + inputs_sizes)
+
+        def outputs(flat_inputs):
+            """All the outputs as a function of all the inputs, differentiated at once"""
+            differentiated_inputs = dict(inputs)
+            for path, start, end in zip(inputs_paths, inputs_offsets[:-1], inputs_offsets[1:]):
+                differentiated_inputs[path] = flat_inputs[start] if np.ndim(inputs[path]) == 0 else flat_inputs[start:end]
+            model = self.compute_energy_mix(differentiated_inputs, autograd_np)
+            return autograd_np.concatenate([model.outputs[path] * autograd_np.ones(n_years) for path in outputs_paths])
+
+        full_jacobian = jacobian(outputs)(np.concatenate([np.ravel(inputs[path]) for path in inputs_paths]))
+        for i, output_path in enumerate(outputs_paths):
+            for input_path, start, end in zip(inputs_paths, inputs_offsets[:-1], inputs_offsets[1:]):
+                block = full_jacobian[i * n_years:(i + 1) * n_years, start:end]
+                diagonal = diagonal_jacobian.get(output_path, {}).get(input_path)
+                if diagonal is None:
+                    expected_block = np.zeros_like(block)
+                elif np.ndim(inputs[input_path]) == 0:
+                    expected_block = np.broadcast_to(diagonal, (n_years,)).reshape(-1, 1)
+                else:
+                    expected_block = np.diag(np.broadcast_to(diagonal, (n_years,)))
+                np.testing.assert_allclose(block, expected_block, rtol=1e-10, atol=1e-12 * (1. + np.abs(block).max()),
+                                           err_msg=f'{output_path} / {input_path}')
+        return diagonal_jacobian
+
+    def test_01_diagonal_jacobian(self):
+        self.check_diagonal_jacobian(self.get_inputs())
+
+    def test_02_floors_and_saturations(self):
+        inputs = self.get_inputs()
+        methane, electricity, _, fossil = self.energies
+        raw_to_net = EnergyMix.raw_to_net_dict[fossil]
+
+        # net productions floored at 1e-3 : a consumption above the production, a coarse energy without production
+        inputs[f'{methane}.{GlossaryEnergy.StreamProductionValue}:{methane}'][:2] = 0.
+        inputs[f'{fossil}.{GlossaryEnergy.StreamProductionValue}:{fossil}'][2] = 0.
+        # coarse energy exactly at the floor, where the derivative is halved
+        inputs[f'{fossil}.{GlossaryEnergy.StreamProductionValue}:{fossil}'][3] = find_exact_input(
+            lambda production: raw_to_net * (production * self.production_factor), 1e-3 / raw_to_net / self.production_factor, 1e-3)
+
+        # availability ratio of electricity, production / (demand + 1e-6) :
+        electricity_demands = [path for path in inputs if path.endswith(f'{GlossaryEnergy.StreamEnergyDemandValue}:{electricity}')]
+        electricity_production = inputs[f'{electricity}.{GlossaryEnergy.StreamProductionValue}:{electricity}']
+        for path in electricity_demands:
+            inputs[path][4:8] = 0.
+        # no demand : the 1e-6 of the denominator gives an unsaturated ratio for a tiny production, saturated otherwise
+        electricity_production[4] = 4e-7 / self.production_factor
+        electricity_production[5] = 0.
+        # ratio exactly 1
+        for path in electricity_demands[1:]:
+            inputs[path][8] = 0.
+        demand = inputs[electricity_demands[0]][8] * self.demand_factor + 1e-6
+        electricity_production[8] = find_exact_input(
+            lambda production: production * self.production_factor / demand, demand / self.production_factor, 1.)
+        # unsaturated ratio
+        electricity_production[9] = 0.5 * sum(inputs[path][9] for path in electricity_demands) * self.demand_factor / self.production_factor
+
+        diagonal_jacobian = self.check_diagonal_jacobian(inputs)
+        model = self.compute_energy_mix(inputs)
+        net_production = model.outputs[f'{GlossaryEnergy.EnergyMixNetProductionsDfValue}:{fossil}']
+        self.assertEqual(net_production[3], 1e-3)
+        ratio = model.outputs[f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{electricity}']
+        np.testing.assert_allclose(ratio[4:10], [40., 0., 100., 100., 100., 50.], rtol=1e-9)
+        self.assertEqual(ratio[8], 100.)
+        ratio_partials = diagonal_jacobian[f'{GlossaryEnergy.AllStreamsDemandRatioValue}:{electricity}']
+        self.assertGreater(ratio_partials[f'{electricity}.{GlossaryEnergy.StreamProductionValue}:{electricity}'][4], 0.)
+
+    def test_03_heat_losses_and_target(self):
+        inputs = dict(self.get_inputs(), heat_losses_percentage=0.)
+        diagonal_jacobian = self.check_diagonal_jacobian(inputs)
+        constraint_partials = diagonal_jacobian[f'{GlossaryEnergy.TargetProductionConstraintValue}:{GlossaryEnergy.TargetProductionConstraintValue}']
+        self.assertIn('heat_losses_percentage', constraint_partials)
+        self.assertIn(f'{GlossaryEnergy.TargetEnergyProductionValue}:{GlossaryEnergy.TargetEnergyProductionValue}', constraint_partials)
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,77 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import json
+import subprocess
+import sys
+import unittest
+
+# Imports all the discipline modules of energy_models in a fresh interpreter, after the dependencies they share with
+# the execution engine. In 'eager' mode, the plotting modules of energy_models.core.lazy_charts are imported first
+# inside the timed block, as the disciplines did before importing them lazily : this is the baseline of the benchmark.
+# The globals of the energy_models modules are inspected for plotting modules or classes bound at import.
+IMPORT_SCRIPT = '''
+import importlib, json, pkgutil, sys, time, types
+import sostrades_core.execution_engine.sos_wrapp
+import sostrades_optimization_plugins.models.autodifferentiated_discipline
+import climateeconomics.glossarycore
+import energy_models
+from energy_models.core import lazy_charts
+plotting_modules = sorted({value._module_name for value in vars(lazy_charts).values()
+                           if isinstance(value, (lazy_charts.LazyModule, lazy_charts.LazyAttribute))})
+baseline_imports = [module_name for module_name in plotting_modules if module_name not in sys.modules]
+start = time.perf_counter()
+if sys.argv[1] == 'eager':
+    for module_name in baseline_imports:
+        importlib.import_module(module_name)
+modules_names = [module.name for module in pkgutil.walk_packages(energy_models.__path__, 'energy_models.')
+                 if module.name.endswith('_disc') and '.tests.' not in module.name]
+for module_name in modules_names:
+    importlib.import_module(module_name)
+import_time = time.perf_counter() - start
+eager_imports = sorted(f'{module_name}.{name}' for module_name, module in list(sys.modules.items())
+                       if module_name.startswith('energy_models.') and module_name != lazy_charts.__name__
+                       for name, value in vars(module).items()
+                       if (value.__name__ if isinstance(value, types.ModuleType)
+                           else getattr(value, '__module__', None)) in plotting_modules)
+print(json.dumps({'import_time': import_time, 'modules': len(modules_names), 'eager_imports': eager_imports,
+                  'baseline_imports': baseline_imports}))
+'''
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    """
+    Benchmark of the import time of the discipline modules, paid by each process building a study
+    """
+
+    @staticmethod
+    def run_import_script(mode: str) -> dict:
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT, mode], capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_01_import_disciplines(self):
+        lazy = self.run_import_script('lazy')
+        eager = self.run_import_script('eager')
+
+        # plotting modules and charts classes are bound to the disciplines when a chart is built, not at import
+        self.assertEqual(lazy['eager_imports'], [])
+        self.assertGreater(lazy['modules'], 0)
+        # the import of the plotting modules not already imported by the dependencies is not paid anymore
+        if eager['baseline_imports']:
+            self.assertLess(lazy['import_time'], eager['import_time'])
+
+
+if '__main__' == __name__:
+    unittest.main()
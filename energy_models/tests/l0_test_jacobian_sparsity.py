@@ -0,0 +1,169 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from energy_models.core.jacobian_sparsity import (
+    BANDED,
+    DENSE,
+    DETECT,
+    DIAGONAL,
+    SPARSE,
+    ZERO,
+    DiagonalJacobianMixin,
+    SparseJacobianMixin,
+    get_block_structure,
+    to_sparse_block,
+)
+
+
+class JacobianDisc:
+    def __init__(self):
+        self.jac = {}
+
+    def set_partial_derivative_for_other_types(self, y_key_column, x_key_column, value):
+        self.jac[(y_key_column, x_key_column)] = value
+
+
+class SparseJacobianDisc(SparseJacobianMixin, JacobianDisc):
+    jacobian_sparsity = {'prices': DETECT, ('prices', 'invest'): DENSE, 'co2_emissions': DIAGONAL}
+
+
+class DiagonalModel:
+    def __init__(self):
+        self.inputs = {}
+
+    def compute_diagonal_jacobian(self):
+        return {'prices:electricity': {'stream_prices:electricity': 2. * self.inputs['stream_prices:electricity'],
+                                       'heat_losses_percentage': self.inputs['stream_prices:electricity'] / 100.}}
+
+
+class AutodifferentiatedDisc(JacobianDisc):
+    def __init__(self, inputs: dict):
+        super().__init__()
+        self.inputs = inputs
+        self.model = DiagonalModel()
+        self.autodifferentiated = False
+
+    def get_sosdisc_inputs(self):
+        return self.inputs
+
+    def run(self):
+        # inputs of the model flattened as 'dataframe:column' or 'name'
+        self.model.inputs = {'heat_losses_percentage': self.inputs['heat_losses_percentage']}
+        for column in self.inputs['stream_prices'].columns:
+            self.model.inputs[f'stream_prices:{column}'] = self.inputs['stream_prices'][column].to_numpy()
+
+    def compute_sos_jacobian(self):
+        self.autodifferentiated = True
+
+
+class DiagonalJacobianDisc(DiagonalJacobianMixin, AutodifferentiatedDisc):
+    pass
+
+
+class JacobianSparsityTestCase(unittest.TestCase):
+    """Check that jacobian blocks are stored compactly without changing their values"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.n_years = 30
+
+    def test_01_block_structures(self):
+        n = self.n_years
+        diagonal = np.diag(self.rng.uniform(1., 2., n))
+        banded = diagonal + np.diag(self.rng.uniform(1., 2., n - 2), -2) + np.diag(self.rng.uniform(1., 2., n - 1), 1)
+        mostly_null = np.zeros((n, n))
+        mostly_null[:, 0] = 1.
+        dense = np.tril(self.rng.uniform(1., 2., (n, n)))
+        expected = [(np.zeros((n, n)), ZERO), (diagonal, DIAGONAL), (banded, BANDED), (mostly_null, SPARSE), (dense, DENSE)]
+        for block, kind in expected:
+            self.assertEqual(get_block_structure(block)[0], kind)
+            sparse_block = to_sparse_block(block)
+            if kind == ZERO:
+                self.assertIsNone(sparse_block)
+            elif kind == DENSE:
+                self.assertIs(sparse_block, block)
+            else:
+                self.assertTrue(sparse.issparse(sparse_block))
+                np.testing.assert_array_equal(sparse_block.toarray(), block)
+        self.assertEqual(get_block_structure(banded)[1:], (2, 1))
+
+        # declared structures
+        np.testing.assert_array_equal(to_sparse_block(banded, DIAGONAL).toarray(), diagonal)
+        self.assertIs(to_sparse_block(diagonal, DENSE), diagonal)
+        rectangular = self.rng.uniform(1., 2., (n, 3))
+        np.testing.assert_array_equal(to_sparse_block(rectangular, DIAGONAL), rectangular)
+
+    def test_02_discipline(self):
+        disc = SparseJacobianDisc()
+        diagonal = np.diag(self.rng.uniform(1., 2., self.n_years))
+        disc.set_partial_derivative_for_other_types(('prices', 'electricity'), ('stream_prices', 'electricity'), diagonal)
+        disc.set_partial_derivative_for_other_types(('prices', 'electricity'), ('invest', 'invest'), diagonal)
+        disc.set_partial_derivative_for_other_types(('prices', 'electricity'), ('co2_taxes', 'CO2_tax'), np.zeros_like(diagonal))
+        self.assertTrue(sparse.issparse(disc.jac[(('prices', 'electricity'), ('stream_prices', 'electricity'))]))
+        self.assertIs(disc.jac[(('prices', 'electricity'), ('invest', 'invest'))], diagonal)
+        self.assertNotIn((('prices', 'electricity'), ('co2_taxes', 'CO2_tax')), disc.jac)
+        banded = diagonal + np.diag(np.ones(self.n_years - 1), -1)
+        disc.set_partial_derivative_for_other_types(('co2_emissions', 'CO2'), ('stream_prices', 'electricity'), banded)
+        np.testing.assert_array_equal(disc.jac[(('co2_emissions', 'CO2'), ('stream_prices', 'electricity'))].toarray(), diagonal)
+        # blocks not declared are passed as computed, without scanning them
+        disc.set_partial_derivative_for_other_types(('capital', 'capital'), ('stream_prices', 'electricity'), diagonal)
+        self.assertIs(disc.jac[(('capital', 'capital'), ('stream_prices', 'electricity'))], diagonal)
+
+        disc.sparse_jacobian = False
+        disc.set_partial_derivative_for_other_types(('prices', 'electricity'), ('stream_prices', 'electricity'), diagonal)
+        self.assertIs(disc.jac[(('prices', 'electricity'), ('stream_prices', 'electricity'))], diagonal)
+
+    def test_03_diagonal_jacobian(self):
+        stream_prices = self.rng.uniform(1., 2., self.n_years)
+        disc = DiagonalJacobianDisc({'stream_prices': pd.DataFrame({'years': np.arange(2020, 2020 + self.n_years),
+                                                                    'electricity': stream_prices}),
+                                     'heat_losses_percentage': 5, 'energy_list': ['electricity']})
+        # model not computed
+        disc.compute_sos_jacobian()
+        self.assertTrue(disc.autodifferentiated)
+
+        disc.autodifferentiated = False
+        disc.run()
+        disc.compute_sos_jacobian()
+        self.assertFalse(disc.autodifferentiated)
+        block = disc.jac[(('prices', 'electricity'), ('stream_prices', 'electricity'))]
+        self.assertTrue(sparse.issparse(block))
+        np.testing.assert_array_equal(block.toarray(), np.diag(2. * stream_prices))
+        np.testing.assert_array_equal(disc.jac[(('prices', 'electricity'), ('heat_losses_percentage',))],
+                                      stream_prices.reshape(-1, 1) / 100.)
+
+        # same values as the last run, in other objects and types
+        disc.inputs = dict(disc.inputs, stream_prices=disc.inputs['stream_prices'].copy(), heat_losses_percentage=5.)
+        disc.compute_sos_jacobian()
+        self.assertFalse(disc.autodifferentiated)
+
+        # linearized at other inputs than the last run
+        for name, value in (('heat_losses_percentage', 6.),
+                            ('stream_prices', disc.inputs['stream_prices'].assign(electricity=stream_prices + 1.)),
+                            ('stream_prices', disc.inputs['stream_prices'].drop(columns='electricity'))):
+            disc.autodifferentiated = False
+            disc.inputs = dict(disc.inputs, **{name: value})
+            disc.compute_sos_jacobian()
+            self.assertTrue(disc.autodifferentiated, name)
+            disc.run()
+
+if '__main__' == __name__:
+    unittest.main()
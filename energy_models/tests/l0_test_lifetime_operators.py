@@ -0,0 +1,71 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+from autograd import jacobian
+from autograd import numpy as autograd_np
+
+from energy_models.core.techno_type.lifetime_operators import (
+    lifetime_window_age_sum,
+    lifetime_window_sum,
+    mean_age_of_initial_plants,
+    remaining_share_of_initial_plants,
+)
+
+
+class LifetimeOperatorsTestCase(unittest.TestCase):
+    """Check banded lifetime operators and their derivatives against the dense masks they replace"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+        self.cases = [(n_years, lifetime) for n_years in [1, 5, 81] for lifetime in [1, 3, 25, 100]]
+
+    def test_01_lifetime_window_sum(self):
+        for n_years, lifetime in self.cases:
+            capacity = self.rng.uniform(0., 10., n_years)
+            mask_prod = np.zeros((n_years, n_years))
+            for i in range(n_years):
+                mask_prod[i, i: min(n_years, i + lifetime)] = 1
+            np.testing.assert_allclose(lifetime_window_sum(capacity, lifetime), mask_prod.T @ capacity, rtol=1e-10, atol=1e-10)
+            np.testing.assert_allclose(jacobian(lambda x: lifetime_window_sum(x, lifetime, autograd_np))(capacity), mask_prod.T)
+
+    def test_02_lifetime_window_age_sum(self):
+        for n_years, lifetime in self.cases:
+            capacity = self.rng.uniform(0., 10., n_years)
+            mask_age = np.zeros((n_years, n_years))
+            ages = np.concatenate([np.arange(0, lifetime), np.zeros(max(n_years - lifetime, 0))])
+            for i in range(n_years):
+                mask_age[i, i:] = ages[:n_years - i]
+            np.testing.assert_allclose(lifetime_window_age_sum(capacity, lifetime), mask_age.T @ capacity, rtol=1e-10, atol=1e-9)
+            np.testing.assert_allclose(jacobian(lambda x: lifetime_window_age_sum(x, lifetime, autograd_np))(capacity), mask_age.T,
+                                       atol=1e-12)
+
+    def test_03_initial_plants(self):
+        for lifetime in [1, 3, 25]:
+            decay_rate = self.rng.uniform(0.5, 1.5)
+            distribution = decay_rate ** np.arange(lifetime)
+            initial_age_distrib = np.flip(distribution / distribution.sum() * 100)
+
+            dense = np.flip(np.tril(initial_age_distrib))
+            np.testing.assert_allclose(remaining_share_of_initial_plants(initial_age_distrib), dense.sum(axis=1))
+
+            dense = (dense.T / dense.sum(axis=1)).T
+            np.testing.assert_allclose(mean_age_of_initial_plants(initial_age_distrib), dense @ np.arange(lifetime))
+
+
+if '__main__' == __name__:
+    unittest.main()
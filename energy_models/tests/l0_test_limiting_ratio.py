@@ -0,0 +1,58 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from energy_models.core.techno_type.techno_type import TechnoType
+from energy_models.glossaryenergy import GlossaryEnergy
+from energy_models.models.electricity.wind_onshore.wind_onshore import WindOnshore
+from energy_models.tests.techno_model_inputs import (
+    RESOURCE_RATIO_COLUMN,
+    get_wind_onshore_inputs,
+)
+
+
+class LimitingRatioTestCase(unittest.TestCase):
+    """Check that the limiting ratios are selected again only when the inputs they are selected from change"""
+
+    def test_01_ratios_selected_once(self):
+        model = WindOnshore(GlossaryEnergy.WindOnshore)
+        inputs = get_wind_onshore_inputs()
+        with mock.patch.object(WindOnshore, 'select_limiting_ratios', side_effect=TechnoType.select_limiting_ratios) as select:
+            for seed in range(3):
+                model.inputs = get_wind_onshore_inputs(seed=seed)
+                model.compute()
+            self.assertEqual(select.call_count, 1)
+            self.assertEqual(model.ratios_name_list, [RESOURCE_RATIO_COLUMN])
+            np.testing.assert_allclose(model.outputs['applied_ratio:applied_ratio'], model.inputs[RESOURCE_RATIO_COLUMN])
+
+            model.inputs = dict(inputs, **{GlossaryEnergy.BoolApplyResourceRatio: False})
+            model.compute()
+            self.assertEqual(select.call_count, 2)
+            self.assertEqual(model.ratios_name_list, [])
+            np.testing.assert_array_equal(model.outputs['applied_ratio:applied_ratio'], 100.)
+
+            # ratio selected but not given in the inputs
+            model.inputs = {name: value for name, value in inputs.items() if name != RESOURCE_RATIO_COLUMN}
+            model.compute()
+            self.assertEqual(select.call_count, 3)
+            self.assertEqual(model.ratios_name_list, [])
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,96 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from energy_models.core.jacobian_sparsity import DETECT, SparseJacobianMixin
+from energy_models.core.linearization_cache import (
+    LinearizationCache,
+    LinearizationCacheMixin,
+)
+
+
+class JacobianDisc:
+    def __init__(self, inputs: dict):
+        self.inputs = inputs
+        self.jac = {}
+        self.nb_linearizations = 0
+
+    def get_sosdisc_inputs(self):
+        return self.inputs
+
+    def compute_sos_jacobian(self):
+        self.nb_linearizations += 1
+        invest = self.inputs['invest']['invest'].values
+        self.set_partial_derivative_for_other_types(('capital', 'capital'), ('invest', 'invest'), np.diag(invest * self.inputs['capex']))
+        self.set_partial_derivative_for_other_types(('capital', 'capital'), ('ratio', 'ratio'), np.zeros((len(invest), len(invest))))
+
+    def set_partial_derivative_for_other_types(self, y_key_column, x_key_column, value):
+        self.jac[(y_key_column, x_key_column)] = value
+
+
+class CachedJacobianDisc(SparseJacobianMixin, LinearizationCacheMixin, JacobianDisc):
+    jacobian_sparsity = {'capital': DETECT}
+
+
+class LinearizationCacheTestCase(unittest.TestCase):
+    """Check that jacobians are reused for inputs already linearized"""
+
+    def setUp(self):
+        self.disc = CachedJacobianDisc({'invest': pd.DataFrame({'years': np.arange(2020, 2030), 'invest': np.arange(10.)}), 'capex': 2.})
+
+    def test_01_reuse_jacobian(self):
+        self.disc.compute_sos_jacobian()
+        jac = dict(self.disc.jac)
+        self.disc.jac = {}
+        self.disc.inputs = {'invest': pd.DataFrame({'years': np.arange(2020, 2030), 'invest': np.arange(10.)}), 'capex': 2.}
+        self.disc.compute_sos_jacobian()
+        self.assertEqual(self.disc.nb_linearizations, 1)
+        self.assertEqual(self.disc.jac.keys(), jac.keys())
+        np.testing.assert_array_equal(self.disc.jac[(('capital', 'capital'), ('invest', 'invest'))].toarray(), np.diag(np.arange(10.) * 2.))
+
+        self.disc.inputs['capex'] = 3.
+        self.disc.compute_sos_jacobian()
+        self.assertEqual(self.disc.nb_linearizations, 2)
+        cache = self.disc.get_linearization_cache()
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        self.disc.linearization_cache = LinearizationCache(max_entries=0, max_bytes=0)
+        self.disc.compute_sos_jacobian()
+        self.disc.compute_sos_jacobian()
+        self.assertEqual(self.disc.nb_linearizations, 4)
+
+    def test_02_bounds(self):
+        cache = LinearizationCache(max_entries=2, max_bytes=1000)
+        block = np.ones(50)
+        cache.put('a', [(None, None, block)])
+        cache.put('b', [(None, None, block)])
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('c', [(None, None, block)])
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.nbytes, 800)
+
+        cache.put('d', [(None, None, np.ones(100))])
+        self.assertEqual(list(cache.entries), ['d'])
+        cache.put('e', [(None, None, np.ones(200))])
+        self.assertEqual(list(cache.entries), ['d'])
+        self.assertIsNone(cache.get('e'))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,82 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from energy_models.core.sankey_fluxes import SankeyFluxes, SankeyFluxesMixin
+from energy_models.glossaryenergy import GlossaryEnergy
+
+
+class Disc:
+    def run(self):
+        pass
+
+
+class SankeyDisc(SankeyFluxesMixin, Disc):
+    def __init__(self, production: pd.DataFrame):
+        self.production = production
+        self.computations = 0
+
+    def compute_sankey_fluxes(self):
+        self.computations += 1
+        return SankeyFluxes.from_dataframes(self.production[GlossaryEnergy.Years].to_numpy(), {'techno': (None, self.production)})
+
+
+class SankeyFluxesTestCase(unittest.TestCase):
+    """Flows of streams of the Sankey charts"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.years = np.arange(2020, 2031)
+        self.consumption = pd.DataFrame({GlossaryEnergy.Years: self.years,
+                                         'electricity (TWh)': rng.random(len(self.years)),
+                                         'water (Mt)': rng.random(len(self.years))})
+        self.production = pd.DataFrame({GlossaryEnergy.Years: self.years,
+                                        'methane (TWh)': rng.random(len(self.years)),
+                                        'methane': rng.random(len(self.years))})
+
+    def test_01_fluxes(self):
+        fluxes = SankeyFluxes.from_dataframes(self.years, {'techno': (self.consumption, self.production),
+                                                           'available': (self.production, None)})
+        self.assertEqual(fluxes.streams, ['electricity', 'methane'])
+        self.assertEqual(fluxes.flows['input'].shape, (2, 2, len(self.years)))
+        np.testing.assert_array_equal(fluxes.flows['output'][0, 1], self.production['methane (TWh)'] + self.production['methane'])
+
+        actors_dictionary = fluxes.get_actors_dictionary()
+        self.assertEqual(list(actors_dictionary['techno']['input'].columns), [GlossaryEnergy.Years, 'electricity'])
+        self.assertEqual(list(actors_dictionary['available']['output'].columns), [GlossaryEnergy.Years])
+        np.testing.assert_array_equal(actors_dictionary['techno']['input']['electricity'], self.consumption['electricity (TWh)'])
+        self.assertEqual(list(fluxes.get_actors_dictionary(['methane'])['techno']['input'].columns), [GlossaryEnergy.Years])
+
+    def test_02_fluxes_once_per_run(self):
+        # not run by this instance : built on the first request
+        disc = SankeyDisc(self.production)
+        fluxes = disc.get_sankey_fluxes()
+        self.assertIs(disc.get_sankey_fluxes(), fluxes)
+        self.assertEqual(disc.computations, 1)
+
+        disc.production = self.production.assign(methane=0.)
+        disc.run()
+        self.assertEqual(disc.computations, 2)
+        self.assertIsNot(disc.get_sankey_fluxes(), fluxes)
+        self.assertIs(disc.get_sankey_fluxes(), disc.get_sankey_fluxes())
+        self.assertEqual(disc.computations, 2)
+        np.testing.assert_array_equal(disc.get_sankey_fluxes().flows['output'][0, 0], self.production['methane (TWh)'])
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,36 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from energy_models.core.techno_type.step_cache import fingerprint, is_plain_value
+
+
+class StepCacheTestCase(unittest.TestCase):
+    """Check the fingerprints of the values read by the caches"""
+
+    def test_01_plain_values(self):
+        # non plain values, as traced arrays of automatic differentiation, are not fingerprinted
+        self.assertTrue(is_plain_value([np.arange(5.), {'rate': 0.5, 'name': 'techno'}, None]))
+        self.assertFalse(is_plain_value([np.arange(5.), object()]))
+        self.assertFalse(is_plain_value(np.array([object()] * 5)))
+        self.assertEqual(fingerprint({'a': np.arange(3), 'b': [1, 'c']}), fingerprint({'b': [1, 'c'], 'a': np.arange(3)}))
+        self.assertNotEqual(fingerprint({'a': np.arange(3)}), fingerprint({'a': np.arange(3.)}))
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,124 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import gc
+import pickle
+import time
+import unittest
+
+from energy_models.core.steps_timer import StepsTimer
+
+
+class TimedModel:
+    def __init__(self, name):
+        self.name = name
+        self.steps_timer = StepsTimer(self) if StepsTimer.enabled else None
+
+    def compute(self):
+        self.compute_price()
+        self.compute_production()
+        self.compute_production()
+
+    def compute_price(self):
+        self.compute_capex()
+        time.sleep(0.002)
+
+    def compute_capex(self):
+        time.sleep(0.004)
+
+    def compute_production(self):
+        time.sleep(0.001)
+
+    def get_name(self):
+        return self.name
+
+
+class StepsTimerTestCase(unittest.TestCase):
+    """Check the opt-in timing of the steps of a model"""
+
+    def tearDown(self):
+        StepsTimer.enabled = False
+        StepsTimer.max_records = 100
+
+    def test_01_disabled(self):
+        model = TimedModel('techno')
+        model.compute()
+        self.assertIsNone(model.steps_timer)
+        self.assertIsNone(StepsTimer.get_model_timer(model))
+
+    def test_02_records(self):
+        StepsTimer.enabled = True
+        model = TimedModel('techno')
+        self.assertIsNone(StepsTimer.get_model_timer(model))
+        model.compute()
+        model.compute()
+        model.get_name()
+
+        records = model.steps_timer.records
+        self.assertEqual(len(records), 2)
+        self.assertEqual(set(records[0]), {'compute', 'compute_price', 'compute_capex', 'compute_production'})
+        # nested steps are not counted twice
+        self.assertGreaterEqual(records[0]['compute_capex'], 0.004)
+        self.assertLess(records[0]['compute_price'], records[0]['compute_capex'] + 0.002 + 0.004)
+        self.assertGreaterEqual(records[0]['compute_production'], 0.002)
+        self.assertLess(records[0]['compute'], records[0]['compute_capex'])
+
+        summary = model.steps_timer.get_summary()
+        self.assertEqual(list(summary)[0], 'compute_capex')
+        self.assertEqual(summary['compute_capex']['calls'], 2)
+        self.assertAlmostEqual(summary['compute_capex']['total'], records[0]['compute_capex'] + records[1]['compute_capex'])
+        self.assertEqual(list(StepsTimer.get_all_summaries()), ['techno'])
+
+    def test_03_bounded_records(self):
+        StepsTimer.enabled = True
+        StepsTimer.max_records = 3
+        model = TimedModel('techno_bounded')
+        for _ in range(5):
+            model.compute()
+
+        self.assertEqual(len(model.steps_timer.records), 3)
+        summary = model.steps_timer.get_summary()
+        # the dropped records are still counted in the summary
+        self.assertEqual(summary['compute']['calls'], 5)
+        self.assertEqual(summary['compute_production']['calls'], 5)
+        self.assertGreaterEqual(summary['compute_capex']['total'], 5 * 0.004)
+
+    def test_04_timers_of_deleted_models(self):
+        StepsTimer.enabled = True
+        model = TimedModel('techno_deleted')
+        model.compute()
+        self.assertIn('techno_deleted', StepsTimer.get_all_summaries())
+
+        del model
+        gc.collect()
+        self.assertNotIn('techno_deleted', StepsTimer.get_all_summaries())
+
+    def test_05_pickled_model(self):
+        StepsTimer.enabled = True
+        model = TimedModel('techno_pickled')
+        model.compute()
+        # the steps are timed on the class, not on the model
+        self.assertEqual(set(vars(model)), {'name', 'steps_timer'})
+
+        unpickled_model = pickle.loads(pickle.dumps(model))
+        self.assertEqual(list(unpickled_model.steps_timer.records), list(model.steps_timer.records))
+        unpickled_model.compute()
+        self.assertEqual(len(unpickled_model.steps_timer.records), 2)
+        self.assertEqual(len(model.steps_timer.records), 1)
+        self.assertIn(unpickled_model.steps_timer, StepsTimer.timers)
+
+
+if '__main__' == __name__:
+    unittest.main()
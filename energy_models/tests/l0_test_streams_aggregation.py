@@ -0,0 +1,109 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from energy_models.core.stream_type.streams_aggregation import (
+    AGGREGATED_VARIABLES,
+    TECHNO_PRICES,
+    aggregate_streams,
+    get_streams_aggregation_partials,
+)
+from energy_models.glossaryenergy import GlossaryEnergy
+
+
+class StreamsAggregationTestCase(unittest.TestCase):
+    """
+    Aggregation of streams of the heat and fuel disciplines
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.years = np.arange(2020, 2031)
+
+        def df(columns):
+            return pd.DataFrame({GlossaryEnergy.Years: self.years, **{column: rng.random(len(self.years)) for column in columns}})
+
+        self.streams_inputs = {}
+        for i, stream in enumerate(['heat.a', 'heat.b']):
+            self.streams_inputs[stream] = {
+                GlossaryEnergy.StreamPricesValue: df([stream, f'{stream}_wotaxes']),
+                TECHNO_PRICES: df([f'techno_{i}']),
+                GlossaryEnergy.StreamEnergyConsumptionValue: df(['electricity (TWh)', f'resource_{i} (Mt)']),
+                GlossaryEnergy.StreamProductionValue: df([stream, 'carbon_capture (Mt)']),
+                GlossaryEnergy.StreamProductionDetailedValue: df([f'techno_{i}']),
+            }
+
+    def test_01_aggregation(self):
+        outputs = aggregate_streams(self.years, self.streams_inputs, 'heat')
+
+        productions = [self.streams_inputs[stream][GlossaryEnergy.StreamProductionValue][stream] for stream in self.streams_inputs]
+        prices = [self.streams_inputs[stream][GlossaryEnergy.StreamPricesValue][stream] for stream in self.streams_inputs]
+        expected_price = (prices[0] * productions[0] + prices[1] * productions[1]) / (productions[0] + productions[1])
+        np.testing.assert_allclose(outputs[GlossaryEnergy.StreamPricesValue]['heat'], expected_price)
+
+        production = outputs[GlossaryEnergy.StreamProductionValue]
+        self.assertEqual(list(production.columns), sorted(['carbon_capture (Mt)', 'heat.a', 'heat.b', GlossaryEnergy.Years]))
+        np.testing.assert_allclose(
+            production['carbon_capture (Mt)'],
+            sum(self.streams_inputs[stream][GlossaryEnergy.StreamProductionValue]['carbon_capture (Mt)'] for stream in self.streams_inputs))
+
+    def test_02_partials_vs_finite_differences(self):
+        partials = {(output_name, output_column, stream, input_name, input_column): value
+                    for (output_name, output_column), (stream, input_name, input_column), value
+                    in get_streams_aggregation_partials(self.years, self.streams_inputs, 'heat')}
+        step = 1e-6
+        for stream, stream_inputs in self.streams_inputs.items():
+            for input_name in AGGREGATED_VARIABLES:
+                input_df = stream_inputs[input_name]
+                for input_column in input_df.columns.drop(GlossaryEnergy.Years):
+                    reference = input_df[input_column].to_numpy()
+                    input_df[input_column] = reference + step
+                    outputs_plus = aggregate_streams(self.years, self.streams_inputs, 'heat')
+                    input_df[input_column] = reference - step
+                    outputs_minus = aggregate_streams(self.years, self.streams_inputs, 'heat')
+                    input_df[input_column] = reference
+                    for output_name, output_df in outputs_plus.items():
+                        for output_column in output_df.columns.drop(GlossaryEnergy.Years):
+                            finite_differences = (output_df[output_column] - outputs_minus[output_name][output_column]) / (2 * step)
+                            partial = partials.get((output_name, output_column, stream, input_name, input_column),
+                                                   np.zeros((len(self.years), len(self.years))))
+                            # the perturbation is applied on all the years at once
+                            np.testing.assert_allclose(partial.sum(axis=1), finite_differences, atol=1e-6)
+
+    def test_03_years_without_production(self):
+        no_production = self.years >= 2028
+        for stream in self.streams_inputs:
+            self.streams_inputs[stream][GlossaryEnergy.StreamProductionValue].loc[no_production, stream] = 0.
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            outputs = aggregate_streams(self.years, self.streams_inputs, 'heat')
+            partials = get_streams_aggregation_partials(self.years, self.streams_inputs, 'heat')
+
+        self.assertTrue(np.isnan(outputs[GlossaryEnergy.StreamPricesValue]['heat'][no_production]).all())
+        self.assertFalse(np.isnan(outputs[GlossaryEnergy.StreamPricesValue]['heat'][~no_production]).any())
+        for (_, output_column), _, value in partials:
+            self.assertTrue(np.isfinite(value).all())
+            if output_column == 'heat':
+                np.testing.assert_array_equal(np.diag(value)[no_production], 0.)
+                self.assertTrue((np.diag(value)[~no_production] != 0.).all())
+
+
+if '__main__' == __name__:
+    unittest.main()
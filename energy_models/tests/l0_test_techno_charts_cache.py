@@ -0,0 +1,99 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+import warnings
+
+import numpy as np
+import pandas as pd
+from sostrades_core.execution_engine.execution_engine import ExecutionEngine
+
+from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.stream_type.resources_data_disc import (
+    get_default_resources_CO2_emissions,
+    get_default_resources_prices,
+)
+from energy_models.glossaryenergy import GlossaryEnergy
+
+warnings.filterwarnings("ignore")
+
+
+class TechnoChartsCacheTestCase(unittest.TestCase):
+    """
+    Charts of a techno discipline reused while their data is unchanged
+    """
+
+    def setUp(self):
+        self.name = 'Test'
+        self.model_name = 'wind_on_shore'
+        self.years = np.arange(GlossaryEnergy.YearStartDefault, GlossaryEnergy.YearEndDefault + 1)
+
+        self.ee = ExecutionEngine(self.name)
+        ns_dict = {'ns_public': self.name, 'ns_energy': self.name, 'ns_energy_study': self.name,
+                   GlossaryEnergy.NS_WITNESS: self.name, GlossaryEnergy.NS_ENERGY_MIX: self.name,
+                   'ns_electricity': self.name, 'ns_resource': self.name}
+        self.ee.ns_manager.add_ns_def(ns_dict)
+        mod_path = 'energy_models.models.electricity.wind_onshore.wind_onshore_disc.WindOnshoreDiscipline'
+        builder = self.ee.factory.get_builder_from_module(self.model_name, mod_path)
+        self.ee.factory.set_builders_to_coupling_builder(builder)
+        self.ee.configure()
+
+        demand_ratio_dict = dict(zip(EnergyMix.energy_list, np.linspace(40.0, 90.0, len(self.years))))
+        demand_ratio_dict[GlossaryEnergy.Years] = self.years
+        resource_ratio_dict = dict(zip(EnergyMix.resource_list, np.linspace(60.0, 80.0, len(self.years))))
+        resource_ratio_dict[GlossaryEnergy.Years] = self.years
+        inputs_dict = {
+            f'{self.name}.{GlossaryEnergy.RessourcesCO2EmissionsValue}': get_default_resources_CO2_emissions(self.years),
+            f'{self.name}.{GlossaryEnergy.ResourcesPriceValue}': get_default_resources_prices(self.years),
+            f'{self.name}.{self.model_name}.{GlossaryEnergy.MarginValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.MarginValue: 110.0}),
+            f'{self.name}.{GlossaryEnergy.CO2TaxesValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.CO2Tax: np.linspace(14.86, 50.29, len(self.years))}),
+            f'{self.name}.{self.model_name}.{GlossaryEnergy.InvestLevelValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.InvestValue: np.linspace(22., 31., len(self.years))}),
+            f'{self.name}.{GlossaryEnergy.TransportCostValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, 'transport': 11.0}),
+            f'{self.name}.{GlossaryEnergy.TransportMarginValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.MarginValue: 100.0}),
+            f'{self.name}.{GlossaryEnergy.AllStreamsDemandRatioValue}': pd.DataFrame(demand_ratio_dict),
+            f'{self.name}.all_resource_ratio_usable_demand': pd.DataFrame(resource_ratio_dict),
+        }
+        self.ee.load_study_from_input_dict(inputs_dict)
+        self.ee.execute()
+        self.disc = self.ee.dm.get_disciplines_with_name(f'{self.name}.{self.model_name}')[0]
+        self.wrapper = self.disc.discipline_wrapp.wrapper
+
+    def test_01_cached_charts_not_shared(self):
+        """Charts modified by the post-processing do not change the charts given next"""
+        filters = self.disc.get_chart_filter_list()
+        graph_list = self.disc.get_post_processing_list(filters)
+        reference = [(graph.chart_name, len(graph.series)) for graph in graph_list]
+        self.assertTrue(self.wrapper.charts_cache)
+
+        for graph in graph_list:
+            graph.chart_name = 'modified'
+            graph.series.clear()
+        cached_graph_list = self.disc.get_post_processing_list(filters)
+        self.assertEqual([(graph.chart_name, len(graph.series)) for graph in cached_graph_list], reference)
+
+        # the charts given from the cache are modified in turn
+        for graph in cached_graph_list:
+            graph.series.clear()
+        self.assertEqual([(graph.chart_name, len(graph.series)) for graph in self.disc.get_post_processing_list(filters)],
+                         reference)
+
+
+if '__main__' == __name__:
+    unittest.main()
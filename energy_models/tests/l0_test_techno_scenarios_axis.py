@@ -0,0 +1,96 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+
+import numpy as np
+
+from energy_models.glossaryenergy import GlossaryEnergy
+from energy_models.models.electricity.wind_onshore.wind_onshore import WindOnshore
+from energy_models.tests.techno_model_inputs import (
+    RESOURCE_RATIO_COLUMN,
+    TIME_DEPENDANT_INPUTS,
+    compute_wind_onshore,
+    get_wind_onshore_inputs,
+)
+
+
+class WindOnshoreWithConstantByproduct(WindOnshore):
+    """By-product given as a float, as in the fischer tropsch model"""
+
+    def compute_byproducts_production(self):
+        self.outputs[f'{GlossaryEnergy.TechnoTargetProductionValue}:{GlossaryEnergy.WaterResource} ({GlossaryEnergy.mass_unit})'] = 0.5
+
+
+class TechnoScenariosAxisTestCase(unittest.TestCase):
+    """Check that a techno computed on a batch of scenarios [n_scenarios, n_years] matches the per-scenario computes"""
+
+    def setUp(self):
+        self.n_scenarios = 4
+        self.n_years = len(get_wind_onshore_inputs()[TIME_DEPENDANT_INPUTS[0]])
+        self.production_column = f'{GlossaryEnergy.TechnoProductionValue}:{GlossaryEnergy.electricity}'
+
+    def get_scenarios_inputs(self, batched_inputs_names=TIME_DEPENDANT_INPUTS, **kwargs) -> tuple[list[dict], dict]:
+        """Inputs of each scenario, and the inputs of the batch, with the time dependant inputs stacked"""
+        scenarios_inputs = [get_wind_onshore_inputs(seed=seed, **kwargs) for seed in range(self.n_scenarios)]
+        batch_inputs = dict(scenarios_inputs[0])
+        for input_name in TIME_DEPENDANT_INPUTS:
+            if input_name in batched_inputs_names:
+                batch_inputs[input_name] = np.stack([inputs[input_name] for inputs in scenarios_inputs])
+            else:
+                for inputs in scenarios_inputs:
+                    inputs[input_name] = batch_inputs[input_name]
+        return scenarios_inputs, batch_inputs
+
+    def check_batch(self, scenarios_inputs: list[dict], batch_inputs: dict, model_class: type = WindOnshore) -> dict:
+        """Outputs of the batch : outputs of each scenario along the scenario axis, or the same for all the scenarios"""
+        batch_outputs = compute_wind_onshore(batch_inputs, model_class).outputs
+        scenarios_outputs = [compute_wind_onshore(inputs, model_class).outputs for inputs in scenarios_inputs]
+        for name, batch_value in batch_outputs.items():
+            for i_scenario, outputs in enumerate(scenarios_outputs):
+                value = np.asarray(outputs[name])
+                batch_value = np.asarray(batch_value)
+                scenario_batch_value = batch_value[i_scenario] if batch_value.ndim > value.ndim else batch_value
+                self.assertEqual(scenario_batch_value.shape, value.shape, name)
+                np.testing.assert_allclose(scenario_batch_value, value, rtol=1e-10, atol=1e-12, err_msg=name)
+        for name in (self.production_column, 'applied_ratio:applied_ratio', 'applied_ratio:limiting_input_index',
+                     f'{GlossaryEnergy.TechnoPricesValue}:{GlossaryEnergy.WindOnshore}'):
+            self.assertEqual(np.shape(batch_outputs[name]), (self.n_scenarios, self.n_years), name)
+        return batch_outputs
+
+    def test_01_limiting_resource_ratio(self):
+        batch_outputs = self.check_batch(*self.get_scenarios_inputs())
+        self.assertTrue(np.all(batch_outputs['applied_ratio:limiting_input_index'] == 0))
+
+    def test_02_no_limiting_ratio(self):
+        batch_outputs = self.check_batch(*self.get_scenarios_inputs(apply_resource_ratio=False))
+        np.testing.assert_array_equal(batch_outputs['applied_ratio:applied_ratio'], 100.)
+        np.testing.assert_array_equal(batch_outputs['applied_ratio:limiting_input_index'], -1)
+
+    def test_03_ratio_shared_by_the_scenarios(self):
+        batched_inputs_names = [name for name in TIME_DEPENDANT_INPUTS if name != RESOURCE_RATIO_COLUMN]
+        self.check_batch(*self.get_scenarios_inputs(batched_inputs_names))
+
+    def test_04_constant_byproduct(self):
+        scenarios_inputs, batch_inputs = self.get_scenarios_inputs()
+        batch_outputs = compute_wind_onshore(batch_inputs, WindOnshoreWithConstantByproduct).outputs
+        byproduct_column = f'{GlossaryEnergy.WaterResource} ({GlossaryEnergy.mass_unit})'
+        np.testing.assert_allclose(batch_outputs[f'{GlossaryEnergy.TechnoProductionValue}:{byproduct_column}'],
+                                   0.5 * batch_outputs['applied_ratio:applied_ratio'] / 100.)
+        self.check_batch(scenarios_inputs, batch_inputs, WindOnshoreWithConstantByproduct)
+
+
+if '__main__' == __name__:
+    unittest.main()
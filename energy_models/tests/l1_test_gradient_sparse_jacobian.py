@@ -0,0 +1,128 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import unittest
+import warnings
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sostrades_core.execution_engine.execution_engine import ExecutionEngine
+
+from energy_models.core import jacobian_sparsity
+from energy_models.core.energy_mix.energy_mix import EnergyMix
+from energy_models.core.stream_type.resources_data_disc import (
+    get_default_resources_CO2_emissions,
+    get_default_resources_prices,
+)
+from energy_models.glossaryenergy import GlossaryEnergy
+
+warnings.filterwarnings("ignore")
+
+
+class SparseJacobianTechnoTestCase(unittest.TestCase):
+    """
+    Check the gradients of a techno discipline passing sparse blocks to set_partial_derivative_for_other_types
+    """
+
+    def setUp(self):
+        self.name = 'Test'
+        self.model_name = 'wind_on_shore'
+        self.year_start = GlossaryEnergy.YearStartDefault
+        self.year_end = GlossaryEnergy.YearEndDefaultValueGradientTest
+        self.years = np.arange(self.year_start, self.year_end + 1)
+
+        self.ee = ExecutionEngine(self.name)
+        ns_dict = {'ns_public': self.name, 'ns_energy': self.name, 'ns_energy_study': self.name,
+                   GlossaryEnergy.NS_WITNESS: self.name, GlossaryEnergy.NS_ENERGY_MIX: self.name,
+                   'ns_electricity': self.name, 'ns_resource': self.name}
+        self.ee.ns_manager.add_ns_def(ns_dict)
+        mod_path = 'energy_models.models.electricity.wind_onshore.wind_onshore_disc.WindOnshoreDiscipline'
+        builder = self.ee.factory.get_builder_from_module(self.model_name, mod_path)
+        self.ee.factory.set_builders_to_coupling_builder(builder)
+        self.ee.configure()
+
+        margin = pd.DataFrame({GlossaryEnergy.Years: self.years, GlossaryEnergy.MarginValue: 110.0})
+        demand_ratio_dict = dict(zip(EnergyMix.energy_list, np.linspace(40.0, 90.0, len(self.years))))
+        demand_ratio_dict[GlossaryEnergy.Years] = self.years
+        resource_ratio_dict = dict(zip(EnergyMix.resource_list, np.linspace(60.0, 80.0, len(self.years))))
+        resource_ratio_dict[GlossaryEnergy.Years] = self.years
+        self.inputs_dict = {
+            f'{self.name}.{GlossaryEnergy.YearStart}': self.year_start,
+            f'{self.name}.{GlossaryEnergy.YearEnd}': self.year_end,
+            f'{self.name}.{GlossaryEnergy.RessourcesCO2EmissionsValue}': get_default_resources_CO2_emissions(self.years),
+            f'{self.name}.{GlossaryEnergy.ResourcesPriceValue}': get_default_resources_prices(self.years),
+            f'{self.name}.{self.model_name}.{GlossaryEnergy.MarginValue}': margin,
+            f'{self.name}.{GlossaryEnergy.CO2TaxesValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.CO2Tax: np.linspace(14.86, 50.29, len(self.years))}),
+            f'{self.name}.{self.model_name}.{GlossaryEnergy.InvestLevelValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.InvestValue: np.linspace(22., 31., len(self.years))}),
+            f'{self.name}.{GlossaryEnergy.TransportCostValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, 'transport': 11.0}),
+            f'{self.name}.{GlossaryEnergy.TransportMarginValue}': pd.DataFrame(
+                {GlossaryEnergy.Years: self.years, GlossaryEnergy.MarginValue: 100.0}),
+            f'{self.name}.{GlossaryEnergy.AllStreamsDemandRatioValue}': pd.DataFrame(demand_ratio_dict),
+            f'{self.name}.all_resource_ratio_usable_demand': pd.DataFrame(resource_ratio_dict),
+        }
+        self.ee.load_study_from_input_dict(self.inputs_dict)
+        self.ee.execute()
+        proxy = self.ee.root_process.proxy_disciplines[0]
+        self.disc = proxy.discipline_wrapp.discipline
+        self.wrapper = proxy.discipline_wrapp.wrapper
+        # every linearization is computed, none is replayed from the linearization cache
+        self.wrapper.linearization_cache_max_entries = 0
+
+    def test_01_sparse_blocks_gradients(self):
+        """Gradients vs the inputs declared in jacobian_sparsity, with the sparse blocks"""
+        inputs = [f'{self.name}.{self.model_name}.{GlossaryEnergy.MarginValue}',
+                  f'{self.name}.{GlossaryEnergy.CO2TaxesValue}',
+                  f'{self.name}.{GlossaryEnergy.ResourcesPriceValue}',
+                  f'{self.name}.{GlossaryEnergy.TransportCostValue}',
+                  f'{self.name}.{GlossaryEnergy.AllStreamsDemandRatioValue}']
+        outputs = [f'{self.name}.{self.model_name}.{output_name}' for output_name in (
+            GlossaryEnergy.TechnoPricesValue, GlossaryEnergy.TechnoProductionValue,
+            GlossaryEnergy.TechnoEnergyConsumptionValue, GlossaryEnergy.TechnoCapitalValue)]
+
+        # blocks passed as sparse matrices during the check
+        sparse_blocks = []
+        compact_block = jacobian_sparsity.to_sparse_block
+
+        def to_sparse_block(block, declared_structure=None):
+            value = compact_block(block, declared_structure)
+            sparse_blocks.append(sparse.issparse(value))
+            return value
+
+        with mock.patch.object(jacobian_sparsity, 'to_sparse_block', side_effect=to_sparse_block):
+            self.assertTrue(self.disc.check_jacobian(input_data=self.disc.local_data, derr_approx='complex_step',
+                                                     inputs=inputs, outputs=outputs, threshold=1e-5))
+        self.assertTrue(any(sparse_blocks))
+
+        # same jacobian with the dense blocks
+        sparse_jacobian = {output_name: {input_name: self.disc.jac[output_name][input_name].copy() for input_name in inputs}
+                           for output_name in outputs}
+        self.wrapper.sparse_jacobian = False
+        self.disc.linearize(self.disc.local_data, compute_all_jacobians=True)
+        for output_name in outputs:
+            for input_name in inputs:
+                block = sparse_jacobian[output_name][input_name]
+                block = block.toarray() if sparse.issparse(block) else block
+                dense_block = self.disc.jac[output_name][input_name]
+                dense_block = dense_block.toarray() if sparse.issparse(dense_block) else dense_block
+                np.testing.assert_allclose(block, dense_block, rtol=1e-12, atol=1e-14, err_msg=f'{output_name} / {input_name}')
+
+
+if '__main__' == __name__:
+    unittest.main()
@@ -0,0 +1,109 @@
+'''
+Copyright 2025 Capgemini
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import numpy as np
+from autograd import jacobian
+from autograd import numpy as autograd_np
+
+from energy_models.core.stream_type.energy_models.electricity import Electricity
+from energy_models.glossaryenergy import GlossaryEnergy
+from energy_models.models.electricity.wind_onshore.wind_onshore import WindOnshore
+from energy_models.models.electricity.wind_onshore.wind_onshore_disc import (
+    WindOnshoreDiscipline,
+)
+
+# Inputs of a real techno model (wind onshore), as flattened by the autodifferentiated disciplines, to test the
+# model without building a study. The coupling variables depend on the seed of the random generator.
+
+YEAR_START = 2020
+YEAR_END = 2050
+INVEST_COLUMN = f'{GlossaryEnergy.InvestLevelValue}:{GlossaryEnergy.InvestValue}'
+RESOURCE_RATIO_COLUMN = f'all_resource_ratio_usable_demand:{GlossaryEnergy.CopperResource}'
+# time dependant inputs, that can be given with leading scenario axes
+TIME_DEPENDANT_INPUTS = (
+    INVEST_COLUMN,
+    f'{GlossaryEnergy.MarginValue}:{GlossaryEnergy.MarginValue}',
+    f'{GlossaryEnergy.UtilisationRatioValue}:{GlossaryEnergy.UtilisationRatioValue}',
+    f'{GlossaryEnergy.CO2TaxesValue}:{GlossaryEnergy.CO2Tax}',
+    f'{GlossaryEnergy.TransportCostValue}:transport',
+    f'{GlossaryEnergy.TransportMarginValue}:{GlossaryEnergy.MarginValue}',
+    f'{GlossaryEnergy.ResourcesPriceValue}:{GlossaryEnergy.CopperResource}',
+    RESOURCE_RATIO_COLUMN,
+)
+
+
+def get_wind_onshore_inputs(seed: int = 0, apply_resource_ratio: bool = True) -> dict:
+    """Inputs of the wind onshore model, with random investments, margins, taxes and copper availability"""
+    rng = np.random.default_rng(seed)
+    n_years = YEAR_END - YEAR_START + 1
+    return {
+        GlossaryEnergy.YearStart: YEAR_START,
+        GlossaryEnergy.YearEnd: YEAR_END,
+        'techno_infos_dict': dict(WindOnshoreDiscipline.techno_infos_dict_default),
+        'data_fuel_dict': dict(Electricity.data_energy_dict),
+        'initial_production': WindOnshoreDiscipline.initial_production,
+        GlossaryEnergy.LifetimeName: 30,
+        GlossaryEnergy.InitialPlantsAgeDistribFactor: 1.1,
+        'smooth_type': 'cons_smooth_max',
+        GlossaryEnergy.BoolApplyRatio: True,
+        GlossaryEnergy.BoolApplyStreamRatio: True,
+        GlossaryEnergy.BoolApplyResourceRatio: apply_resource_ratio,
+        'techno_is_ccus': False,
+        'techno_is_carbon_capture': False,
+        'extra_ghg_from_external_source': [],
+        GlossaryEnergy.ResourcesUsedForProductionValue: [],
+        GlossaryEnergy.ResourcesUsedForBuildingValue: [GlossaryEnergy.CopperResource],
+        GlossaryEnergy.EnergiesUsedForProductionValue: [],
+        GlossaryEnergy.CCSUsedForProductionValue: [],
+        f'{GlossaryEnergy.InvestmentBeforeYearStartValue}:{GlossaryEnergy.InvestValue}': np.array([20., 25., 30.]),
+        INVEST_COLUMN: rng.uniform(10., 60., n_years),
+        f'{GlossaryEnergy.MarginValue}:{GlossaryEnergy.MarginValue}': rng.uniform(105., 115., n_years),
+        f'{GlossaryEnergy.UtilisationRatioValue}:{GlossaryEnergy.UtilisationRatioValue}': rng.uniform(70., 100., n_years),
+        f'{GlossaryEnergy.CO2TaxesValue}:{GlossaryEnergy.CO2Tax}': np.linspace(15., 40., n_years),
+        f'{GlossaryEnergy.TransportCostValue}:transport': rng.uniform(0., 5., n_years),
+        f'{GlossaryEnergy.TransportMarginValue}:{GlossaryEnergy.MarginValue}': rng.uniform(100., 110., n_years),
+        f'{GlossaryEnergy.ResourcesPriceValue}:{GlossaryEnergy.CopperResource}': rng.uniform(1000., 2000., n_years),
+        RESOURCE_RATIO_COLUMN: rng.uniform(50., 100., n_years),
+    }
+
+
+def compute_wind_onshore(inputs: dict, model_class: type = WindOnshore, **attributes) -> WindOnshore:
+    """Wind onshore model (or a subclass of it) computed on the inputs, with the attributes set before the compute"""
+    model = model_class(GlossaryEnergy.WindOnshore)
+    for name, value in attributes.items():
+        setattr(model, name, value)
+    model.inputs = dict(inputs)
+    model.compute()
+    return model
+
+
+def get_float_outputs(model) -> dict:
+    """Outputs of the model made of floats, the ones that can be differentiated"""
+    return {name: np.asarray(value) for name, value in model.outputs.items()
+            if np.asarray(value).dtype.kind == 'f' and not name.endswith(f':{GlossaryEnergy.Years}')}
+
+
+def get_jacobian(inputs: dict, output_name: str, input_name: str, **attributes) -> np.ndarray:
+    """Jacobian of an output of the wind onshore model with respect to one of its inputs, by automatic differentiation"""
+    def output(value):
+        model = WindOnshore(GlossaryEnergy.WindOnshore)
+        for name, attribute in attributes.items():
+            setattr(model, name, attribute)
+        model.np = autograd_np
+        model.inputs = dict(inputs, **{input_name: value})
+        model.compute()
+        return model.outputs[output_name]
+
+    return jacobian(output)(inputs[input_name])